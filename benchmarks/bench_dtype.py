@@ -0,0 +1,65 @@
+"""
+Processing precision: float64 (default) versus float32 / complex64
+along the pipeline, for growing recording lengths.
+
+The float64 stripe is computed by `signal.cwt`, the float32 one by the
+FFT filter bank - the filter bank in float64 is timed as well, so the
+gain of the precision alone can be told apart from the algorithm.
+
+run from the repo root:
+    python -m benchmarks.bench_dtype
+"""
+
+import statistics
+import timeit
+
+from benchmarks.bench_pipeline import make_recording
+from modules.concrete.pc_sound import (
+    PcProcessor, PcSample, _FilterBank, _Stripe)
+
+
+DURATIONS_S = [0.5, 2., 8.]  # [s]
+N_REPEATS = 5
+
+
+def _measure(statement):
+    statement()  # warm-up, fills the FFT caches
+    seconds = statistics.median(
+        timeit.repeat(statement, number=1, repeat=N_REPEATS))
+    return seconds * 1e3  # [ms]
+
+
+def run(durations_s=DURATIONS_S):
+    frequencies = _Stripe._get_frequencies()
+    results = {}
+    for duration_s in durations_s:
+        sample = make_recording(duration_s)
+        for dtype in ["float64", "float32"]:
+            typed = sample.astype(dtype)
+            values = typed.to_values()
+            bank = _FilterBank(frequencies, dtype=dtype)
+            processor = PcProcessor({"dtype": dtype})
+            stripe = _Stripe.from_sample(typed)
+            key = f"{duration_s:g} s, {dtype}"
+            results[key] = {
+                "sample [MB]": values.nbytes / 1e6,
+                "stripe [MB]": stripe._data.nbytes / 1e6,
+                "from_values [ms]": _measure(
+                    lambda: PcSample.from_values(values, dtype=dtype)),
+                "filter bank [ms]": _measure(
+                    lambda: bank.transform(values)),
+                "process [ms]": _measure(
+                    lambda: processor.process(typed)),
+            }
+    return results
+
+
+def main():
+    for key, timings in run().items():
+        row = "  ".join(
+            f"{name} {value:8.2f}" for name, value in timings.items())
+        print(f"{key:<16}{row}")
+
+
+if __name__ == "__main__":
+    main()
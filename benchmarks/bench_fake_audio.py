@@ -0,0 +1,77 @@
+"""
+Device-side timing of a ping, on the fake sound card (no hardware):
+stream-open cost, `Measurer` barrier alignment (skew between opening
+the output and the input stream) and ping throughput, for the virtual
+and the real clock.
+
+run from the repo root:
+    python -m benchmarks.bench_fake_audio
+"""
+
+import statistics
+import timeit
+
+import numpy as np
+
+from modules.concrete.fake_pyaudio import FakePyAudio, paInt16
+from modules.concrete.pc_sound import CHANNELS, CHUNK, RATE, PcFactory
+from modules.core import Measurer
+
+
+N_PINGS = 5
+N_OPENS = 1000
+
+
+def _open_close(pa):
+    stream = pa.open(format=paInt16, channels=CHANNELS, rate=RATE,
+                     input=True, frames_per_buffer=CHUNK)
+    stream.close()
+
+
+def _open_skews_us(events):
+    """
+    skew between the output and the input stream opened for one ping
+    """
+    opens = {}
+    skews = []
+    for event, time_ns, _ in events:
+        if event in ["open input", "open output"]:
+            opens[event] = time_ns
+        if len(opens) == 2:
+            skews.append(abs(opens["open output"] - opens["open input"]))
+            opens = {}
+    return np.array(skews) / 1e3
+
+
+def run(n_pings=N_PINGS):
+    results = {}
+    pa = FakePyAudio()
+    seconds = statistics.median(timeit.repeat(
+        lambda: _open_close(pa), number=N_OPENS, repeat=5))
+    results["open + close [us]"] = seconds / N_OPENS * 1e6
+
+    for clock in ["virtual", "real"]:
+        pa = FakePyAudio(clock=clock)
+        factory = PcFactory({"pyaudio": pa})
+        measurer = Measurer(factory)
+        measurer.single_measurement()  # warm-up
+        del pa.events[:]
+
+        seconds = statistics.median(timeit.repeat(
+            measurer.single_measurement, number=1, repeat=n_pings))
+        skews = _open_skews_us(pa.events)
+        results[f"{clock}: ping [ms]"] = seconds * 1e3
+        results[f"{clock}: open skew p50 [us]"] = np.percentile(skews, 50)
+        results[f"{clock}: open skew max [us]"] = np.amax(skews)
+        results[f"{clock}: xruns [-]"] = \
+            pa.stats["underruns"] + pa.stats["overflows"]
+    return results
+
+
+def main():
+    for name, value in run().items():
+        print(f"{name:<32}{value:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Hot paths of the sonar pipeline, for growing recording lengths:
+sample conversions, wavelet stripe, peak search, whole processing,
+display (caller's side only for the live one) and the controller loop
+(fake devices - no sound card).
+
+run from the repo root:
+    python -m benchmarks.bench_pipeline
+"""
+
+import contextlib
+import io
+import statistics
+import timeit
+
+import numpy as np
+
+from modules.abstract.abstract_factory import (
+    AbstractEmitter, AbstractFactory, AbstractReceiver)
+from modules.concrete.pc_sound import (
+    CARRIER_FREQUENCY, RATE, PcProcessor, PcSample, _Stripe)
+from modules.concrete.text_display import LiveTextDisplay, TextDisplay
+from modules.core import Controller
+
+
+DURATIONS_S = [0.5, 2.]  # [s]
+N_REPEATS = 5
+N_LOOP_PINGS = 5
+
+
+def make_recording(duration_s, seed=0):
+    """
+    main pulse a quarter into the recording, two echoes and noise
+    """
+    n = int(duration_s * RATE)
+    rng = np.random.default_rng(seed)
+    pulse = np.real(_Stripe._my_wavelet(n, CARRIER_FREQUENCY))
+    shift = n // 4 - n // 2
+    values = 0.8 * np.roll(pulse, shift) \
+             + 0.1 * np.roll(pulse, shift + 800) \
+             + 0.08 * np.roll(pulse, shift + 3000) \
+             + 0.01 * rng.standard_normal(n)
+    return PcSample.from_values(values)
+
+
+class _FakeEmitter(AbstractEmitter):
+    def check(self):
+        pass
+
+    def emit_beep(self):
+        pass
+
+
+class _FakeReceiver(AbstractReceiver):
+    def __init__(self, sample):
+        self.sample = sample
+
+    def check(self):
+        pass
+
+    def record_signal(self):
+        return self.sample
+
+
+class _FakeFactory(AbstractFactory):
+    def __init__(self, sample):
+        self.sample = sample
+
+    def create_emitter(self):
+        return _FakeEmitter()
+
+    def create_receiver(self):
+        return _FakeReceiver(self.sample)
+
+    def create_processor(self):
+        return PcProcessor({})
+
+    def check(self):
+        pass
+
+
+def _measure(statement, n_calls=1):
+    statement()  # warm-up
+    seconds = statistics.median(
+        timeit.repeat(statement, number=n_calls, repeat=N_REPEATS))
+    return seconds / n_calls * 1e3  # [ms / call]
+
+
+def _silent(statement):
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            statement()
+    return run
+
+
+def run(durations_s=DURATIONS_S):
+    results = {}
+    for duration_s in durations_s:
+        sample = make_recording(duration_s)
+        values = sample.to_values()
+        signal = sample.to_signal()
+        chunks = sample.to_chunks()
+        stripe = _Stripe.from_sample(sample)
+        series = stripe.squeeze()
+        processor = PcProcessor({})
+        result = processor.process(sample)
+        display = TextDisplay()
+        live_display = LiveTextDisplay({"stream": io.StringIO()})
+        controller = Controller(_FakeFactory(sample), display)
+
+        timings = {
+            "PcSample.from_values": lambda: PcSample.from_values(values),
+            "PcSample.from_signal": lambda: PcSample.from_signal(signal),
+            "PcSample.from_chunks": lambda: PcSample.from_chunks(chunks),
+            "PcSample.to_data": sample.to_data,
+            "PcSample.to_chunks": sample.to_chunks,
+            "_Stripe.from_sample": lambda: _Stripe.from_sample(sample),
+            "_Stripe.get_offset": stripe.get_offset,
+            "_Series.get_peaks": series.get_peaks,
+            "PcProcessor.process": lambda: processor.process(sample),
+            "TextDisplay.print": _silent(lambda: display.print(result)),
+            "LiveTextDisplay.print": lambda: live_display.print(result),
+        }
+        for name, statement in timings.items():
+            results[f"{name} [{duration_s:g} s] [ms]"] = _measure(statement)
+
+        results[f"Controller.loop [{duration_s:g} s] [ms / ping]"] = \
+            _measure(_silent(lambda: controller.loop(limit=N_LOOP_PINGS))) \
+            / N_LOOP_PINGS
+        live_display.close()
+    return results
+
+
+def main():
+    for name, ms_per_call in run().items():
+        print(f"{name:<48}{ms_per_call:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
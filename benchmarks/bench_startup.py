@@ -0,0 +1,109 @@
+"""
+Startup cost of the entry points, each measured in a fresh interpreter:
+import time of the entry module and time-to-first-ping after it
+(fake sound card - no hardware, no network):
+- local: `pc_sound` - ping on the fake driver + processing
+- http: `http_caller` - the controller's local part of a ping, i.e.
+  processing of a recording (the remote part is network-bound)
+- emitter / receiver: `microservice.main` - `/play`, `/record` request
+  served by the app (in-process client)
+
+run from the repo root:
+    python -m benchmarks.bench_startup
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+N_RUNS = 3
+
+_PROBE = """
+import json
+import time
+
+start = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+{first_ping}
+pinged = time.perf_counter()
+print(json.dumps(
+    {{"import": imported - start, "first ping": pinged - imported}}))
+"""
+
+_FAKE_RECORDING = """
+from modules.concrete.fake_pyaudio import FakePyAudio
+from modules.concrete.pc_sound import PcFactory
+from modules.core import Measurer
+factory = PcFactory({"pyaudio": FakePyAudio()})
+sample = Measurer(factory).single_measurement()
+"""
+
+_SERVICE_PING = """
+from types import SimpleNamespace
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from modules.concrete.fake_pyaudio import FakePyAudio
+main.pyaudio = SimpleNamespace(PyAudio=lambda: FakePyAudio(settle_s=0))
+app = FastAPI(lifespan=main.lifespan)
+app.include_router(main.{routes}.router)
+with TestClient(app) as client:
+    client.request("GET", "{endpoint}", json={{"schedule": time.time_ns()}})
+"""
+
+ENTRY_POINTS = {
+    "local": dict(
+        imports="from modules.concrete import pc_sound",
+        first_ping=_FAKE_RECORDING
+        + "factory.create_processor().process(sample)",
+    ),
+    "http": dict(
+        imports="from modules.concrete import http_caller",
+        first_ping=_FAKE_RECORDING
+        + "http_caller.PcProcessor({}).process(sample)",
+    ),
+    "emitter": dict(
+        env={"SERVICE_TYPE": "EMITTER"},
+        imports="from modules.microservice import main",
+        first_ping=_SERVICE_PING.format(
+            routes="routes_emitter", endpoint="/play"),
+    ),
+    "receiver": dict(
+        env={"SERVICE_TYPE": "RECEIVER"},
+        imports="from modules.microservice import main",
+        first_ping=_SERVICE_PING.format(
+            routes="routes_receiver", endpoint="/record"),
+    ),
+}
+
+
+def _probe(imports, first_ping, env=None):
+    code = _PROBE.format(imports=imports, first_ping=first_ping)
+    output = subprocess.run(
+        [sys.executable, "-c", code], env=dict(os.environ, **(env or {})),
+        capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(n_runs=N_RUNS):
+    results = {}
+    for name, entry_point in ENTRY_POINTS.items():
+        probes = [_probe(**entry_point) for _ in range(n_runs)]
+        import_s = statistics.median(p["import"] for p in probes)
+        ping_s = statistics.median(
+            p["import"] + p["first ping"] for p in probes)
+        results[f"{name}: import [ms]"] = import_s * 1e3
+        results[f"{name}: time to first ping [ms]"] = ping_s * 1e3
+    return results
+
+
+def main():
+    for name, ms in run().items():
+        print(f"{name:<40}{ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Conversion overhead of the scheduling protocol: ISO string form
+versus integer nanoseconds since the epoch.
+
+run from the repo root:
+    python -m benchmarks.bench_timestamps
+"""
+
+import statistics
+import timeit
+
+from modules.utilities import (
+    get_timestamp, get_timestamp_ns, timestamp_to_ns)
+
+
+N_CALLS = 100_000
+
+
+def _measure(statement, n_calls=N_CALLS):
+    seconds = statistics.median(
+        timeit.repeat(statement, number=n_calls, repeat=5))
+    return seconds / n_calls * 1e9  # [ns / call]
+
+
+def run():
+    ts_txt = get_timestamp()
+    ts_ns = get_timestamp_ns()
+    return {
+        "get_timestamp [str]": _measure(get_timestamp),
+        "get_timestamp_ns [int]": _measure(get_timestamp_ns),
+        "timestamp_to_ns [str]": _measure(lambda: timestamp_to_ns(ts_txt)),
+        "timestamp_to_ns [int]": _measure(lambda: timestamp_to_ns(ts_ns)),
+    }
+
+
+def main():
+    for name, ns_per_call in run().items():
+        print(f"{name:<28}{ns_per_call:>10.0f} ns / call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Runs the benchmark suites and compares them with the stored baseline,
+a timing slower than the baseline by more than the threshold is
+reported as a regression (exit status 1).
+
+All benchmarks report "lower is better" values, medians over repeats
+of the statement - the suites are repeated as well and the medians of
+their results are compared. A slow-down smaller than the noise floor
+of the benchmark is not a regression, whatever its ratio - near-zero
+timings double on noise.
+Counters and startup times of a fresh interpreter are reported only.
+Baselines depend on the machine - store a new one after changing the
+hardware:
+
+run from the repo root:
+    python -m benchmarks.regression              # compare
+    python -m benchmarks.regression --save       # store new baseline
+    python -m benchmarks.regression -s pipeline -t 0.1 -r 5
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+
+import numpy as np
+import scipy
+
+from benchmarks import (
+    bench_dtype, bench_fake_audio, bench_pipeline, bench_startup,
+    bench_timestamps)
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+THRESHOLD = 0.25  # [-]  (relative slow-down reported as regression)
+REPEATS = 3  # [-]  (runs of each suite)
+# absolute slow-down which is still noise, in units of the benchmark -
+# the first pattern found in the name applies
+NOISE_FLOORS = [
+    ("open skew", 500.),  # [us]  (wake-up of the device threads)
+    ("[us]", 1.),
+    ("[ms / ping]", 2.),
+    ("[ms]", 0.05),
+    ("timestamps / ", 50.),  # [ns / call]
+]
+# reported, but not compared
+UNCHECKED = [
+    "xruns",  # counters of the fake sound card
+    "startup / ",  # a fresh interpreter each, dominated by the disk cache
+]
+
+SUITES = {
+    "timestamps": bench_timestamps,
+    "dtype": bench_dtype,
+    "pipeline": bench_pipeline,
+    "fake_audio": bench_fake_audio,
+    "startup": bench_startup,
+}
+
+
+def _flatten(results, prefix=""):
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, prefix=f"{prefix}{name}: "))
+        else:
+            flat[f"{prefix}{name}"] = value
+    return flat
+
+
+def run(suites=SUITES, repeats=REPEATS):
+    """
+    median over `repeats` runs of the suites, per benchmark
+    """
+    runs = {}
+    for _ in range(repeats):
+        for suite in suites:
+            suite_results = _flatten(SUITES[suite].run())
+            for name, value in suite_results.items():
+                runs.setdefault(f"{suite} / {name}", []).append(value)
+    return {name: statistics.median(values) for name, values in runs.items()}
+
+
+def _environment():
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+    }
+
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    with open(path, "w") as f:
+        json.dump({"environment": _environment(), "results": results},
+                  f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def _noise_floor(name, floors=NOISE_FLOORS):
+    for pattern, floor in floors:
+        if pattern in name:
+            return floor
+    return 0.
+
+
+def is_checked(name, unchecked=UNCHECKED):
+    return not any(pattern in name for pattern in unchecked)
+
+
+def compare(results, baseline, threshold=THRESHOLD, floors=NOISE_FLOORS,
+            unchecked=UNCHECKED):
+    """
+    returns list of regressions: (name, baseline value, new value),
+    benchmarks missing on either side or unchecked are skipped
+    """
+    regressions = []
+    for name, value in results.items():
+        if name not in baseline or not is_checked(name, unchecked):
+            continue
+        old = baseline[name]
+        if value > old * (1 + threshold) \
+                and value - old > _noise_floor(name, floors):
+            regressions.append((name, old, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="run benchmarks and compare with the baseline")
+    parser.add_argument("-s", "--suite", action="append",
+                        choices=list(SUITES),
+                        help="suite to run, can be repeated (default: all)")
+    parser.add_argument("-t", "--threshold", type=float, default=THRESHOLD,
+                        help="relative slow-down reported as regression")
+    parser.add_argument("-r", "--repeats", type=int, default=REPEATS,
+                        help="runs of each suite, their median is compared")
+    parser.add_argument("-b", "--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true",
+                        help="store results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.suite or SUITES, args.repeats)
+
+    if args.save:
+        if args.suite and os.path.exists(args.baseline):
+            # keep the suites that were not run
+            results = dict(load_baseline(args.baseline), **results)
+        save_baseline(results, args.baseline)
+        print(f"baseline stored: {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    for name, value in results.items():
+        if name not in baseline:
+            change = "     new"
+        elif baseline[name]:
+            change = f"{value / baseline[name] - 1:+8.1%}"
+        else:
+            change = f"{value - baseline[name]:+8.3f}"
+        if not is_checked(name):
+            change += "  (not compared)"
+        print(f"{name:<64}{value:>12.3f}  {change}")
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, old, new in regressions:
+        print(f"REGRESSION: {name}: {old:.3f} -> {new:.3f}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,3 +6,9 @@ class AbstractDisplay(ABC):
     @abstractmethod
     def print(self, result):
         pass
+
+
+class AbstractAsyncDisplay(ABC):
+    @abstractmethod
+    async def print(self, result):
+        pass
@@ -15,6 +15,20 @@ class AbstractEmitter(ABC):
     def emit_beep(self):
         pass
 
+    def warm_up(self) -> dict:
+        """
+        pays one-time costs of the output path before the first ping,
+        returns timings: {"cold_ms": ..., "warm_ms": ...} (or empty)
+        """
+        return {}
+
+    def configure(self, **settings):
+        """
+        settings of the next pings chosen by a scheduler, e.g.
+        `volume`; the ones not supported are ignored
+        """
+        pass
+
 
 class AbstractReceiver(ABC):
     @abstractmethod
@@ -25,12 +39,32 @@ class AbstractReceiver(ABC):
     def record_signal(self) -> AbstractSample:
         pass
 
+    def warm_up(self) -> dict:
+        """
+        same as `AbstractEmitter.warm_up`, for the input path
+        """
+        return {}
+
+    def configure(self, **settings):
+        """
+        same as `AbstractEmitter.configure`, e.g. `margin_s`
+        """
+        pass
+
 
 class AbstractProcessor(ABC):
     @abstractmethod
     def process(self, sample: AbstractSample):
         pass
 
+    def warm_up(self) -> dict:
+        """
+        processes a synthetic recording before the first real one
+        (library initialization, caches) - timings as
+        `AbstractEmitter.warm_up`
+        """
+        return {}
+
 
 class AbstractFactory(ABC):
     @abstractmethod
@@ -45,6 +79,64 @@ class AbstractFactory(ABC):
     def create_processor(self) -> AbstractProcessor:
         pass
 
+    def create_receivers(self) -> list:
+        """
+        receivers of an array, recording the same ping
+        """
+        return [self.create_receiver()]
+
     @abstractmethod
     def check(self):
         pass
+
+
+class AbstractAsyncEmitter(ABC):
+    """
+    `AbstractEmitter` driven by an event loop - the same methods,
+    as coroutines
+    """
+    @abstractmethod
+    async def check(self):
+        pass
+
+    @abstractmethod
+    async def emit_beep(self):
+        pass
+
+    async def warm_up(self) -> dict:
+        return {}
+
+    async def configure(self, **settings):
+        pass
+
+
+class AbstractAsyncReceiver(ABC):
+    """
+    `AbstractReceiver` driven by an event loop
+    """
+    @abstractmethod
+    async def check(self):
+        pass
+
+    @abstractmethod
+    async def record_signal(self) -> AbstractSample:
+        pass
+
+    async def warm_up(self) -> dict:
+        return {}
+
+    async def configure(self, **settings):
+        pass
+
+
+class AbstractAsyncProcessor(ABC):
+    """
+    `AbstractProcessor` driven by an event loop - CPU-bound work
+    should not block the loop (see `modules.async_core`)
+    """
+    @abstractmethod
+    async def process(self, sample: AbstractSample):
+        pass
+
+    async def warm_up(self) -> dict:
+        return {}
@@ -0,0 +1,233 @@
+"""
+`Controller` on an event loop: the pings of many sonars - one
+`AsyncController` each - interleave in a single thread, e.g.
+
+    controllers = [AsyncController(f, display) for f in factories]
+    await asyncio.gather(*(c.loop() for c in controllers))
+
+Devices, processors and displays may implement the async interfaces
+(`AbstractAsyncEmitter` ...) or the sync ones: those are wrapped by
+`as_async` and run on an executor - blocking device calls on the
+default executor of the event loop, processing on `executor` of the
+controller (the default one as well, if not given). Numpy and scipy
+release the GIL in FFTs, so threads process in parallel to some extent.
+
+The default executor has min(32, CPUs + 4) threads and every ping
+of a sync device pair takes two of them for the whole recording -
+set a bigger one (`loop.set_default_executor`) for many sonars.
+"""
+
+import asyncio
+from functools import partial
+
+from modules.abstract.abstract_display import (
+    AbstractAsyncDisplay, AbstractDisplay
+)
+from modules.abstract.abstract_factory import (
+    AbstractAsyncEmitter, AbstractAsyncProcessor, AbstractAsyncReceiver,
+    AbstractEmitter, AbstractFactory, AbstractProcessor, AbstractReceiver,
+    AbstractSample
+)
+from modules.core import History, Result
+from modules.instrumentation import NULL_TIMER
+
+
+class _Threaded:
+    def __init__(self, wrapped, executor=None):
+        self.wrapped = wrapped
+        self.executor = executor
+
+    async def _call(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(method, *args, **kwargs))
+
+    async def warm_up(self) -> dict:
+        return await self._call(self.wrapped.warm_up)
+
+
+class ThreadedEmitter(_Threaded, AbstractAsyncEmitter):
+    async def check(self):
+        return await self._call(self.wrapped.check)
+
+    async def emit_beep(self):
+        return await self._call(self.wrapped.emit_beep)
+
+    async def configure(self, **settings):
+        # only sets attributes - no need for a thread
+        self.wrapped.configure(**settings)
+
+
+class ThreadedReceiver(_Threaded, AbstractAsyncReceiver):
+    async def check(self):
+        return await self._call(self.wrapped.check)
+
+    async def record_signal(self) -> AbstractSample:
+        return await self._call(self.wrapped.record_signal)
+
+    async def configure(self, **settings):
+        self.wrapped.configure(**settings)
+
+
+class ThreadedProcessor(_Threaded, AbstractAsyncProcessor):
+    async def process(self, sample: AbstractSample) -> Result:
+        return await self._call(self.wrapped.process, sample)
+
+
+class ThreadedDisplay(_Threaded, AbstractAsyncDisplay):
+    async def print(self, result: Result):
+        return await self._call(self.wrapped.print, result)
+
+
+_WRAPPERS = [
+    (AbstractEmitter, ThreadedEmitter),
+    (AbstractReceiver, ThreadedReceiver),
+    (AbstractProcessor, ThreadedProcessor),
+    (AbstractDisplay, ThreadedDisplay),
+]
+_ASYNC_INTERFACES = (
+    AbstractAsyncEmitter, AbstractAsyncReceiver,
+    AbstractAsyncProcessor, AbstractAsyncDisplay)
+
+
+def as_async(obj, executor=None):
+    """
+    the async interface of an emitter, a receiver, a processor
+    or a display - sync ones are run on `executor`
+    """
+    if isinstance(obj, _ASYNC_INTERFACES):
+        return obj
+    for interface, wrapper in _WRAPPERS:
+        if isinstance(obj, interface):
+            return wrapper(obj, executor)
+    raise TypeError(
+        f"{type(obj).__name__} implements none of the interfaces of "
+        f"`modules.abstract`")
+
+
+class AsyncMeasurer:
+    """
+    `Measurer` (or with `array=True` - `ArrayMeasurer`) on an event
+    loop: the recordings and the beep of a ping are started together
+    by `asyncio.gather`, instead of a barrier of threads
+    """
+    def __init__(self, factory: AbstractFactory, array=False):
+        self.array = array
+        self._emitter = as_async(factory.create_emitter())
+        if array:
+            receivers = factory.create_receivers()
+        else:
+            receivers = [factory.create_receiver()]
+        self._receivers = [as_async(r) for r in receivers]
+        if not isinstance(self._emitter, AbstractAsyncEmitter):
+            raise TypeError(
+                "please provide Emitter class based on `modules."
+                "abstract.abstract_factory.AbstractEmitter` interface")
+        if not self._receivers or not all(
+                isinstance(r, AbstractAsyncReceiver)
+                for r in self._receivers):
+            raise TypeError(
+                "please provide Receiver classes based on `modules."
+                "abstract.abstract_factory.AbstractReceiver` interface")
+
+    async def check(self):
+        await self._emitter.check()
+        await asyncio.gather(*(r.check() for r in self._receivers))
+
+    async def warm_up(self):
+        timings = {"emitter": await self._emitter.warm_up()}
+        receivers = [await r.warm_up() for r in self._receivers]
+        if self.array:
+            timings["receivers"] = receivers
+        else:
+            timings["receiver"], = receivers
+        return timings
+
+    async def configure(self, **settings):
+        await self._emitter.configure(**settings)
+        for receiver in self._receivers:
+            await receiver.configure(**settings)
+
+    async def single_measurement(self):
+        # the recordings are started first, the beep has a play delay
+        *samples, _ = await asyncio.gather(
+            *(r.record_signal() for r in self._receivers),
+            self._emitter.emit_beep())
+        return samples if self.array else samples[0]
+
+
+class AsyncController:
+    """
+    `Controller` on an event loop: `await controller.loop()`.
+
+    `start` checks the devices and pays their one-time costs (the sync
+    controller does it on creation) - `loop` calls it if needed.
+    `loop_event.set()` stops the loop after the current ping.
+    """
+    timer = NULL_TIMER
+    scheduler = None
+
+    def __init__(self, factory: AbstractFactory, display, timer=None,
+                 warm_up=True, array=False, scheduler=None, executor=None):
+        if timer is not None:
+            self.timer = timer
+        # e.g. `modules.concrete.scheduler.PcAdaptiveScheduler`
+        self.scheduler = scheduler
+        self.measurer = AsyncMeasurer(factory, array=array)
+        self.history = History()
+        self.factory = factory
+        processor = factory.create_processor()
+        if getattr(processor, "timer", None) is NULL_TIMER:
+            # a single timer for all the stages of a step
+            processor.timer = self.timer
+        self.processor = as_async(processor, executor)
+        self.display = as_async(display)
+        self.warm_up = warm_up
+
+        self.loop_event = asyncio.Event()
+        self.started = False
+        self.warm_up_timings = {}
+
+    async def start(self):
+        await self.measurer.check()
+        if self.warm_up:
+            # cold versus warm timings [ms] of the one-time costs
+            self.warm_up_timings = await self.measurer.warm_up()
+            self.warm_up_timings["processor"] = \
+                await self.processor.warm_up()
+        self.started = True
+
+    async def loop(self, limit: int=None):
+        if not self.started:
+            await self.start()
+        count = 0
+        while not self.loop_event.is_set():
+            await self._step()
+            count += 1
+            if limit is not None and count >= limit:
+                break
+            if self.scheduler is not None and self.scheduler.interval_s:
+                await self._pause(self.scheduler.interval_s)
+
+    async def _pause(self, seconds):
+        # interrupted by `loop_event` as well
+        try:
+            await asyncio.wait_for(self.loop_event.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _step(self):
+        timer = self.timer
+        # `timer.last()` - the stages of this step only
+        with timer.run(), timer.stage("step"):
+            with timer.stage("measure"):
+                sample = await self.measurer.single_measurement()
+            self.history.store(sample)
+            with timer.stage("process"):
+                result = await self.processor.process(sample)
+            with timer.stage("print"):
+                await self.display.print(result)
+        if self.scheduler is not None:
+            settings = self.scheduler.update(result, self.timer.last())
+            await self.measurer.configure(**settings)
+        return result
@@ -0,0 +1,166 @@
+
+import os
+import time
+
+import numpy as np
+
+from modules.abstract.abstract_display import AbstractDisplay
+from modules.concrete.pc_sound import (
+    ProcessorEmptyDataError, ProcessorNoisyDataError,
+    ProcessorNoPeaksDetectedError, ProcessorNoSoundError,
+    ProcessorWrongFrequencyError
+)
+
+
+LOG_MAGIC = b"SONARLOG"
+LOG_VERSION = 1
+MAX_PEAKS = 5
+FLUSH_EVERY = 64  # [records]
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("record_size", "<u4"),
+    ("max_peaks", "<u4"),
+    ("reserved", "V44"),
+])
+RECORD_DTYPE = np.dtype([
+    ("timestamp_ns", "<i8"),
+    ("noise", "<f8"),
+    ("snr", "<f8"),
+    ("error_code", "<u2"),
+    ("n_peaks", "u1"),
+    ("reserved", "V5"),
+    ("distance", "<f4", (MAX_PEAKS,)),
+    ("intensity", "<f4", (MAX_PEAKS,)),
+])
+
+NO_ERROR = 0
+OTHER_ERROR = 255
+ERROR_CODES = {
+    ProcessorEmptyDataError.__name__: 1,
+    ProcessorNoSoundError.__name__: 2,
+    ProcessorWrongFrequencyError.__name__: 3,
+    ProcessorNoisyDataError.__name__: 4,
+    ProcessorNoPeaksDetectedError.__name__: 5,
+}
+ERROR_NAMES = {code: name for name, code in ERROR_CODES.items()}
+
+
+def _make_header():
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = LOG_MAGIC
+    header["version"] = LOG_VERSION
+    header["record_size"] = RECORD_DTYPE.itemsize
+    header["max_peaks"] = MAX_PEAKS
+    return header
+
+
+def _check_header(path):
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != LOG_MAGIC:
+        raise ValueError(f"not a sonar result log: {path}")
+    if header["version"][0] != LOG_VERSION \
+            or header["record_size"][0] != RECORD_DTYPE.itemsize:
+        raise ValueError(
+            f"unsupported log version: {header['version'][0]} "
+            f"(record size: {header['record_size'][0]})")
+
+
+def error_code(error):
+    """
+    `Result.error` text ("ErrorName: message") to its code
+    """
+    if error is None:
+        return NO_ERROR
+    name = error.split(":", 1)[0]
+    return ERROR_CODES.get(name, OTHER_ERROR)
+
+
+def read_log(path):
+    """
+    all records of the log as a structured array, memory mapped
+    (read-only) - columns are accessed like `log["snr"]`
+    """
+    _check_header(path)
+    n_bytes = os.path.getsize(path) - HEADER_DTYPE.itemsize
+    n_records = n_bytes // RECORD_DTYPE.itemsize
+    if n_records == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r",
+                     offset=HEADER_DTYPE.itemsize, shape=(n_records,))
+
+
+class BinaryLogDisplay(AbstractDisplay):
+    """
+    Appends results to a binary log of fixed-width records
+    (`RECORD_DTYPE`), after a header (`HEADER_DTYPE`). Records are
+    collected in a buffer and written in batches of `flush_every`,
+    so call `close` (or use as a context manager) at the end.
+
+    Results with error are stored without peaks, peaks beyond
+    MAX_PEAKS are dropped (the strongest ones are kept).
+    """
+    def __init__(self, config: dict):
+        self.config = config
+        self.path = config["path"]
+        self.flush_every = config.get("flush_every", FLUSH_EVERY)
+        self._buffer = np.zeros(self.flush_every, dtype=RECORD_DTYPE)
+        self._n_buffered = 0
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            _check_header(self.path)
+            self._file = open(self.path, "ab")
+        else:
+            self._file = open(self.path, "wb")
+            self._file.write(_make_header().tobytes())
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def __del__(self):
+        if getattr(self, "_file", None) is not None:
+            self.close()
+
+    def print(self, result):
+        record = self._buffer[self._n_buffered]
+        record["timestamp_ns"] = time.time_ns()
+        record["noise"] = result.noise
+        record["snr"] = result.snr
+        record["error_code"] = error_code(result.error)
+
+        # (distance, intensity) rows, sorted by distance
+        peaks = np.asarray(result.peaks, dtype=float).reshape(-1, 2)
+        if result.error:
+            peaks = peaks[:0]
+        if len(peaks) > MAX_PEAKS:
+            top = np.argpartition(peaks[:, 1], -MAX_PEAKS)[-MAX_PEAKS:]
+            peaks = peaks[np.sort(top)]
+        n_peaks = len(peaks)
+        record["n_peaks"] = n_peaks
+        record["distance"] = 0.
+        record["intensity"] = 0.
+        record["distance"][:n_peaks] = peaks[:, 0]
+        record["intensity"][:n_peaks] = peaks[:, 1]
+
+        self._n_buffered += 1
+        if self._n_buffered == self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._n_buffered:
+            self._file.write(self._buffer[:self._n_buffered].tobytes())
+            self._n_buffered = 0
+        self._file.flush()
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
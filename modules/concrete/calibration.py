@@ -0,0 +1,112 @@
+"""
+Emit-to-capture latency of the sound devices, measured by a burst of
+pings: the pulse is located in every recording and compared with the
+moment it is played (PLAY_DELAY_SECONDS + half of the beep). The mean
+latency and its jitter (standard deviation) are stored per pair of
+devices in a JSON file next to this module, whatever the working
+directory; `PcReceiver` given the calibration keeps only a window
+around the expected pulse and echoes.
+
+calibrate the default devices (run from the repo root):
+    python -m modules.concrete.calibration
+
+use:
+    pa = pyaudio.PyAudio()
+    factory = PcFactory({"pyaudio": pa, "calibration": load_calibration(pa)})
+"""
+
+import json
+import os
+
+import numpy as np
+
+from modules.concrete.pc_sound import (
+    CARRIER_FREQUENCY, PLAY_DELAY_SECONDS, PLAYING_DURATION_SECONDS, RATE,
+    SNR_THRESHOLD, PcFactory, _Stripe)
+from modules.core import Measurer
+
+
+CALIBRATION_FILE = os.path.join(os.path.dirname(__file__),
+                                "calibration.json")
+CALIBRATION_PINGS = 10  # [pings]
+
+
+class CalibrationError(RuntimeError): pass
+
+
+def measure_latency(sample):
+    """
+    delay of the pulse in the (full-length) recording relative to the
+    moment it is played [s], None if no pulse is found
+    """
+    values = sample.channel(0)
+    if len(values) == 0:
+        return None
+    bank = _Stripe._get_bank((float(CARRIER_FREQUENCY),), values.dtype)
+    envelope = np.abs(bank.transform(values))[0]
+    offset = int(np.argmax(envelope))
+    if envelope[offset] <= SNR_THRESHOLD * np.median(envelope):
+        return None
+    played_s = PLAY_DELAY_SECONDS + PLAYING_DURATION_SECONDS / 2
+    return offset / RATE - played_s
+
+
+def calibrate(measurer: Measurer, n_pings=CALIBRATION_PINGS) -> dict:
+    """
+    the receiver of the measurer should record the full length
+    (not calibrated yet)
+    """
+    latencies = []
+    for _ in range(n_pings):
+        latency_s = measure_latency(measurer.single_measurement())
+        if latency_s is not None:
+            latencies.append(latency_s)
+    if len(latencies) < n_pings / 2:
+        raise CalibrationError(
+            f"pulse found in {len(latencies)} of {n_pings} pings")
+    return {
+        "latency_s": float(np.mean(latencies)),
+        "jitter_s": float(np.std(latencies)),
+        "n_pings": len(latencies),
+    }
+
+
+def device_key(pa):
+    output = pa.get_default_output_device_info()["name"]
+    input_ = pa.get_default_input_device_info()["name"]
+    return f"{output} -> {input_}"
+
+
+def _read(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_calibration(pa, path=CALIBRATION_FILE):
+    """None if the devices are not calibrated"""
+    return _read(path).get(device_key(pa))
+
+
+def save_calibration(pa, calibration, path=CALIBRATION_FILE):
+    calibrations = _read(path)
+    calibrations[device_key(pa)] = calibration
+    with open(path, "w") as f:
+        json.dump(calibrations, f, indent=4)
+
+
+def main():
+    factory = PcFactory({})
+    measurer = Measurer(factory)
+    measurer.check()
+    measurer.warm_up()
+    calibration = calibrate(measurer)
+    save_calibration(factory.pa, calibration)
+    print(f"{device_key(factory.pa)}: latency "
+          f"{calibration['latency_s'] * 1e3:.2f} ms, jitter "
+          f"{calibration['jitter_s'] * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Drop-in replacement of the `pyaudio` module, without a sound card:
+what is played by output streams is routed (after the device latency)
+into what is recorded by input streams.
+
+Two clocks drive the streams:
+- "real": the wall clock, streams block like the real device,
+    late writes leave gaps (underruns), late reads lose data (overflows)
+- "virtual": time is counted in frames and only moves forward when
+    the input streams read, so nothing waits on the wall clock and runs
+    are reproducible - a read waits until the open output streams have
+    written the frames it covers (each wait is limited by `settle_s`)
+
+usage:
+    pa = FakePyAudio(clock="virtual", latency_s=0.005)
+    factory = PcFactory({"pyaudio": pa})
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+paInt16 = 8
+paContinue = 0
+paComplete = 1
+paInputOverflowed = -9981
+
+FAKE_RATE = 44100  # [frames / s]  (of the shared "air")
+FAKE_LATENCY_SECONDS = 5 / 1000  # [s]  (output + input)
+FAKE_OPEN_COST_SECONDS = 0.  # [s]
+FAKE_SETTLE_SECONDS = 50 / 1000  # [s]
+FAKE_MAX_VOLUME = 2 ** 15
+
+_SAMPLE_SIZES = {paInt16: 2}
+
+
+class _RealClock:
+    def __init__(self, rate):
+        self.rate = rate
+        self._origin = time.perf_counter()
+
+    def now(self):
+        return int((time.perf_counter() - self._origin) * self.rate)
+
+    def advance_to(self, frames):
+        delay = frames / self.rate - (time.perf_counter() - self._origin)
+        if delay > 0:
+            time.sleep(delay)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class _VirtualClock:
+    def __init__(self, rate):
+        self.rate = rate
+        self._frames = 0
+
+    def now(self):
+        return self._frames
+
+    def advance_to(self, frames):
+        self._frames = max(self._frames, frames)
+
+    def sleep(self, seconds):
+        self._frames += int(seconds * self.rate)
+
+
+class FakeStream:
+    def __init__(self, pa, format=paInt16, channels=1, rate=FAKE_RATE,
+                 input=False, output=False, frames_per_buffer=1024,
+                 start=True, **kwargs):
+        if input == output:
+            raise ValueError("fake stream is either input or output")
+        if format not in _SAMPLE_SIZES:
+            raise ValueError(f"unsupported sample format: {format}")
+        if rate != pa.rate:
+            raise ValueError(f"unsupported rate: {rate}, use {pa.rate}")
+        self.pa = pa
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.is_input = input
+        self.cursor = pa.clock.now()
+        self.frames_written = 0
+        self.frames_read = 0
+        self._active = start
+        self._closed = False
+
+    # stream state
+
+    def is_active(self):
+        return self._active
+
+    def is_stopped(self):
+        return not self._active
+
+    def start_stream(self):
+        self._active = True
+
+    def stop_stream(self):
+        self._active = False
+
+    def close(self):
+        self._active = False
+        self._closed = True
+        self.pa._unregister(self)
+
+    def get_input_latency(self):
+        return self.pa.latency_s / 2 if self.is_input else 0.
+
+    def get_output_latency(self):
+        return 0. if self.is_input else self.pa.latency_s / 2
+
+    def get_read_available(self):
+        return max(self.pa.clock.now() - self.cursor, 0)
+
+    def get_write_available(self):
+        return self.frames_per_buffer
+
+    # data
+
+    def write(self, frames, num_frames=None, exception_on_underflow=False):
+        if self.is_input:
+            raise OSError("not an output stream")
+        values = np.frombuffer(frames, dtype="<i2").astype(float)
+        values = values.reshape(-1, self.channels).mean(axis=1)
+        self.pa._play(self, values / FAKE_MAX_VOLUME)
+
+    def read(self, num_frames, exception_on_overflow=True):
+        if not self.is_input:
+            raise OSError("not an input stream")
+        values = self.pa._record(self, num_frames, exception_on_overflow)
+        signal = np.round(values * FAKE_MAX_VOLUME)
+        signal = np.clip(signal, -FAKE_MAX_VOLUME, FAKE_MAX_VOLUME - 1)
+        signal = np.repeat(signal, self.channels)
+        return signal.astype("<i2").tobytes()
+
+
+class FakePyAudio:
+    """
+    config:
+    - clock: "virtual" (default) or "real"
+    - latency_s: delay from a write to the frames being readable
+    - gain, noise: of the route from output to input (noise is std
+        of gaussian noise added to recordings)
+    - echoes: extra routes, (delay_s, gain) pairs
+    - xrun_rate: probability of an injected underrun (write) or
+        overflow (read) per call
+    - open_cost_s: time spent by every `open`
+    - settle_s: virtual clock only, limit of a single wait for output
+    - seed: of the random generator (noise and xruns)
+
+    `stats` counts streams, frames and xruns, `events` logs
+    (event, perf_counter_ns, frame) of opens and closes.
+    """
+    def __init__(self, clock="virtual", rate=FAKE_RATE,
+                 latency_s=FAKE_LATENCY_SECONDS, gain=1., noise=0.,
+                 echoes=(), xrun_rate=0., open_cost_s=FAKE_OPEN_COST_SECONDS,
+                 settle_s=FAKE_SETTLE_SECONDS, seed=None):
+        if clock not in ["virtual", "real"]:
+            raise ValueError(f"unknown clock: {clock}")
+        self.virtual = clock == "virtual"
+        self.rate = rate
+        self.clock = _VirtualClock(rate) if self.virtual else _RealClock(rate)
+        self.latency_s = latency_s
+        self.latency = int(round(latency_s * rate))
+        self.routes = [(self.latency, gain)] + [
+            (self.latency + int(round(delay_s * rate)), echo_gain)
+            for delay_s, echo_gain in echoes]
+        self.noise = noise
+        self.xrun_rate = xrun_rate
+        self.open_cost_s = open_cost_s
+        self.settle_s = settle_s
+        self.rng = np.random.default_rng(seed)
+
+        self._air = np.zeros(0)
+        self._air_start = 0
+        self._inputs = []
+        self._outputs = []
+        self._condition = threading.Condition()
+        self.stats = dict(opened=0, frames_written=0, frames_read=0,
+                          underruns=0, overflows=0)
+        self.events = []
+        self.terminated = False
+
+    # pyaudio interface
+
+    def get_sample_size(self, format):
+        return _SAMPLE_SIZES[format]
+
+    def get_default_input_device_info(self):
+        return {"index": 0, "name": "fake input", "maxInputChannels": 2,
+                "defaultSampleRate": float(self.rate),
+                "defaultLowInputLatency": self.latency_s / 2}
+
+    def get_default_output_device_info(self):
+        return {"index": 1, "name": "fake output", "maxOutputChannels": 2,
+                "defaultSampleRate": float(self.rate),
+                "defaultLowOutputLatency": self.latency_s / 2}
+
+    def open(self, *args, **kwargs):
+        if self.terminated:
+            raise OSError("fake PyAudio terminated")
+        if self.open_cost_s:
+            self.clock.sleep(self.open_cost_s)
+        with self._condition:
+            stream = FakeStream(self, *args, **kwargs)
+            streams = self._inputs if stream.is_input else self._outputs
+            streams.append(stream)
+            self.stats["opened"] += 1
+            self._log("open input" if stream.is_input else "open output")
+            self._condition.notify_all()
+        return stream
+
+    def terminate(self):
+        self.terminated = True
+
+    # routing
+
+    def _log(self, event):
+        self.events.append((event, time.perf_counter_ns(), self.clock.now()))
+
+    def _unregister(self, stream):
+        with self._condition:
+            streams = self._inputs if stream.is_input else self._outputs
+            if stream in streams:
+                streams.remove(stream)
+                self._log("close input" if stream.is_input
+                          else "close output")
+            self._condition.notify_all()
+
+    def _xrun(self):
+        return self.xrun_rate > 0 and self.rng.random() < self.xrun_rate
+
+    def _ensure_air(self, end):
+        missing = end - self._air_start - len(self._air)
+        if missing > 0:
+            self._air = np.concatenate([self._air, np.zeros(missing)])
+
+    def _play(self, stream, values):
+        with self._condition:
+            now = self.clock.now()
+            if stream.cursor < now:
+                if stream.frames_written:
+                    # device ran out of data - silence until now
+                    self.stats["underruns"] += 1
+                stream.cursor = now
+            if self._xrun():
+                self.stats["underruns"] += 1
+                stream.cursor += len(values)
+            max_delay = max(delay for delay, _ in self.routes)
+            self._ensure_air(stream.cursor + max_delay + len(values))
+            for delay, gain in self.routes:
+                start = stream.cursor + delay - self._air_start
+                self._air[start:start + len(values)] += gain * values
+            stream.cursor += len(values)
+            stream.frames_written += len(values)
+            self.stats["frames_written"] += len(values)
+            self._condition.notify_all()
+        if not self.virtual:
+            # blocking write - returns when a buffer is left to play
+            self.clock.advance_to(stream.cursor - stream.frames_per_buffer)
+
+    def _wait_for_outputs(self, stream, end):
+        if end == stream.cursor:
+            return
+        deadline = time.perf_counter() + self.settle_s
+        # the output stream of the same ping may be opening just now
+        # (opens of other input streams wake this wait up too)
+        while not self._outputs and stream.frames_read == 0:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._condition.wait(remaining)
+        deadline = time.perf_counter() + self.settle_s
+        while any(output.cursor + self.latency < end
+                  for output in self._outputs):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._condition.wait(remaining)
+
+    def _record(self, stream, n, exception_on_overflow):
+        if not self.virtual:
+            self.clock.advance_to(stream.cursor + n)
+        with self._condition:
+            if self.virtual:
+                self._wait_for_outputs(stream, stream.cursor + n)
+            elif self.clock.now() - stream.cursor > 4 * n:
+                # reading too late - the device buffer got overwritten
+                self._overflow(stream, exception_on_overflow,
+                               skip=self.clock.now() - stream.cursor - n)
+            if self._xrun():
+                self._overflow(stream, exception_on_overflow, skip=n)
+
+            start = stream.cursor - self._air_start
+            self._ensure_air(stream.cursor + n)
+            values = self._air[start:start + n].copy()
+            stream.cursor += n
+            self.clock.advance_to(stream.cursor)
+            stream.frames_read += n
+            self.stats["frames_read"] += n
+            self._trim()
+
+        if self.noise:
+            values += self.noise * self.rng.standard_normal(n)
+        return values
+
+    def _overflow(self, stream, exception_on_overflow, skip):
+        self.stats["overflows"] += 1
+        stream.cursor += skip
+        if exception_on_overflow:
+            raise OSError(paInputOverflowed, "Input overflowed")
+
+    def _trim(self):
+        cursors = [s.cursor for s in self._inputs] + [self.clock.now()]
+        keep_from = min(cursors) - self._air_start
+        if keep_from > len(self._air) // 2 and keep_from > self.rate:
+            self._air = self._air[keep_from:]
+            self._air_start += keep_from
+
+
+PyAudio = FakePyAudio
+Stream = FakeStream
@@ -1,24 +1,25 @@
 
-import requests
+import time
 
 from modules.abstract.abstract_factory import \
     AbstractEmitter, AbstractFactory, AbstractReceiver
-from modules.concrete.pc_sound import PcProcessor, PcSample
+from modules.concrete.pc_sound import PcArrayProcessor, PcProcessor, PcSample
 from modules.core import Result
 from modules.microservice.core.config import SETTINGS
-from modules.utilities import get_timestamp
+from modules.time_sync import SYNC_INTERVAL_S, SYNC_WARM_UP_ROUNDS, TimeSync
+from modules.utilities import get_timestamp_ns, lazy_import
+
+requests = lazy_import("requests")
 
 
 EMITTER_URL = f"http://{SETTINGS.EMITTER.HOST}:{SETTINGS.EMITTER.PORT}"
 RECEIVER_URL = f"http://{SETTINGS.RECEIVER.HOST}:{SETTINGS.RECEIVER.PORT}"
 
 HEALTH_ENDPOINT = "/health"
-LATENCY_ENDPOINT = "/latency"
+SYNC_ENDPOINT = "/sync"
 PLAY_ENDPOINT = "/play"
 RECORD_ENDPOINT = "/record"
 
-LATENCY_MARGIN_S = 0.030
-
 
 def _validate_response(r):
     if not r.ok:
@@ -37,7 +38,11 @@ class _BaseCaller:
         _validate_response(response)
 
     def _payload(self):
-        schedule = get_timestamp(self.delay)
+        delay = self.delay
+        if self.time_sync is not None:
+            delay = self.time_sync.schedule_delay_s(
+                self.base_url, time.time_ns())
+        schedule = get_timestamp_ns(delay)
         payload = {"schedule": schedule}
         return payload
 
@@ -45,6 +50,7 @@ class _BaseCaller:
 class HttpEmitter(_BaseCaller, AbstractEmitter):
     def __init__(self, config):
         self.delay = config["latency_s"]
+        self.time_sync = config.get("time_sync")
         self.base_url = EMITTER_URL
 
     def emit_beep(self):
@@ -56,7 +62,8 @@ class HttpEmitter(_BaseCaller, AbstractEmitter):
 class HttpReceiver(_BaseCaller, AbstractReceiver):
     def __init__(self, config):
         self.delay = config["latency_s"]
-        self.base_url = RECEIVER_URL
+        self.time_sync = config.get("time_sync")
+        self.base_url = config.get("receiver_url", RECEIVER_URL)
 
     def record_signal(self) -> PcSample:
         url = self.base_url + RECORD_ENDPOINT
@@ -68,41 +75,68 @@ class HttpReceiver(_BaseCaller, AbstractReceiver):
 
 class HttpFactory(AbstractFactory):
     @staticmethod
-    def _probe_latency(base_url):
-        url = base_url + LATENCY_ENDPOINT
-        timestamp = get_timestamp()
-        payload = {"trigger_timestamp": timestamp}
-        response = requests.get(url, json=payload)
+    def _probe_clock(base_url):
+        url = base_url + SYNC_ENDPOINT
+        t1 = time.time_ns()
+        response = requests.get(url, json={"origin_ns": t1})
+        t4 = time.time_ns()
         _validate_response(response)
         response_payload = response.json()
-        latency_s = response_payload["latency_s"]
-        return latency_s
+        t2 = response_payload["receive_ns"]
+        t3 = response_payload["transmit_ns"]
+        return t1, t2, t3, t4
 
     def _update_config(self):
-        # make 4 rounds of measurements
-        hosts = 4 * [EMITTER_URL, RECEIVER_URL]
-        latencies = list(map(self._probe_latency, hosts))
-        print("latencies:", latencies)
-        # skip the first round
-        latencies = latencies[2:]
+        hosts = [EMITTER_URL] + self.receiver_urls
+        interval_s = self.config.get("sync_interval_s", SYNC_INTERVAL_S)
+        time_sync = TimeSync(self._probe_clock, hosts, interval_s=interval_s)
+        # the first round only warms up the connections
+        time_sync.sync(warm_up_rounds=SYNC_WARM_UP_ROUNDS)
+        now_ns = time.time_ns()
+        for host in hosts:
+            print(f"clock offset {host}:", time_sync.offset_s(host, now_ns))
         # set nominal delay
-        latency_s = 1.1 * max(latencies) + LATENCY_MARGIN_S
+        latency_s = time_sync.lead_s()
         print("set up nominal value:", latency_s)
         print(flush=True)
         self.config["latency_s"] = latency_s
+        self.config["time_sync"] = time_sync
+        time_sync.start()
 
     def __init__(self, config):
         self.config = config
+        # more than one - receivers of an array (`HttpArrayFactory`),
+        # the first one is the single receiver
+        self.receiver_urls = config.get("receiver_urls", [RECEIVER_URL])
         self._update_config()
 
+    def __del__(self):
+        time_sync = self.config.get("time_sync")
+        if time_sync is not None:
+            time_sync.stop()
+
     def create_emitter(self) -> HttpEmitter:
         return HttpEmitter(self.config)
 
     def create_receiver(self) -> HttpReceiver:
-        return HttpReceiver(self.config)
+        return HttpReceiver(
+            dict(self.config, receiver_url=self.receiver_urls[0]))
 
     def create_processor(self) -> PcProcessor:
         return PcProcessor({})
 
     def check(self):
         raise NotImplementedError("not used yet")
+
+
+class HttpArrayFactory(HttpFactory):
+    """
+    receivers of all the `receiver_urls`, to be used with
+    `Controller(..., array=True)`
+    """
+    def create_receivers(self) -> list:
+        return [HttpReceiver(dict(self.config, receiver_url=url))
+                for url in self.receiver_urls]
+
+    def create_processor(self) -> PcArrayProcessor:
+        return PcArrayProcessor({})
@@ -1,18 +1,25 @@
 
+import copy
+from functools import lru_cache
 import math
+import sys
 import time
 
 import numpy as np
-import pyaudio
-from scipy import signal
-from scipy.ndimage import gaussian_filter1d, maximum_filter
-from scipy.signal import find_peaks
 
 from modules.abstract.abstract_factory import (
     AbstractEmitter, AbstractFactory, AbstractProcessor,
     AbstractReceiver, AbstractSample
 )
-from modules.core import Result
+from modules.core import History, Result
+from modules.instrumentation import NULL_TIMER, cold_warm
+from modules.utilities import lazy_import
+
+# loaded on first use - the processor does not need the sound card
+pyaudio = lazy_import("pyaudio")
+fft = lazy_import("scipy.fft")
+ndimage = lazy_import("scipy.ndimage")
+signal = lazy_import("scipy.signal")
 
 
 CHUNK = 1024  # [frames]
@@ -20,11 +27,14 @@ RATE = 44100  # [frames / s]
 
 CHANNELS = 1
 BYTES_PER_FRAME = 2
-FORMAT = pyaudio.paInt16
+SAMPLE_DTYPE = f"<i{BYTES_PER_FRAME}"
 
 PLAY_DELAY_SECONDS = 19 / 1000  # [s]
 PLAYING_DURATION_SECONDS = 100 / 1000  # [s]
 RECORDING_MARGIN_SECONDS = 340 / 1000  # [s]
+PULSE_LEAD_SECONDS = 20 / 1000  # [s]  (recorded before a calibrated pulse)
+LATENCY_GUARD_SECONDS = 5 / 1000  # [s]
+JITTER_GUARD = 4.  # [-]  (standard deviations of the calibrated latency)
 SIGNAL_WIDTH_SECONDS = 2.5 / 1000  # [s]
 CARRIER_FREQUENCY = 3310  # [Hz]
 
@@ -36,6 +46,34 @@ FREQ_BLUR_POINTS = 6.0
 FREQ_TOLERANCE = 0.07
 STRIPE_N_FREQS = 20
 SNR_THRESHOLD = 10
+MAX_PEAKS = 5  # [peaks]  (the most prominent ones are kept)
+STACK_DEPTH = 4  # [pings]
+KERNEL_TOLERANCE = 1e-6  # [-]  (wavelet truncated below this amplitude)
+PROCESSING_DTYPE = "float64"  # or "float32" - half the memory traffic
+
+CHIRP_FREQUENCY_LOW = 2000  # [Hz]
+CHIRP_FREQUENCY_HIGH = 5000  # [Hz]
+CHIRP_DURATION_SECONDS = 10 / 1000  # [s]
+CHIRP_TAPER = 0.2  # [-]  (fraction of the chirp faded in and out)
+# peaks up to this multiple of the range sidelobes are dropped
+CHIRP_SIDELOBE_MARGIN = 2.  # [-]
+CHIRP_METHOD = "linear"  # "linear" or "hyperbolic"
+
+ARRAY_MAX_TDOA_SECONDS = 3 / 1000  # [s]  (~1 m between receivers)
+
+TRACK_GATE_METERS = 0.25  # [m]  (searched around a predicted echo)
+TRACK_ALPHA = 0.5  # [-]  (weight of the measured distance)
+TRACK_BETA = 0.1  # [-]  (weight of the measured velocity)
+TRACK_MAX_MISSES = 2  # [pings]  (a track is dropped after more)
+TRACK_CONFIRM_HITS = 2  # [pings]  (a track is tentative before)
+FULL_SEARCH_EVERY = 10  # [pings]
+
+WARM_UP_ECHO_DISTANCE = 2.0  # [m]
+WARM_UP_NOISE = 0.001  # [-]  (of full volume)
+
+
+def find_peaks(*args, **kwargs):
+    return signal.find_peaks(*args, **kwargs)
 
 
 class _BaseProcessorError(RuntimeError): pass
@@ -55,8 +93,12 @@ class PcSample(AbstractSample):
     - sample: whole object containing wave record (1D recording
         of air movements in time), consisting of sample-points
     - sample-point: one pixel of sound; a.k.a. `frame`
+    - channels: a sample may hold several microphones of one device,
+        interleaved frame by frame (as streamed); `channel`
+        and `to_channels` are strided views - no copies
     - sample data representations:
-        * values: float values normalized to [-1., 1.]
+        * values: float values normalized to [-1., 1.], float64 by
+            default, any float dtype can be requested (see `astype`)
         * signal: int values corresponding to max range
         * data: bytes data ready to be streamed
         * chunks: bytes data divided into packets (CHUNK length
@@ -90,50 +132,70 @@ class PcSample(AbstractSample):
     """
     __KEY = object()
 
-    def __init__(self, values, key=None):
+    def __init__(self, values, key=None, channels=CHANNELS):
         if not key is self.__KEY:
             raise AttributeError(
                 "cannot call constructor directly, "
                 "use one of the `from_...` method")
         if not isinstance(values, np.ndarray):
             raise TypeError("values should be `numpy.ndarray` of floats")
+        if len(values) % channels:
+            raise ValueError(
+                f"{len(values)} values do not split into {channels} channels")
         self.__values_array = values
+        self.__channels = channels
 
     def __len__(self):
-        return len(self.__values_array)
+        # in frames - sample-points of every channel
+        return len(self.__values_array) // self.__channels
+
+    @property
+    def n_channels(self):
+        return self.__channels
 
     #############################
 
     @classmethod
-    def from_values(cls, values):
-        values = np.array(values).astype(float)
-        return cls(values, key=cls.__KEY)
+    def from_values(cls, values, dtype=float, channels=CHANNELS):
+        values = np.array(values, dtype=dtype)
+        return cls(values, key=cls.__KEY, channels=channels)
 
     @classmethod
-    def from_signal(cls, signal):
-        signal = np.array(signal)
+    def from_signal(cls, signal, dtype=float, channels=CHANNELS):
+        # 16-bit integers are exact in float32 as well
+        signal = np.asarray(signal, dtype=dtype)
         values = signal / cls._max_volume
-        return cls.from_values(values)
+        return cls.from_values(values, dtype=dtype, channels=channels)
 
     @classmethod
-    def from_data(cls, data):
-        fragments = [
-            data[i:i + BYTES_PER_FRAME]
-            for i in range(0, len(data), BYTES_PER_FRAME)
-        ]
-        signal = list(map(cls._int_from_bytes, fragments))
-        return cls.from_signal(signal)
+    def from_data(cls, data, dtype=float, channels=CHANNELS):
+        signal = np.frombuffer(data, dtype=SAMPLE_DTYPE)
+        return cls.from_signal(signal, dtype=dtype, channels=channels)
 
     @classmethod
-    def from_chunks(cls, chunks):
+    def from_chunks(cls, chunks, dtype=float, channels=CHANNELS):
         data = b"".join(chunks)
-        return cls.from_data(data)
+        return cls.from_data(data, dtype=dtype, channels=channels)
 
     #############################
 
     def to_values(self):
+        # interleaved, if more than one channel
         return self.__values_array
 
+    def channel(self, i):
+        return self.__values_array[i::self.__channels]
+
+    def to_channels(self):
+        """[channels x frames] view of the interleaved values"""
+        return self.__values_array.reshape(-1, self.__channels).T
+
+    def astype(self, dtype):
+        if self.__values_array.dtype == dtype:
+            return self
+        return PcSample.from_values(
+            self.__values_array, dtype=dtype, channels=self.__channels)
+
     def to_signal(self):
         values = self.to_values()
         signal = values * self._max_volume
@@ -146,7 +208,8 @@ class PcSample(AbstractSample):
 
     def to_chunks(self):
         signal = self.to_signal()
-        fragments = [signal[i:i + CHUNK] for i in range(0, len(self), CHUNK)]
+        step = CHUNK * self.__channels
+        fragments = [signal[i:i + step] for i in range(0, len(signal), step)]
         chunks = list(map(self._list_to_bytes, fragments))
         return chunks
 
@@ -176,19 +239,47 @@ class PcSample(AbstractSample):
 PcSample._max_volume = PcSample._volume_to_int(1)
 
 
+def _int16_format(pa):
+    """
+    paInt16 of the module of the driver - a ready driver (e.g.
+    `FakePyAudio`) brings its own, pyaudio is loaded only otherwise
+    """
+    module = sys.modules.get(type(pa).__module__)
+    return getattr(module, "paInt16", None) or pyaudio.paInt16
+
+
 class PcEmitter(AbstractEmitter):
+    volume = 1.  # [-]  (of the beep)
+    format = None  # (paInt16 of the driver)
+
     def __init__(self, config):
         self.config = config
         self.pa = config["pyaudio"]
+        self.format = _int16_format(self.pa)
+        self.volume = config.get("volume", self.volume)
+
+    def configure(self, volume=None, **settings):
+        if volume is not None:
+            self.volume = volume
 
     def check(self):
         self.pa.get_default_output_device_info()
         stream = self.pa.open(
-            format=FORMAT, channels=CHANNELS, rate=RATE, output=True)
+            format=self.format, channels=CHANNELS, rate=RATE, output=True)
         stream.write(b"")
         stream.stop_stream()
         stream.close()
 
+    def _open_close(self):
+        stream = self.pa.open(
+            format=self.format, channels=CHANNELS, rate=RATE, output=True)
+        stream.close()
+
+    def warm_up(self):
+        # first stream opens initialize the host audio API
+        self._make_beep_sample()
+        return cold_warm(self._open_close, n_warm=1)
+
     @staticmethod
     def _make_beep_sample():
         amplitude = 1.
@@ -206,10 +297,13 @@ class PcEmitter(AbstractEmitter):
 
     def emit_beep(self):
         beep_sample = self._make_beep_sample()
+        if self.volume != 1.:
+            beep_sample = PcSample.from_values(
+                self.volume * beep_sample.to_values())
         chunks = beep_sample.to_chunks()
 
         stream = self.pa.open(
-            format=FORMAT, channels=CHANNELS, rate=RATE, output=True)
+            format=self.format, channels=CHANNELS, rate=RATE, output=True)
         time.sleep(PLAY_DELAY_SECONDS)
         for chunk in chunks:
             stream.write(chunk)
@@ -217,37 +311,153 @@ class PcEmitter(AbstractEmitter):
         stream.close()
 
 
+def _make_chirp(method=CHIRP_METHOD, window=("tukey", CHIRP_TAPER)):
+    """
+    analytic (complex) chirp - the real part is played,
+    the whole is used as matched-filter replica
+    """
+    n_points = int(CHIRP_DURATION_SECONDS * RATE)
+    t = np.arange(n_points) / RATE
+    args = (t, CHIRP_FREQUENCY_LOW, CHIRP_DURATION_SECONDS,
+            CHIRP_FREQUENCY_HIGH)
+    in_phase = signal.chirp(*args, method=method, phi=0)
+    quadrature = signal.chirp(*args, method=method, phi=-90)
+    taper = signal.get_window(window, n_points, fftbins=False)
+    return taper * (in_phase + 1j * quadrature)
+
+
+class PcChirpEmitter(PcEmitter):
+    """
+    emits a frequency-modulated pulse instead of the gaussian beep,
+    to be used with `PcChirpProcessor` (pulse compression)
+    """
+    def __init__(self, config):
+        super().__init__(config)
+        self.method = config.get("chirp", CHIRP_METHOD)
+
+    def _make_beep_sample(self):
+        amplitude = 1.
+        chirp = np.real(_make_chirp(self.method))
+        n_points = int(PLAYING_DURATION_SECONDS * RATE)
+        values = np.zeros(max(n_points, len(chirp)))
+        start = (len(values) - len(chirp)) // 2
+        values[start:start + len(chirp)] = amplitude * chirp
+        return PcSample.from_values(values)
+
+
 class PcReceiver(AbstractReceiver):
+    """
+    config (all optional):
+    - input_device_index: None - the default input device
+    - channels: CHANNELS by default
+    - margin_s: recorded after the pulse, RECORDING_MARGIN_SECONDS
+        by default
+    - calibration: {"latency_s": ..., "jitter_s": ...} of the devices
+        (see `calibration`) - only a window around the expected pulse
+        and echoes is kept, instead of the fixed-length recording
+    """
+    # None - RECORDING_MARGIN_SECONDS
+    margin_s = None  # [s]
+    calibration = None
+    format = None  # (paInt16 of the driver)
+
     def __init__(self, config):
         self.config = config
         self.pa = config["pyaudio"]
+        self.format = _int16_format(self.pa)
+        # None - the default input device
+        self.device_index = config.get("input_device_index")
+        self.channels = config.get("channels", CHANNELS)
+        self.margin_s = config.get("margin_s")
+        self.calibration = config.get("calibration")
+
+    def configure(self, margin_s=None, **settings):
+        # recording is restored to the full length by RECORDING_MARGIN
+        self.margin_s = margin_s
+
+    def _open(self):
+        return self.pa.open(format=self.format, channels=self.channels,
+                            rate=RATE, input=True, frames_per_buffer=CHUNK,
+                            input_device_index=self.device_index)
 
     def check(self):
         self.pa.get_default_input_device_info()
-        stream = self.pa.open(format=FORMAT, channels=CHANNELS, rate=RATE,
-                              input=True, frames_per_buffer=CHUNK)
+        stream = self._open()
         stream.read(0)
         stream.stop_stream()
         stream.close()
 
-    def record_signal(self) -> PcSample:
-        seconds = 2 * PLAY_DELAY_SECONDS + PLAYING_DURATION_SECONDS \
-                  + RECORDING_MARGIN_SECONDS
-        n_chunks = int(RATE / CHUNK * seconds) + 1
+    def _open_close(self):
+        self._open().close()
+
+    def warm_up(self):
+        return cold_warm(self._open_close, n_warm=1)
+
+    def _window(self):
+        """
+        chunks to skip and to read in total - from the stream start
+        """
+        margin_s = self.margin_s
+        if margin_s is None:
+            margin_s = RECORDING_MARGIN_SECONDS
+        if self.calibration is None:
+            seconds = 2 * PLAY_DELAY_SECONDS + PLAYING_DURATION_SECONDS \
+                      + margin_s
+            return 0, int(RATE / CHUNK * seconds) + 1
+
+        # expected arrival of the pulse (the middle of the beep)
+        pulse_s = PLAY_DELAY_SECONDS + PLAYING_DURATION_SECONDS / 2 \
+                  + self.calibration["latency_s"]
+        guard_s = JITTER_GUARD * self.calibration["jitter_s"] \
+                  + LATENCY_GUARD_SECONDS
+        start_s = max(pulse_s - guard_s - PULSE_LEAD_SECONDS, 0.)
+        seconds = pulse_s + guard_s + margin_s
+        return int(RATE / CHUNK * start_s), int(RATE / CHUNK * seconds) + 1
 
-        stream = self.pa.open(
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RATE,
-            input=True,
-            frames_per_buffer=CHUNK
-        )
-        chunks = [stream.read(CHUNK)
-                  for _ in range(n_chunks)]
+    def record_signal(self) -> PcSample:
+        n_skipped, n_chunks = self._window()
+
+        stream = self._open()
+        if n_skipped:
+            # before the pulse can arrive - a blocking stream cannot
+            # seek, the frames are consumed by a single read and dropped
+            stream.read(n_skipped * CHUNK)
+        chunks = []
+        for _ in range(n_chunks - n_skipped):
+            chunk = stream.read(CHUNK)
+            self._on_chunk(chunk)
+            chunks.append(chunk)
         stream.stop_stream()
         stream.close()
 
-        return PcSample.from_chunks(chunks)
+        return self._make_sample(chunks)
+
+    def _on_chunk(self, chunk):
+        pass
+
+    def _make_sample(self, chunks):
+        return PcSample.from_chunks(chunks, channels=self.channels)
+
+
+class PcStreamingReceiver(PcReceiver):
+    """
+    hands every chunk to a `PcStreamingProcessor` as soon as it is read
+    """
+    def __init__(self, config):
+        super().__init__(config)
+        self.processor = config["processor"]
+
+    def record_signal(self) -> PcSample:
+        self.processor.reset()
+        return super().record_signal()
+
+    def _on_chunk(self, chunk):
+        self.processor.feed(chunk)
+
+    def _make_sample(self, chunks):
+        sample = super()._make_sample(chunks)
+        self.processor.finish(sample)
+        return sample
 
 
 class _Stripe:
@@ -256,16 +466,31 @@ class _Stripe:
         if not isinstance(sample, PcSample):
             raise TypeError("please provide a `PcSample` instance as input")
 
-        freq_low = CARRIER_FREQUENCY * (1 - FREQ_TOLERANCE)
-        freq_high = CARRIER_FREQUENCY * (1 + FREQ_TOLERANCE)
-        frequencies = np.geomspace(freq_low, freq_high, STRIPE_N_FREQS)
+        frequencies = cls._get_frequencies()
+        values = sample.to_values()
 
         stripe = cls()
-        stripe._data = np.abs(signal.cwt(
-            sample.to_values(), cls._my_wavelet, frequencies))
+        if values.dtype == np.float64:
+            stripe._data = np.abs(signal.cwt(
+                values, cls._my_wavelet, frequencies))
+        else:
+            # `cwt` works in double precision only
+            bank = cls._get_bank(tuple(frequencies), values.dtype)
+            stripe._data = np.abs(bank.transform(values))
         stripe._frequencies = frequencies
         return stripe
 
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _get_bank(frequencies, dtype):
+        return _FilterBank(np.array(frequencies), dtype=dtype)
+
+    @staticmethod
+    def _get_frequencies():
+        freq_low = CARRIER_FREQUENCY * (1 - FREQ_TOLERANCE)
+        freq_high = CARRIER_FREQUENCY * (1 + FREQ_TOLERANCE)
+        return np.geomspace(freq_low, freq_high, STRIPE_N_FREQS)
+
     @staticmethod
     def _my_wavelet(n, f):
         n_low = -(n // 2)
@@ -277,7 +502,7 @@ class _Stripe:
         freq_window = STRIPE_N_FREQS // 4
         timing_window = int(SIGNAL_WIDTH_SECONDS * RATE + 1)
         neighborhood = (freq_window, timing_window)
-        stripe_max = maximum_filter(self._data, size=neighborhood)
+        stripe_max = ndimage.maximum_filter(self._data, size=neighborhood)
         peak_mask = (stripe_max == self._data) & \
                     (self._data == np.amax(self._data))
         coords = np.argwhere(peak_mask)
@@ -285,49 +510,167 @@ class _Stripe:
         freq = self._frequencies[freq_idx]
         return freq, offset
 
-    def squeeze(self) -> "_Series":
+    def squeeze(self, noise=None) -> "_Series":
         series = np.sum(self._data, axis=0)
-        return _Series(series)
+        return _Series(series, noise=noise)
+
+    @classmethod
+    def squeeze_many(cls, values):
+        """
+        series of several recordings [n x timings] at once,
+        one FFT pass of the filter bank - [n x timings]
+        """
+        bank = cls._get_bank(tuple(cls._get_frequencies()), values.dtype)
+        return np.abs(bank.transform(values)).sum(axis=1)
 
 
 class _Series:
-    def __init__(self, series):
+    def __init__(self, series, noise=None, pulse_max=None):
         if not isinstance(series, np.ndarray):
             raise TypeError('please provide numpy array as input')
         self._series = series
+        # estimated elsewhere, e.g. on a longer recording
+        self._noise_estimate = noise
+        # a part of the series without the main pulse
+        self._pulse_max_estimate = pulse_max
 
     def get_nps_metadata(self):
-        noise = self._noise
-        pulse_max = self._pulse_max
+        # plain floats, whatever the dtype of the series
+        noise = float(self._noise)
+        pulse_max = float(self._pulse_max)
         snr = pulse_max / noise
         return noise, pulse_max, snr
 
-    def get_peaks(self):
+    def get_peaks(self, width_s=None):
+        if width_s is None:
+            width_s = SIGNAL_WIDTH_SECONDS
         noise = self._noise
         pulse_max = self._pulse_max
         height_span = (4 * noise, pulse_max / 4)
-        distance = int(SIGNAL_WIDTH_SECONDS * RATE + 1)
+        distance = int(width_s * RATE + 1)
         prominence = 2 * noise
 
         timings, properties = find_peaks(
             self._series, height=height_span,
             distance=distance, prominence=prominence
         )
-        peaks = list(zip(timings, properties["prominences"]))
+        # [n x 2] - (timing, prominence) rows
+        peaks = np.column_stack(
+            (timings, properties["prominences"])).astype(float)
         return peaks
 
     @property
     def _noise(self):
+        if self._noise_estimate is not None:
+            return self._noise_estimate
         return np.median(self._series)
 
     @property
     def _pulse_max(self):
+        if self._pulse_max_estimate is not None:
+            return self._pulse_max_estimate
         return np.amax(self._series)
 
 
+class _FilterBank:
+    """
+    The wavelets of `_Stripe` applied by FFT convolution, truncated
+    where their gaussian envelope falls below KERNEL_TOLERANCE.
+    Data is fed block by block (overlap-save), the output is aligned
+    like `signal.cwt` output (centered kernels): `flush` returns
+    the remaining tail.
+
+    Computations keep the precision of `dtype` (float32 data gives
+    complex64 output).
+    """
+    def __init__(self, frequencies, dtype=float):
+        self.frequencies = frequencies
+        self.dtype = np.dtype(dtype)
+        a_max = np.sqrt(np.log(1 / KERNEL_TOLERANCE) / WL_GAUSS_PARAM)
+        self.half_width = int(
+            np.ceil(a_max * RATE / (2 * np.pi * np.amin(frequencies))))
+        n_kernel = 2 * self.half_width + 1
+        kernels = np.conj(np.stack([
+            _Stripe._my_wavelet(n_kernel, f)[::-1] for f in frequencies]))
+        self._kernels = kernels.astype(
+            np.result_type(self.dtype, np.complex64))
+        self._spectra = {}
+        self.reset()
+
+    def reset(self):
+        self._tail = np.zeros(2 * self.half_width, dtype=self.dtype)
+        self._skip = self.half_width
+
+    @property
+    def noise_gain(self):
+        """
+        sum of the kernel norms - the squeezed output of white noise
+        is proportional to it
+        """
+        return float(np.linalg.norm(self._kernels, axis=1).sum())
+
+    def _spectrum(self, n_fft):
+        if n_fft not in self._spectra:
+            self._spectra[n_fft] = fft.fft(self._kernels, n_fft, axis=1)
+        return self._spectra[n_fft]
+
+    def feed(self, values):
+        """
+        returns the filter bank output (complex) for as many
+        sample-points as available, [frequencies x timings]
+        """
+        buffer = np.concatenate([self._tail, values])
+        n_tail = len(self._tail)
+        n_fft = fft.next_fast_len(len(buffer))
+        output = fft.ifft(
+            fft.fft(buffer, n_fft) * self._spectrum(n_fft), axis=1)
+        output = output[:, n_tail:len(buffer)]
+        self._tail = buffer[len(buffer) - n_tail:]
+
+        skip = min(self._skip, output.shape[1])
+        self._skip -= skip
+        return output[:, skip:]
+
+    def flush(self):
+        output = self.feed(np.zeros(self.half_width, dtype=self.dtype))
+        self.reset()
+        return output
+
+    def transform(self, values):
+        """
+        whole recording at once, does not touch the streaming state;
+        recordings of an array [receivers x timings] give
+        [receivers x frequencies x timings]
+        """
+        n = values.shape[-1]
+        n_fft = fft.next_fast_len(n + 2 * self.half_width)
+        spectrum = fft.fft(values, n_fft)[..., np.newaxis, :]
+        output = fft.ifft(spectrum * self._spectrum(n_fft), axis=-1)
+        return output[..., self.half_width:self.half_width + n]
+
+
 class PcProcessor(AbstractProcessor):
+    """
+    config (all optional):
+    - dtype: of the processing, PROCESSING_DTYPE by default
+    - timer: e.g. `instrumentation.StageTimer`
+    - min_range, max_range: range gate [m] - echoes are looked for
+        only at these distances; with `max_range` only the part of
+        the recording from the main pulse up to it is transformed
+    """
+    dtype = np.dtype(PROCESSING_DTYPE)
+    timer = NULL_TIMER
+    min_range = 0.  # [m]
+    max_range = None  # [m]  (None - the whole recording)
+    peak_width_s = None  # [s]  (None - SIGNAL_WIDTH_SECONDS)
+
     def __init__(self, config):
         self.config = config
+        self.dtype = np.dtype(config.get("dtype", PROCESSING_DTYPE))
+        if config.get("timer") is not None:
+            self.timer = config["timer"]
+        self.min_range = config.get("min_range", self.min_range)
+        self.max_range = config.get("max_range", self.max_range)
 
     def _validate_sample(self, sample):
         n = len(sample)
@@ -339,16 +682,16 @@ class PcProcessor(AbstractProcessor):
             raise ProcessorNoSoundError(
                 "signal is flat - no sound found")
 
-        amps = np.fft.fft(values)
-        freqs = np.fft.fftfreq(n, d=1/RATE)
-        half_n = n // 2
-        freqs = freqs[:half_n]
-        amps = amps[:half_n]
-        amps = np.abs(amps)
-        amps = gaussian_filter1d(amps, sigma=FREQ_BLUR_POINTS, mode='constant')
+        amps = np.abs(np.fft.rfft(values))
+        freqs = np.fft.rfftfreq(n, d=1/RATE)
+        amps = ndimage.gaussian_filter1d(
+            amps, sigma=FREQ_BLUR_POINTS, mode='constant')
+
+        f_max = freqs[amps.argmax()]
+        self._check_frequency(f_max)
+        return f_max
 
-        i_max = amps.argmax()
-        f_max = freqs[i_max]
+    def _check_frequency(self, f_max):
         f_low = CARRIER_FREQUENCY * (1 - FREQ_TOLERANCE)
         f_high = CARRIER_FREQUENCY * (1 + FREQ_TOLERANCE)
 
@@ -357,39 +700,143 @@ class PcProcessor(AbstractProcessor):
                 f"measured frequency of carrier-wave: {f_max:.0f} Hz "
                 f"does not match the expected one: {CARRIER_FREQUENCY:.0f} Hz")
 
-        return f_max
+    def _range_to_lag(self, distance):
+        """sample-points between the main pulse and the echo"""
+        return int(2 * distance / SOUND_SPEED * RATE)
+
+    @staticmethod
+    def _locate_pulse(values):
+        """
+        rough offset of the main pulse and the noise of the series,
+        found with the carrier frequency only - one FFT pass
+        """
+        bank = _Stripe._get_bank((float(CARRIER_FREQUENCY),), values.dtype)
+        envelope = np.abs(bank.transform(values))[0]
+        offset = int(np.argmax(envelope))
+        frequencies = tuple(_Stripe._get_frequencies())
+        gain = _Stripe._get_bank(frequencies, values.dtype).noise_gain
+        noise = float(np.median(envelope)) * gain / bank.noise_gain
+        return offset, noise
+
+    def _gate(self, sample):
+        """
+        part of the sample from the main pulse to the echoes of
+        `max_range` and the noise of the whole sample (the sample
+        and None without the gate)
+
+        The noise is the median of the carrier envelope, scaled to
+        the series of all the frequencies: a part that short holds
+        mostly the pulse and the echoes, not noise.
+        """
+        if self.max_range is None:
+            return sample, None
+        values = sample.to_values()
+        offset, noise = self._locate_pulse(values)
+
+        # edges of the transform of the part are off by a kernel
+        pad = _Stripe._get_bank(
+            (float(CARRIER_FREQUENCY),), values.dtype).half_width
+        start = max(offset - pad, 0)
+        stop = offset + self._range_to_lag(self.max_range) + pad
+        window = PcSample.from_values(values[start:stop], dtype=values.dtype)
+        return window, noise
 
     def _filter_peaks(self, raw_peaks, offset):
-        valid_peaks = list(filter(lambda pair: pair[0] > offset, raw_peaks))
-        if len(valid_peaks) > 5:
-            valid_peaks = sorted(
-                valid_peaks, key=lambda pair: pair[1], reverse=True)
-            valid_peaks = list(valid_peaks)[:5]
+        """
+        (timing, prominence) rows within the range gate, MAX_PEAKS
+        most prominent of them - in the order of timings
+        """
+        raw_peaks = np.asarray(raw_peaks, dtype=float).reshape(-1, 2)
+        low = offset + max(self._range_to_lag(self.min_range), 1)
+        high = np.inf
+        if self.max_range is not None:
+            high = offset + self._range_to_lag(self.max_range)
+        timings = raw_peaks[:, 0]
+        valid_peaks = raw_peaks[(low <= timings) & (timings <= high)]
+        if len(valid_peaks) > MAX_PEAKS:
+            top = np.argpartition(valid_peaks[:, 1], -MAX_PEAKS)[-MAX_PEAKS:]
+            valid_peaks = valid_peaks[np.sort(top)]
         return valid_peaks
 
     def _process_peaks(self, valid_peaks, offset, noise):
-        peaks = []
-        for timing, prominency in valid_peaks:
-            delay = (timing - offset) / RATE
-            distance = delay * SOUND_SPEED / 2.
-            intensity = prominency / noise
-            peaks.append((distance, intensity))
-
-        return peaks
+        """(distance, intensity) rows of the (timing, prominence) ones"""
+        valid_peaks = np.asarray(valid_peaks, dtype=float).reshape(-1, 2)
+        delays = (valid_peaks[:, 0] - offset) / RATE
+        distances = delays * SOUND_SPEED / 2.
+        intensities = valid_peaks[:, 1] / noise
+        return np.column_stack((distances, intensities))
+
+    def _make_warm_up_pulse(self):
+        return PcEmitter._make_beep_sample().to_values()
+
+    def _make_warm_up_sample(self):
+        """
+        synthetic recording as long as a real one: the pulse after
+        the play delay, an echo and a little noise
+        """
+        seconds = 2 * PLAY_DELAY_SECONDS + PLAYING_DURATION_SECONDS \
+                  + RECORDING_MARGIN_SECONDS
+        n = (int(RATE / CHUNK * seconds) + 1) * CHUNK
+        pulse = self._make_warm_up_pulse()
+        start = int(PLAY_DELAY_SECONDS * RATE)
+        echo = start + int(2 * WARM_UP_ECHO_DISTANCE / SOUND_SPEED * RATE)
+
+        values = WARM_UP_NOISE * np.random.default_rng(0).standard_normal(n)
+        values[start:start + len(pulse)] += 0.5 * pulse
+        values[echo:echo + len(pulse)] += 0.1 * pulse
+        return PcSample.from_values(values)
+
+    def warm_up(self):
+        sample = self._make_warm_up_sample()
+        timer, self.timer = self.timer, NULL_TIMER
+        try:
+            # a new object every call - results are cached per sample
+            # by the streaming processor
+            return cold_warm(lambda: self.process(copy.copy(sample)))
+        finally:
+            self.timer = timer
+
+    def _transform(self, sample):
+        """
+        wavelet transform (of the range gate) - whatever
+        `_locate_offset` takes
+        """
+        sample, noise = self._gate(sample)
+        return _Stripe.from_sample(sample), noise
+
+    def _locate_offset(self, transformed, kwargs):
+        """
+        offset of the main pulse and the `_Series` of the output
+        of `_transform`, metadata is put into `kwargs`
+        """
+        stripe, noise = transformed
+        f_max_stripe, offset = stripe.get_offset()
+        kwargs["f_max_stripe"] = f_max_stripe
+        return offset, stripe.squeeze(noise)
 
     def process(self, sample: PcSample) -> Result:
+        timer = self.timer
+        with timer.run() as timings:
+            result = self._process(sample)
+        # only the stages of this sample
+        timer.attach(result, timings)
+        return result
+
+    def _process(self, sample) -> Result:
         kwargs = {}
+        timer = self.timer
+        sample = sample.astype(self.dtype)
 
         try:
             # check sample
-            f_max = self._validate_sample(sample)
+            with timer.stage("validate"):
+                f_max = self._validate_sample(sample)
             kwargs["f_max"] = f_max
 
-            # wavelet transform
-            stripe = _Stripe.from_sample(sample)
-            f_max_stripe, offset = stripe.get_offset()
-            series = stripe.squeeze()
-            kwargs["f_max_stripe"] = f_max_stripe
+            with timer.stage("transform"):
+                transformed = self._transform(sample)
+            with timer.stage("offset"):
+                offset, series = self._locate_offset(transformed, kwargs)
 
             # get metadata
             noise, pulse_max, snr = series.get_nps_metadata()
@@ -401,9 +848,423 @@ class PcProcessor(AbstractProcessor):
                     f"signal-to-noise ratio too small: {snr}")
 
             # get peaks
-            raw_peaks = series.get_peaks()
-            valid_peaks = self._filter_peaks(raw_peaks, offset)
-            peaks = self._process_peaks(valid_peaks, offset, noise)
+            with timer.stage("peaks"):
+                raw_peaks = series.get_peaks(width_s=self.peak_width_s)
+                valid_peaks = self._filter_peaks(raw_peaks, offset)
+                peaks = self._process_peaks(valid_peaks, offset, noise)
+
+            if len(peaks) == 0:
+                raise ProcessorNoPeaksDetectedError("no valid peaks found")
+
+            # combine data to result
+            result = Result(peaks, **kwargs)
+
+        except _BaseProcessorError as e:
+            # report error
+            result = Result.from_error(e, **kwargs)
+
+        return result
+
+
+class PcStackingProcessor(PcProcessor):
+    """
+    Integrates the last `depth` recordings, aligned on their main pulse,
+    before looking for peaks:
+    - coherent: recordings are summed before the wavelet transform, so
+        the uncorrelated noise averages out (~sqrt(depth) gain in snr)
+    - incoherent: squeezed series are summed, which is insensitive
+        to the phase of the carrier (and so to timing jitter)
+
+    Bigger depth gives more sensitivity at the cost of update rate:
+    a moving echo is smeared over `depth` pings.
+    """
+    def __init__(self, config):
+        super().__init__(config)
+        self.depth = config.get("depth", STACK_DEPTH)
+        self.coherent = config.get("coherent", True)
+        self.history = History(limit=self.depth)
+
+    def warm_up(self):
+        timings = super().warm_up()
+        self.history.history.clear()
+        return timings
+
+    @staticmethod
+    def _refine_offsets(matrix, offsets):
+        """
+        align the carrier phase of recordings to the latest one, offsets
+        from the stripe are only accurate to a few sample-points
+        """
+        half_width = int(SIGNAL_WIDTH_SECONDS * RATE / 2)
+        max_lag = int(RATE / CARRIER_FREQUENCY) + 1
+        lags = np.arange(-max_lag, max_lag + 1)
+        window = np.arange(-half_width, half_width)
+
+        n = matrix.shape[1]
+        offsets = np.clip(offsets, half_width + max_lag,
+                          n - half_width - max_lag - 1)
+        reference = matrix[-1, offsets[-1] + window]
+        # [recordings x lags x window]
+        indices = offsets[:, np.newaxis, np.newaxis] \
+                  + lags[:, np.newaxis] + window
+        rows = np.arange(len(matrix))[:, np.newaxis, np.newaxis]
+        correlation = matrix[rows, indices] @ reference
+        return offsets + lags[np.argmax(correlation, axis=1)]
+
+    def _stack(self, data, offset):
+        stored = self.history.history
+        if stored and len(stored[-1][0]) != len(data):
+            # recording setup changed - start integrating anew
+            stored.clear()
+        self.history.store((data, offset))
+
+        matrix = np.stack([record for record, _ in stored])
+        offsets = np.array([offset for _, offset in stored])
+        if self.coherent:
+            offsets = self._refine_offsets(matrix, offsets)
+        head = offsets.min()
+        length = len(data) - offsets.max() + head
+        starts = offsets - head
+        indices = starts[:, np.newaxis] + np.arange(length)
+        rows = np.arange(len(stored))[:, np.newaxis]
+        stacked = np.mean(matrix[rows, indices], axis=0)
+        return stacked, head
+
+    def _transform(self, sample):
+        """
+        a single wavelet transform per ping: coherent - of the range
+        gate of the stack, incoherent - of the range gate of the latest
+        recording
+        """
+        if self.coherent:
+            # the carrier alone is enough to align recordings
+            values = sample.to_values()
+            offset, _ = self._locate_pulse(values)
+            stacked, _ = self._stack(values, offset)
+            stacked_sample = PcSample.from_values(stacked, dtype=self.dtype)
+            return super()._transform(stacked_sample)
+        gated, noise = self._gate(sample)
+        stripe = _Stripe.from_sample(gated)
+        _, offset = stripe.get_offset()
+        stacked, offset = self._stack(stripe.squeeze(noise)._series, offset)
+        return _Series(stacked, noise), offset
+
+    def _locate_offset(self, transformed, kwargs):
+        kwargs["stack_depth"] = len(self.history.history)
+        if self.coherent:
+            return super()._locate_offset(transformed, kwargs)
+        series, offset = transformed
+        return offset, series
+
+
+class _CompressedSeries(_Series):
+    """
+    envelope of the matched-filter output: every lobe (the main one
+    included) has range sidelobes as long as the chirp to both sides,
+    a peak lower than CHIRP_SIDELOBE_MARGIN times the sidelobe of a
+    higher lobe at its lag is dropped
+
+    `sidelobes` - envelope of the compressed chirp relative to its
+    height, by lag from the peak [sample-points]
+    """
+    def __init__(self, series, sidelobes, noise=None, pulse_max=None):
+        super().__init__(series, noise=noise, pulse_max=pulse_max)
+        self._sidelobes = sidelobes
+
+    def get_peaks(self, width_s=None):
+        peaks = super().get_peaks(width_s)
+        timings = peaks[:, 0].astype(int)
+        heights = self._series[timings]
+        # the main pulse is above the heights searched for peaks
+        main = int(np.argmax(self._series))
+        lobes = np.append(timings, main)
+        lobe_heights = np.append(heights, self._series[main])
+
+        lags = np.abs(timings[:, None] - lobes[None, :])
+        near = lags < len(self._sidelobes)
+        sidelobes = np.where(
+            near, self._sidelobes[np.where(near, lags, 0)], 0.)
+        limits = CHIRP_SIDELOBE_MARGIN * sidelobes * lobe_heights
+        higher = lobe_heights[None, :] > heights[:, None]
+        is_sidelobe = np.any(higher & (heights[:, None] < limits), axis=1)
+        return peaks[~is_sidelobe]
+
+
+class PcChirpProcessor(PcProcessor):
+    """
+    Pulse compression: the recording is correlated with the chirp
+    replica in a single FFT pass (matched filter) instead of the
+    wavelet filter bank. The compressed pulse is about
+    1 / bandwidth wide, so echoes are resolved much finer than with
+    the gaussian beep while the long chirp carries more energy.
+
+    Glossary follows `PcSample`, with:
+    - series: envelope of the matched-filter output
+    - offset: sample-point where the emitted chirp starts
+    """
+    # the compressed pulse is about 1 / bandwidth wide
+    peak_width_s = 1 / (CHIRP_FREQUENCY_HIGH - CHIRP_FREQUENCY_LOW)  # [s]
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.method = config.get("chirp", CHIRP_METHOD)
+        # matched filter - the replica tapered like the emitted chirp
+        self._replica = _make_chirp(self.method)
+        self._replica_spectra = {}
+        self._sidelobes = self._get_sidelobes()
+
+    def _make_warm_up_pulse(self):
+        return np.real(_make_chirp(self.method))
+
+    def _check_frequency(self, f_max):
+        f_low = CHIRP_FREQUENCY_LOW * (1 - FREQ_TOLERANCE)
+        f_high = CHIRP_FREQUENCY_HIGH * (1 + FREQ_TOLERANCE)
+
+        if not f_low < f_max < f_high:
+            raise ProcessorWrongFrequencyError(
+                f"measured dominant frequency: {f_max:.0f} Hz "
+                f"is out of the chirp band: "
+                f"{CHIRP_FREQUENCY_LOW:.0f}-{CHIRP_FREQUENCY_HIGH:.0f} Hz")
+
+    def _replica_spectrum(self, n_fft):
+        if n_fft not in self._replica_spectra:
+            spectrum = np.conj(np.fft.fft(self._replica, n_fft))
+            spectrum = spectrum[:n_fft // 2 + 1].astype(
+                np.result_type(self.dtype, np.complex64))
+            self._replica_spectra[n_fft] = spectrum
+        return self._replica_spectra[n_fft]
+
+    def _compress(self, values):
+        n = len(values)
+        n_fft = fft.next_fast_len(n + len(self._replica) - 1)
+        # the replica is analytic, so only the positive half of the
+        # spectrum survives and the output is analytic as well
+        half_spectrum = fft.rfft(values, n_fft) * self._replica_spectrum(n_fft)
+        spectrum = np.zeros(n_fft, dtype=half_spectrum.dtype)
+        spectrum[:n_fft // 2 + 1] = half_spectrum
+        correlation = fft.ifft(spectrum)[:n]
+        return 2 * np.abs(correlation)
+
+    def _get_sidelobes(self):
+        """
+        envelope of the compressed chirp by lag from its peak, relative
+        to the peak - the bigger of both sides, widened by the width
+        of a lobe for the shifts of lobes on noise
+        """
+        chirp = np.real(_make_chirp(self.method))
+        n = len(chirp)
+        envelope = self._compress(np.pad(chirp, n))
+        envelope = envelope / envelope[n]
+        sidelobes = np.maximum(envelope[n:2 * n], envelope[n:0:-1])
+        width = int(self.peak_width_s * RATE)
+        return ndimage.maximum_filter1d(sidelobes, 2 * width + 1)
+
+    def _transform(self, sample):
+        # pulse compression
+        return self._compress(sample.to_values())
+
+    def _locate_offset(self, envelope, kwargs):
+        series = _CompressedSeries(envelope, self._sidelobes)
+        return int(np.argmax(envelope)), series
+
+
+class PcStreamingProcessor(PcProcessor):
+    """
+    Processes the recording chunk by chunk while it is being recorded,
+    the filter bank output is updated by overlap-save convolution:
+    - main pulse is known as soon as it has passed (`pulse_offset`)
+    - peaks found so far are reported through `config["on_peaks"]`
+        callback, as an array of (distance, intensity) rows
+    - `finish` only has to process the last chunk, so the `Result`
+        is ready right after the recording stops
+
+    `process` returns the result of the streamed sample directly,
+    other samples are streamed in CHUNK blocks.
+    """
+    def __init__(self, config):
+        super().__init__(config)
+        self.on_peaks = config.get("on_peaks")
+        self.bank = _FilterBank(_Stripe._get_frequencies(), dtype=self.dtype)
+        self.reset()
+
+    def warm_up(self):
+        timings = super().warm_up()
+        self.reset()
+        return timings
+
+    def reset(self):
+        self.bank.reset()
+        self._series_blocks = []
+        self._n_timings = 0
+        self._pulse_max = -np.inf
+        self._pulse = None
+        self._last_reported = -1
+        self._sample = None
+        self._result = None
+
+    @property
+    def pulse_offset(self):
+        if self._pulse is None:
+            return None
+        _, offset = self._pulse
+        timing_window = int(SIGNAL_WIDTH_SECONDS * RATE + 1)
+        if self._n_timings - offset <= timing_window:
+            return None
+        return offset
+
+    def feed(self, chunk):
+        sample = PcSample.from_data(chunk, dtype=self.dtype)
+        self.feed_values(sample.to_values())
+
+    def feed_values(self, values):
+        values = np.asarray(values, dtype=self.dtype)
+        self._update(self.bank.feed(values))
+        self._report_peaks()
+
+    def _update(self, output):
+        if output.shape[1] == 0:
+            return
+        stripe = np.abs(output)
+        freq_idx, timing = np.unravel_index(np.argmax(stripe), stripe.shape)
+        if stripe[freq_idx, timing] > self._pulse_max:
+            self._pulse_max = stripe[freq_idx, timing]
+            freq = self.bank.frequencies[freq_idx]
+            self._pulse = (freq, self._n_timings + timing)
+        self._series_blocks.append(np.sum(stripe, axis=0))
+        self._n_timings += stripe.shape[1]
+
+    def _get_series(self):
+        series = np.concatenate(self._series_blocks)
+        self._series_blocks = [series]
+        return _Series(series)
+
+    def _report_peaks(self):
+        offset = self.pulse_offset
+        if self.on_peaks is None or offset is None:
+            return
+        # provisional noise, based on the series recorded so far
+        series = self._get_series()
+        noise = series._noise
+        if noise <= 0:
+            return
+        raw_peaks = series.get_peaks()
+        valid_peaks = self._filter_peaks(raw_peaks, offset)
+        # the last peak might still be growing
+        guard = int(SIGNAL_WIDTH_SECONDS * RATE + 1)
+        timings = valid_peaks[:, 0]
+        new_peaks = valid_peaks[
+            (self._last_reported < timings)
+            & (timings < self._n_timings - guard)]
+        if len(new_peaks):
+            self._last_reported = new_peaks[-1, 0]
+            self.on_peaks(self._process_peaks(new_peaks, offset, noise))
+
+    def _transform(self, sample):
+        # filter bank output collected while streaming
+        return self._pulse
+
+    def _locate_offset(self, pulse, kwargs):
+        f_max_stripe, offset = pulse
+        kwargs["f_max_stripe"] = f_max_stripe
+        return offset, self._get_series()
+
+    def finish(self, sample: PcSample) -> Result:
+        self._update(self.bank.flush())
+        result = super().process(sample)
+        self._sample = sample
+        self._result = result
+        return result
+
+    def process(self, sample: PcSample) -> Result:
+        if sample is self._sample:
+            return self._result
+
+        self.reset()
+        values = sample.astype(self.dtype).to_values()
+        for i in range(0, len(values), CHUNK):
+            self.feed_values(values[i:i + CHUNK])
+        return self.finish(sample)
+
+
+class PcArrayProcessor(PcProcessor):
+    """
+    Recordings of one ping from N receivers (list of `PcSample`, the
+    first one is the reference) processed as a single [receivers x
+    timings] array - one FFT pass of the filter bank for all of them.
+    Peaks are looked for in the reference series, then the arrival of
+    the main pulse and of every echo is located in all the series:
+
+    - tdoa_s: time-difference-of-arrival of the main pulse, per
+        receiver, relative to the reference
+    - echo_tdoa_s: the same for every echo, in the order of peaks
+
+    Arrivals are searched within `max_tdoa_s` around the reference
+    one, with sub-sample (parabolic) interpolation.
+    """
+    def __init__(self, config):
+        super().__init__(config)
+        self.max_tdoa_s = config.get("max_tdoa_s", ARRAY_MAX_TDOA_SECONDS)
+
+    @staticmethod
+    def _arrivals(series, timing, max_lag):
+        """
+        position of the highest sample-point near `timing`,
+        per receiver [sample-points, fractional]
+        """
+        n = series.shape[1]
+        low = max(timing - max_lag, 1)
+        high = min(timing + max_lag + 1, n - 1)
+        i = low + np.argmax(series[:, low:high], axis=1)
+        rows = np.arange(len(series))
+        y0, y1, y2 = series[rows, i - 1], series[rows, i], series[rows, i + 1]
+        curvature = y0 - 2 * y1 + y2
+        shift = np.divide(0.5 * (y0 - y2), curvature,
+                          out=np.zeros(len(series)), where=curvature != 0)
+        return i + shift
+
+    def _process(self, samples: list) -> Result:
+        kwargs = {}
+        timer = self.timer
+        samples = [sample.astype(self.dtype) for sample in samples]
+        max_lag = int(self.max_tdoa_s * RATE) + 1
+
+        try:
+            # check the reference sample
+            with timer.stage("validate"):
+                f_max = self._validate_sample(samples[0])
+            kwargs["f_max"] = f_max
+
+            # filter bank on all the recordings at once
+            with timer.stage("transform"):
+                n = min(map(len, samples))
+                values = np.stack([s.to_values()[:n] for s in samples])
+                series = _Stripe.squeeze_many(values)
+            with timer.stage("offset"):
+                offset = int(np.argmax(series[0]))
+                arrivals = self._arrivals(series, offset, max_lag)
+            kwargs["tdoa_s"] = ((arrivals - arrivals[0]) / RATE).tolist()
+
+            # get metadata
+            reference = _Series(series[0])
+            noise, pulse_max, snr = reference.get_nps_metadata()
+            kwargs["noise"] = noise
+            kwargs["snr"] = snr
+
+            if snr <= SNR_THRESHOLD:
+                raise ProcessorNoisyDataError(
+                    f"signal-to-noise ratio too small: {snr}")
+
+            # get peaks
+            with timer.stage("peaks"):
+                raw_peaks = reference.get_peaks()
+                valid_peaks = self._filter_peaks(raw_peaks, offset)
+                peaks = self._process_peaks(valid_peaks, offset, noise)
+                echo_tdoa_s = []
+                for timing in valid_peaks[:, 0].astype(int):
+                    arrivals = self._arrivals(series, timing, max_lag)
+                    echo_tdoa_s.append(
+                        ((arrivals - arrivals[0]) / RATE).tolist())
+            kwargs["echo_tdoa_s"] = echo_tdoa_s
 
             if len(peaks) == 0:
                 raise ProcessorNoPeaksDetectedError("no valid peaks found")
@@ -417,20 +1278,325 @@ class PcProcessor(AbstractProcessor):
 
         return result
 
+    def _make_warm_up_sample(self):
+        return [super()._make_warm_up_sample()] * 2
+
+
+class PcMultiChannelProcessor(PcProcessor):
+    """
+    Multi-channel recording of one device (microphones sharing one
+    stream, so one clock) processed in a single vectorized pass of the
+    filter bank over the [channels x timings] view of the sample.
+
+    Peaks of the result come from the fused series - the sum of
+    the series of all the channels (the pulse and the echoes add up,
+    the noise partially averages out); results of separate channels
+    are in `metadata["channels"]` (`Result.to_dict` format).
+    """
+    def _analyse(self, series, kwargs):
+        """peaks of one series, noise and snr are put into `kwargs`"""
+        offset = int(np.argmax(series))
+        series = _Series(series)
+        noise, pulse_max, snr = series.get_nps_metadata()
+        kwargs["noise"] = noise
+        kwargs["snr"] = snr
+
+        if snr <= SNR_THRESHOLD:
+            raise ProcessorNoisyDataError(
+                f"signal-to-noise ratio too small: {snr}")
+
+        raw_peaks = series.get_peaks()
+        valid_peaks = self._filter_peaks(raw_peaks, offset)
+        peaks = self._process_peaks(valid_peaks, offset, noise)
+
+        if len(peaks) == 0:
+            raise ProcessorNoPeaksDetectedError("no valid peaks found")
+        return peaks
+
+    def _channel_result(self, series):
+        kwargs = {}
+        try:
+            return Result(self._analyse(series, kwargs), **kwargs)
+        except _BaseProcessorError as e:
+            return Result.from_error(e, **kwargs)
+
+    def _process(self, sample: PcSample) -> Result:
+        kwargs = {}
+        timer = self.timer
+        sample = sample.astype(self.dtype)
+
+        try:
+            # the same pulse on every channel - check the mix
+            with timer.stage("validate"):
+                mix = sample.to_channels().mean(axis=0)
+                f_max = self._validate_sample(PcSample.from_values(mix))
+            kwargs["f_max"] = f_max
+
+            # filter bank on all the channels at once
+            with timer.stage("transform"):
+                series = _Stripe.squeeze_many(sample.to_channels())
+
+            with timer.stage("peaks"):
+                channels = [self._channel_result(s) for s in series]
+                kwargs["channels"] = [r.to_dict() for r in channels]
+                peaks = self._analyse(series.sum(axis=0), kwargs)
+
+            # combine data to result
+            result = Result(peaks, **kwargs)
+
+        except _BaseProcessorError as e:
+            # report error
+            result = Result.from_error(e, **kwargs)
+
+        return result
+
+    def _make_warm_up_sample(self):
+        values = super()._make_warm_up_sample().to_values()
+        return PcSample.from_values(np.repeat(values, 2), channels=2)
+
+
+class _Track:
+    """
+    alpha-beta filter of the distance of one echo, velocity
+    in meters per ping - tentative until detected on
+    TRACK_CONFIRM_HITS pings
+    """
+    __slots__ = ("distance", "velocity", "intensity", "misses", "hits")
+
+    def __init__(self, distance, intensity):
+        self.distance = distance
+        self.velocity = 0.
+        self.intensity = intensity
+        self.misses = 0
+        self.hits = 1
+
+    @property
+    def confirmed(self):
+        return self.hits >= TRACK_CONFIRM_HITS
+
+    def predict(self):
+        return self.distance + self.velocity
+
+    def update(self, distance, intensity, alpha, beta):
+        predicted = self.predict()
+        residual = distance - predicted
+        self.distance = predicted + alpha * residual
+        self.velocity += beta * residual
+        self.intensity = intensity
+        self.misses = 0
+        self.hits += 1
+
+    def miss(self):
+        self.distance = self.predict()
+        self.misses += 1
+
+    def to_dict(self):
+        return {
+            "distance": self.distance,
+            "velocity": self.velocity,
+            "misses": self.misses,
+            "hits": self.hits,
+        }
+
+
+class PcTrackingProcessor(PcProcessor):
+    """
+    Follows the echoes from ping to ping: every echo found is a track
+    (distance and velocity, smoothed by an alpha-beta filter) and the
+    next ping looks only within `gate` of the predicted distances.
+    Only the main pulse and these short parts of the recording are
+    transformed - in one FFT pass.
+
+    The whole recording is searched (as by `PcProcessor`) until a track
+    is confirmed, every `full_search_every` pings and on the ping after
+    a confirmed track is missed - new echoes are found only then.
+    A tentative track (e.g. of a noise peak) is dropped on its first
+    miss. Reported distances are the filtered ones.
+
+    config (all optional, besides the `PcProcessor` ones):
+    - gate: half-width of the searched part [m]
+    - alpha, beta: weights of the filter
+    - full_search_every: [pings]
+    """
+    def __init__(self, config):
+        super().__init__(config)
+        self.gate = config.get("gate", TRACK_GATE_METERS)
+        self.alpha = config.get("alpha", TRACK_ALPHA)
+        self.beta = config.get("beta", TRACK_BETA)
+        self.full_search_every = config.get(
+            "full_search_every", FULL_SEARCH_EVERY)
+        self.reset()
+
+    def reset(self):
+        self.tracks = []
+        self.count = 0
+        self._lost = False
+
+    def warm_up(self):
+        timings = super().warm_up()
+        self.reset()
+        return timings
+
+    def _needs_full_search(self):
+        return not any(t.confirmed for t in self.tracks) or self._lost \
+               or self.count % self.full_search_every == 0
+
+    @staticmethod
+    def _window_series(values, centers, half):
+        """
+        series of the parts of the recording within `half` sample-points
+        of the centers, [centers x (2 * half + 1)]
+        """
+        bank = _Stripe._get_bank(
+            tuple(_Stripe._get_frequencies()), values.dtype)
+        # edges of the transform of a part are off by a kernel
+        pad = half + bank.half_width
+        padded = np.pad(values, pad)
+        centers = np.clip(centers, 0, len(values) - 1)
+        index = centers[:, np.newaxis] + np.arange(2 * pad + 1)
+        series = _Stripe.squeeze_many(padded[index])
+        return series[:, bank.half_width:bank.half_width + 2 * half + 1]
+
+    def _associate(self, peaks):
+        """
+        updates the tracks with the nearest peaks found within the gate
+        of their predictions, the rest of the peaks start new tracks
+        """
+        unmatched = np.ones(len(peaks), dtype=bool)
+        for track in self.tracks:
+            gaps = np.abs(peaks[:, 0] - track.predict())
+            gaps[~unmatched] = np.inf
+            i = int(np.argmin(gaps)) if len(gaps) else None
+            if i is None or gaps[i] > self.gate:
+                track.miss()
+                continue
+            unmatched[i] = False
+            track.update(*peaks[i].tolist(), self.alpha, self.beta)
+        self.tracks += [_Track(*peak) for peak in peaks[unmatched].tolist()]
+
+    def _miss_all(self):
+        for track in self.tracks:
+            track.miss()
+
+    def _prune(self):
+        self._lost = any(t.misses for t in self.tracks if t.confirmed)
+        self.tracks = [
+            t for t in self.tracks
+            if t.misses <= (TRACK_MAX_MISSES if t.confirmed else 0)]
+
+    def _report(self, result):
+        if result.error is None:
+            result.peaks = [(t.distance, t.intensity)
+                            for t in self.tracks if t.misses == 0]
+        result.metadata["tracks"] = [t.to_dict() for t in self.tracks]
+        return result
+
+    def _full_search(self, sample):
+        result = super()._process(sample)
+        if result.error is None:
+            self._associate(result.peaks)
+        else:
+            self._miss_all()
+        result.metadata["search"] = "full"
+        return result
+
+    def _tracked_search(self, sample):
+        kwargs = {"search": "tracked"}
+        timer = self.timer
+        sample = sample.astype(self.dtype)
+
+        try:
+            with timer.stage("validate"):
+                f_max = self._validate_sample(sample)
+            kwargs["f_max"] = f_max
+
+            # the main pulse and the predicted echoes only
+            with timer.stage("transform"):
+                values = sample.to_values()
+                offset, noise = self._locate_pulse(values)
+                half = self._range_to_lag(self.gate)
+                predicted = np.array([
+                    offset + self._range_to_lag(t.predict())
+                    for t in self.tracks], dtype=int)
+                # echoes predicted out of the recording are missed
+                inside = (0 <= predicted) & (predicted < len(values))
+                tracked = [t for t, i in zip(self.tracks, inside) if i]
+                centers = np.concatenate(([offset], predicted[inside]))
+                series = self._window_series(values, centers, half)
+            with timer.stage("offset"):
+                i_max = int(np.argmax(series[0]))
+                pulse_max = float(series[0, i_max])
+                offset += i_max - half
+            kwargs["noise"] = noise
+            kwargs["snr"] = snr = pulse_max / noise
+
+            if snr <= SNR_THRESHOLD:
+                raise ProcessorNoisyDataError(
+                    f"signal-to-noise ratio too small: {snr}")
+
+            with timer.stage("peaks"):
+                for track, i in zip(self.tracks, inside):
+                    if not i:
+                        track.miss()
+                for track, part, center in zip(
+                        tracked, series[1:], centers[1:]):
+                    raw_peaks = _Series(
+                        part, noise=noise, pulse_max=pulse_max).get_peaks()
+                    if len(raw_peaks) == 0:
+                        track.miss()
+                        continue
+                    timing, prominency = raw_peaks[np.argmax(raw_peaks[:, 1])]
+                    distance, intensity = self._process_peaks(
+                        [(center - half + timing, prominency)],
+                        offset, noise)[0].tolist()
+                    track.update(distance, intensity, self.alpha, self.beta)
+
+            if all(track.misses for track in self.tracks):
+                raise ProcessorNoPeaksDetectedError("no tracked peaks found")
+
+            result = Result([], **kwargs)
+
+        except _BaseProcessorError as e:
+            if not isinstance(e, ProcessorNoPeaksDetectedError):
+                # nothing known about the echoes of this ping
+                self._miss_all()
+            result = Result.from_error(e, **kwargs)
+
+        return result
+
+    def _process(self, sample: PcSample) -> Result:
+        if self._needs_full_search():
+            result = self._full_search(sample)
+        else:
+            result = self._tracked_search(sample)
+        self.count += 1
+        self._prune()
+        return self._report(result)
+
 
 class PcFactory(AbstractFactory):
     def __init__(self, config):
         self.config = config
-        self.pa = pyaudio.PyAudio()
+        # an injected driver is terminated by its owner
+        self._owns_pa = "pyaudio" not in config
+        if "pyaudio" in config:
+            # ready driver, e.g. `fake_pyaudio.FakePyAudio`
+            self.pa = config["pyaudio"]
+        else:
+            self.pa = pyaudio.PyAudio()
+        # latency of the devices, `calibration.load_calibration`
+        self.calibration = config.get("calibration")
 
     def __del__(self):
-        self.pa.terminate()
+        if getattr(self, "_owns_pa", False):
+            self.pa.terminate()
 
     def create_emitter(self) -> PcEmitter:
         return PcEmitter({"pyaudio": self.pa})
 
     def create_receiver(self) -> PcReceiver:
-        return PcReceiver({"pyaudio": self.pa})
+        return PcReceiver(
+            {"pyaudio": self.pa, "calibration": self.calibration})
 
     def create_processor(self) -> PcProcessor:
         return PcProcessor({})
@@ -439,3 +1605,73 @@ class PcFactory(AbstractFactory):
         raise NotImplementedError("not used yet")
         pa = pyaudio.PyAudio()
         pa.terminate()
+
+
+class PcStackingFactory(PcFactory):
+    def create_processor(self) -> PcStackingProcessor:
+        return PcStackingProcessor(self.config)
+
+
+class PcChirpFactory(PcFactory):
+    def create_emitter(self) -> PcChirpEmitter:
+        config = dict(self.config, pyaudio=self.pa)
+        return PcChirpEmitter(config)
+
+    def create_processor(self) -> PcChirpProcessor:
+        return PcChirpProcessor(self.config)
+
+
+class PcStreamingFactory(PcFactory):
+    def __init__(self, config):
+        super().__init__(config)
+        self.processor = PcStreamingProcessor(self.config)
+
+    def create_receiver(self) -> PcStreamingReceiver:
+        return PcStreamingReceiver(
+            {"pyaudio": self.pa, "processor": self.processor,
+             "calibration": self.calibration})
+
+    def create_processor(self) -> PcStreamingProcessor:
+        return self.processor
+
+
+class PcArrayFactory(PcFactory):
+    """
+    config:
+    - input_devices: indexes of the input devices of the array,
+        None is the default device
+    """
+    def __init__(self, config):
+        super().__init__(config)
+        self.input_devices = config.get("input_devices", [None])
+
+    def create_receivers(self) -> list:
+        # the same window for all of them - the same timing
+        return [PcReceiver({"pyaudio": self.pa, "input_device_index": i,
+                            "calibration": self.calibration})
+                for i in self.input_devices]
+
+    def create_processor(self) -> PcArrayProcessor:
+        return PcArrayProcessor(self.config)
+
+
+class PcTrackingFactory(PcFactory):
+    def create_processor(self) -> PcTrackingProcessor:
+        return PcTrackingProcessor(self.config)
+
+
+class PcMultiChannelFactory(PcFactory):
+    """
+    config:
+    - channels: number of input channels of the device
+    """
+    def __init__(self, config):
+        super().__init__(config)
+        self.channels = config.get("channels", 2)
+
+    def create_receiver(self) -> PcReceiver:
+        return PcReceiver({"pyaudio": self.pa, "channels": self.channels,
+                           "calibration": self.calibration})
+
+    def create_processor(self) -> PcMultiChannelProcessor:
+        return PcMultiChannelProcessor(self.config)
@@ -0,0 +1,263 @@
+"""
+Offline replay of recorded sessions. A session is a raw file of 16-bit
+little-endian sample-points (SAMPLE_DTYPE, as streamed by the sound
+card), holding one or more recordings of `frames_per_ping` frames one
+after another - `save_session` appends them, the `.dat` files of
+`research` are sessions of a single recording.
+
+- `ReplayReceiver` memory-maps a session and returns one recording
+    per ping - `ReplayFactory` runs the `Controller` on it offline
+- `replay` reprocesses many sessions on a process pool, with any
+    processor configuration, and writes the results to a binary log
+    (`binary_log`) in the order of the sessions and their pings
+
+run from the repo root:
+    python -m modules.concrete.replay sessions/ -o replay.log \\
+        -p tracking -c '{"dtype": "float32"}'
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from modules.abstract.abstract_factory import (
+    AbstractEmitter, AbstractFactory, AbstractReceiver
+)
+from modules.concrete.binary_log import BinaryLogDisplay
+from modules.concrete.pc_sound import (
+    CHANNELS, SAMPLE_DTYPE,
+    PcChirpProcessor, PcMultiChannelProcessor, PcProcessor, PcSample,
+    PcStackingProcessor, PcStreamingProcessor, PcTrackingProcessor
+)
+
+
+SESSION_EXTENSION = ".dat"
+CHUNKS_PER_WORKER = 4  # [-]  (tasks sent to every worker at once)
+
+PROCESSORS = {
+    "default": PcProcessor,
+    "stacking": PcStackingProcessor,
+    "chirp": PcChirpProcessor,
+    "streaming": PcStreamingProcessor,
+    "tracking": PcTrackingProcessor,
+    "multi-channel": PcMultiChannelProcessor,
+}
+
+
+class ReplayError(RuntimeError): pass
+
+
+def open_session(path, frames_per_ping=None, channels=CHANNELS):
+    """
+    recordings of the session, memory mapped (read-only) -
+    [pings x (frames_per_ping * channels)] sample-points; without
+    `frames_per_ping` the whole file is a single recording
+    """
+    n_points = os.path.getsize(path) // np.dtype(SAMPLE_DTYPE).itemsize
+    if n_points == 0:
+        raise ReplayError(f"empty session: {path}")
+    per_ping = n_points if frames_per_ping is None \
+        else frames_per_ping * channels
+    if n_points % per_ping or per_ping % channels:
+        raise ReplayError(
+            f"{n_points} sample-points of {path} do not split into "
+            f"recordings of {per_ping} ({channels} channels)")
+    return np.memmap(path, dtype=SAMPLE_DTYPE, mode="r",
+                     shape=(n_points // per_ping, per_ping))
+
+
+def save_session(samples, path):
+    """appends the recordings to the session"""
+    with open(path, "ab") as f:
+        for sample in samples:
+            sample.to_signal().astype(SAMPLE_DTYPE).tofile(f)
+
+
+def find_sessions(paths):
+    """the files, and the sessions in the directories, sorted"""
+    sessions = []
+    for path in paths:
+        if os.path.isdir(path):
+            sessions += sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.endswith(SESSION_EXTENSION))
+        else:
+            sessions.append(path)
+    return sessions
+
+
+class ReplayEmitter(AbstractEmitter):
+    def check(self):
+        pass
+
+    def emit_beep(self):
+        # the sound is in the session already
+        pass
+
+
+class ReplayReceiver(AbstractReceiver):
+    """
+    config:
+    - path: of the session
+    - frames_per_ping, channels: layout of the session (optional,
+        see `open_session`)
+    - loop: start over at the end of the session (default: False -
+        `ReplayError` is raised)
+    """
+    def __init__(self, config):
+        self.path = config["path"]
+        self.frames_per_ping = config.get("frames_per_ping")
+        self.channels = config.get("channels", CHANNELS)
+        self.loop = config.get("loop", False)
+        self.position = 0
+        self._pings = None
+
+    @property
+    def pings(self) -> np.memmap:
+        if self._pings is None:
+            self._pings = open_session(
+                self.path, self.frames_per_ping, self.channels)
+        return self._pings
+
+    @property
+    def n_pings(self):
+        return len(self.pings)
+
+    def check(self):
+        # fails early on a missing or broken session
+        self._pings = open_session(
+            self.path, self.frames_per_ping, self.channels)
+
+    def record_signal(self) -> PcSample:
+        if self.position == self.n_pings:
+            if not self.loop:
+                raise ReplayError(f"end of session: {self.path}")
+            self.position = 0
+        signal = self.pings[self.position]
+        self.position += 1
+        return PcSample.from_signal(signal, channels=self.channels)
+
+
+class ReplayFactory(AbstractFactory):
+    """
+    config - as `ReplayReceiver` and the processor, besides:
+    - processor: name of the processor in PROCESSORS (default: "default")
+    """
+    def __init__(self, config):
+        self.config = config
+        name = config.get("processor", "default")
+        if name not in PROCESSORS:
+            raise ValueError(
+                f"unknown processor: {name}, one of: {', '.join(PROCESSORS)}")
+        self.processor_class = PROCESSORS[name]
+
+    def create_emitter(self) -> ReplayEmitter:
+        return ReplayEmitter()
+
+    def create_receiver(self) -> ReplayReceiver:
+        return ReplayReceiver(self.config)
+
+    def create_processor(self) -> PcProcessor:
+        return self.processor_class(self.config)
+
+    def check(self):
+        pass
+
+
+def _warm_up_worker(config):
+    # one-time costs (imports, FFT plans, filter banks) per process
+    ReplayFactory(config).create_processor().warm_up()
+
+
+def replay_session(path, config) -> list:
+    """
+    results of all the pings of the session, processed by a new
+    processor (state of stacking or tracking starts over)
+    """
+    factory = ReplayFactory(dict(config, path=path))
+    receiver = factory.create_receiver()
+    processor = factory.create_processor()
+    return [processor.process(receiver.record_signal())
+            for _ in range(receiver.n_pings)]
+
+
+def replay(paths, log_path, config=None, workers=None) -> dict:
+    """
+    processes the sessions on `workers` processes (default: one per
+    CPU, 0 - in this process), returns the throughput
+    """
+    config = config or {}
+    sessions = find_sessions(paths)
+    task = partial(replay_session, config=config)
+    n_pings = 0
+    start = time.perf_counter()
+
+    with BinaryLogDisplay({"path": log_path}) as log:
+        if workers == 0:
+            _warm_up_worker(config)
+            for results in map(task, sessions):
+                n_pings += _write(log, results)
+        else:
+            with ProcessPoolExecutor(
+                    max_workers=workers, initializer=_warm_up_worker,
+                    initargs=(config,)) as pool:
+                n_workers = workers or os.cpu_count() or 1
+                chunksize = max(
+                    len(sessions) // (n_workers * CHUNKS_PER_WORKER), 1)
+                for results in pool.map(task, sessions, chunksize=chunksize):
+                    n_pings += _write(log, results)
+
+    seconds = time.perf_counter() - start
+    return {
+        "sessions": len(sessions),
+        "pings": n_pings,
+        "seconds": seconds,
+        "pings_per_s": n_pings / seconds if seconds else 0.,
+    }
+
+
+def _write(log, results):
+    for result in results:
+        log.print(result)
+    return len(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="reprocess recorded sessions to a binary log")
+    parser.add_argument("paths", nargs="+",
+                        help=f"sessions, or directories of "
+                             f"`*{SESSION_EXTENSION}` sessions")
+    parser.add_argument("-o", "--output", required=True,
+                        help="binary log of the results (appended)")
+    parser.add_argument("-p", "--processor", default="default",
+                        choices=list(PROCESSORS))
+    parser.add_argument("-c", "--config", default="{}", type=json.loads,
+                        help="processor config as JSON")
+    parser.add_argument("-f", "--frames-per-ping", type=int,
+                        help="length of the recordings of the sessions "
+                             "(default: a recording per session)")
+    parser.add_argument("--channels", type=int, default=CHANNELS)
+    parser.add_argument("-w", "--workers", type=int,
+                        help="processes (default: one per CPU, "
+                             "0 - no pool)")
+    args = parser.parse_args(argv)
+
+    config = dict(args.config, processor=args.processor,
+                  frames_per_ping=args.frames_per_ping,
+                  channels=args.channels)
+    stats = replay(args.paths, args.output, config, args.workers)
+    print(f"{stats['pings']} pings of {stats['sessions']} sessions "
+          f"in {stats['seconds']:.2f} s: "
+          f"{stats['pings_per_s']:.1f} pings/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Adaptive ping rate of `Controller.loop` (`Controller(scheduler=...)`):
+after every ping the scheduler looks at the recent results and the
+measured cycle time and picks for the next ping:
+
+- volume: energy of the pulse - raised while SNR is close to
+    SNR_THRESHOLD, lowered while it is well above (less reverberation)
+- margin_s: length of the recording after the pulse - cut down to
+    the farthest echo detected recently (with RANGE_HEADROOM), the full
+    RECORDING_MARGIN_SECONDS every EXPLORE_EVERY pings to find new ones
+- interval_s: pause before the next ping - grows while results are
+    noisy at full volume (the room needs more time to go quiet),
+    decays to none while they are useful
+
+usage:
+    scheduler = PcAdaptiveScheduler()
+    controller = Controller(factory, display, scheduler=scheduler)
+"""
+
+import time
+
+from modules.concrete.pc_sound import (
+    RECORDING_MARGIN_SECONDS, SNR_THRESHOLD, SOUND_SPEED)
+from modules.core import History, Result
+
+
+SCHEDULER_WINDOW = 8  # [pings]
+SNR_HEADROOM = 2.  # [-]  (target SNR is SNR_THRESHOLD times headroom)
+RANGE_HEADROOM = 1.5  # [-]  (of the farthest detected echo)
+EXPLORE_EVERY = 10  # [pings]
+MIN_MARGIN_SECONDS = 50 / 1000  # [s]
+MIN_VOLUME = 0.1  # [-]
+VOLUME_STEP = 1.25  # [-]  (multiplicative)
+INTERVAL_STEP_SECONDS = 50 / 1000  # [s]
+INTERVAL_DECAY = 0.5  # [-]
+MIN_INTERVAL_SECONDS = 1 / 1000  # [s]  (shorter - no pause at all)
+MAX_INTERVAL_SECONDS = 1.  # [s]
+
+
+class _Record:
+    __slots__ = ("useful", "snr", "max_distance", "cycle_s")
+
+    def __init__(self, useful, snr, max_distance, cycle_s):
+        self.useful = useful
+        self.snr = snr
+        self.max_distance = max_distance
+        self.cycle_s = cycle_s
+
+
+class PcAdaptiveScheduler:
+    """
+    config (all optional):
+    - window: number of recent pings taken into account
+    - snr_headroom, range_headroom, explore_every: as the constants
+    """
+    def __init__(self, config=None):
+        config = config or {}
+        self.history = History(limit=config.get("window", SCHEDULER_WINDOW))
+        self.snr_target = SNR_THRESHOLD * config.get(
+            "snr_headroom", SNR_HEADROOM)
+        self.range_headroom = config.get("range_headroom", RANGE_HEADROOM)
+        self.explore_every = config.get("explore_every", EXPLORE_EVERY)
+
+        self.volume = 1.
+        self.margin_s = None
+        self.interval_s = 0.
+        self.count = 0
+        self._last_update = None
+
+    @property
+    def records(self) -> list:
+        return self.history.history
+
+    def _cycle_s(self, timings):
+        now = time.perf_counter()
+        last, self._last_update = self._last_update, now
+        if "step" in timings:
+            # [ms] of the timer of the controller, pause excluded
+            return timings["step"] / 1e3
+        if last is None:
+            return None
+        return max(now - last - self.interval_s, 0.)
+
+    def update(self, result: Result, timings: dict = None) -> dict:
+        """
+        takes the result of the latest ping (and the stage timings [ms]
+        of its step, if measured), returns settings of the next ping
+        """
+        useful = result.error is None
+        max_distance = float(result.distances.max()) if useful else None
+        cycle_s = self._cycle_s(timings or {})
+        self.history.store(_Record(useful, result.snr, max_distance, cycle_s))
+        self.count += 1
+
+        self._update_volume(result)
+        self._update_interval(useful)
+        self._update_margin()
+        return self.settings()
+
+    def settings(self) -> dict:
+        return {"volume": self.volume, "margin_s": self.margin_s}
+
+    def _update_volume(self, result):
+        snrs = [r.snr for r in self.records]
+        if result.snr < self.snr_target:
+            self.volume = min(self.volume * VOLUME_STEP, 1.)
+        elif min(snrs) > self.snr_target * VOLUME_STEP ** 2:
+            # hysteresis - the next step down still keeps the target
+            self.volume = max(self.volume / VOLUME_STEP, MIN_VOLUME)
+
+    def _update_interval(self, useful):
+        if useful:
+            self.interval_s *= INTERVAL_DECAY
+            if self.interval_s < MIN_INTERVAL_SECONDS:
+                self.interval_s = 0.
+        elif self.volume >= 1.:
+            # nothing more to get from the pulse - wait for silence
+            self.interval_s = min(self.interval_s + INTERVAL_STEP_SECONDS,
+                                  MAX_INTERVAL_SECONDS)
+
+    def _update_margin(self):
+        distances = [r.max_distance for r in self.records
+                     if r.max_distance is not None]
+        if not distances or self.count % self.explore_every == 0:
+            self.margin_s = None
+            return
+        round_trip_s = 2 * max(distances) / SOUND_SPEED
+        self.margin_s = min(
+            max(round_trip_s * self.range_headroom, MIN_MARGIN_SECONDS),
+            RECORDING_MARGIN_SECONDS)
+
+    def updates_per_s(self) -> float:
+        """
+        useful results per second over the window (pauses included)
+        """
+        cycles = [r for r in self.records if r.cycle_s is not None]
+        if not cycles:
+            return 0.
+        seconds = sum(r.cycle_s for r in cycles) \
+                  + self.interval_s * len(cycles)
+        if seconds == 0:
+            return 0.
+        return sum(r.useful for r in cycles) / seconds
@@ -0,0 +1,156 @@
+
+import time
+
+import numpy as np
+from scipy import signal
+
+from modules.abstract.abstract_factory import (
+    AbstractEmitter, AbstractFactory, AbstractReceiver
+)
+from modules.concrete.pc_sound import (
+    CHUNK, PLAY_DELAY_SECONDS, PLAYING_DURATION_SECONDS, RATE,
+    RECORDING_MARGIN_SECONDS, SOUND_SPEED,
+    PcChirpEmitter, PcChirpProcessor, PcEmitter, PcProcessor, PcSample
+)
+
+
+SIM_ECHOES = [(1.0, 0.15), (2.5, 0.1)]  # [(m, -)]
+SIM_DIRECT_GAIN = 0.8  # [-]
+SIM_NOISE = 0.01  # [-]  (std of the additive noise)
+SIM_REVERB = 0.002  # [-]  (std of the reverb tail at its start)
+SIM_REVERB_TIME_SECONDS = 50 / 1000  # [s]  (decay to 1/e)
+SIM_LATENCY_SECONDS = 5 / 1000  # [s]  (output + input device latency)
+SIM_JITTER_SECONDS = 1 / 1000  # [s]  (std of the latency)
+
+
+class SimScene:
+    """
+    Acoustic scene seen by the microphone of a simulated sonar:
+    - direct path: the emitted pulse, delayed by the device latency
+        (with gaussian jitter)
+    - echoes: (distance, strength) pairs, delayed by the round-trip
+        time of flight, fractional delays are interpolated
+    - reverb: exponentially decaying gaussian noise excited by
+        the pulse
+    - noise: additive gaussian noise
+    - clipping and 16-bit quantization of the sound card
+
+    All random parts come from a single `numpy` generator, so a given
+    `seed` always gives the same sequence of recordings.
+    """
+    def __init__(self, config):
+        self.rng = np.random.default_rng(config.get("seed"))
+        self.echoes = config.get("echoes", SIM_ECHOES)
+        self.direct_gain = config.get("direct_gain", SIM_DIRECT_GAIN)
+        self.noise = config.get("noise", SIM_NOISE)
+        self.reverb = config.get("reverb", SIM_REVERB)
+        self.reverb_time_s = config.get(
+            "reverb_time_s", SIM_REVERB_TIME_SECONDS)
+        self.latency_s = config.get("latency_s", SIM_LATENCY_SECONDS)
+        self.jitter_s = config.get("jitter_s", SIM_JITTER_SECONDS)
+        self.n_pings = 0
+
+        if config.get("chirp"):
+            emitter = PcChirpEmitter(
+                {"pyaudio": None, "chirp": config["chirp"]})
+            self.pulse = emitter._make_beep_sample().to_values()
+        else:
+            self.pulse = PcEmitter._make_beep_sample().to_values()
+
+        seconds = 2 * PLAY_DELAY_SECONDS + PLAYING_DURATION_SECONDS \
+                  + RECORDING_MARGIN_SECONDS
+        self.n_points = (int(RATE / CHUNK * seconds) + 1) * CHUNK
+
+    def _impulse_response(self):
+        response = np.zeros(self.n_points)
+        jitter_s = self.jitter_s * self.rng.standard_normal()
+        latency_s = self.latency_s + jitter_s
+        start = (PLAY_DELAY_SECONDS + max(latency_s, 0.)) * RATE
+
+        distances, strengths = np.array(
+            [(0., self.direct_gain)] + list(self.echoes)).T
+        delays = start + 2 * distances / SOUND_SPEED * RATE
+        # fractional delays split between the neighbouring points
+        indices = np.floor(delays).astype(int)
+        fractions = delays - indices
+        valid = indices + 1 < self.n_points
+        np.add.at(response, indices[valid],
+                  strengths[valid] * (1 - fractions[valid]))
+        np.add.at(response, indices[valid] + 1,
+                  strengths[valid] * fractions[valid])
+
+        # diffuse reverb tail, following the direct path
+        first = indices[0] + 1
+        t = np.arange(self.n_points - first) / RATE
+        response[first:] += self.reverb \
+            * np.exp(-t / self.reverb_time_s) \
+            * self.rng.standard_normal(len(t))
+        return response
+
+    def render(self):
+        self.n_pings += 1
+        recording = signal.fftconvolve(
+            self._impulse_response(), self.pulse)[:self.n_points]
+        recording += self.noise * self.rng.standard_normal(self.n_points)
+
+        max_volume = PcSample._max_volume
+        recording = np.clip(recording, -1., (max_volume - 1) / max_volume)
+        recording = np.round(recording * max_volume) / max_volume
+        return PcSample.from_values(recording)
+
+
+class SimEmitter(AbstractEmitter):
+    def __init__(self, config):
+        self.scene = config["scene"]
+
+    def check(self):
+        pass
+
+    def emit_beep(self):
+        # the sound is rendered by the receiver, as a whole
+        pass
+
+
+class SimReceiver(AbstractReceiver):
+    def __init__(self, config):
+        self.scene = config["scene"]
+        self.realtime = config.get("realtime", False)
+
+    def check(self):
+        pass
+
+    def record_signal(self) -> PcSample:
+        sample = self.scene.render()
+        if self.realtime:
+            time.sleep(len(sample) / RATE)
+        return sample
+
+
+class SimFactory(AbstractFactory):
+    """
+    Sonar without sound card - see `SimScene` for the config keys,
+    besides:
+    - realtime: the receiver takes as long as a real recording
+        (default: False - as fast as possible)
+    - chirp: emit a chirp ("linear" or "hyperbolic") and process it
+        with `PcChirpProcessor`
+    """
+    def __init__(self, config):
+        self.config = config
+        self.scene = SimScene(config)
+
+    def create_emitter(self) -> SimEmitter:
+        return SimEmitter({"scene": self.scene})
+
+    def create_receiver(self) -> SimReceiver:
+        return SimReceiver({
+            "scene": self.scene,
+            "realtime": self.config.get("realtime", False)})
+
+    def create_processor(self) -> PcProcessor:
+        if self.config.get("chirp"):
+            return PcChirpProcessor(self.config)
+        return PcProcessor(self.config)
+
+    def check(self):
+        pass
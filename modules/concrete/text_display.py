@@ -1,4 +1,8 @@
 
+import sys
+import threading
+import time
+
 from modules.abstract.abstract_display import AbstractDisplay
 
 
@@ -13,6 +17,10 @@ signal-to-noise ratio: {snr:.01f}{error}
 {metadata}"""
 PEAK_TEMPLATE = "{distance:.02f} m\tintensity: {intensity:.02f}"
 
+REFRESH_RATE = 10  # [Hz]
+CURSOR_UP = "\x1b[{n}F"  # to the beginning of n-th line above
+CLEAR_DOWN = "\x1b[J"  # to the end of the screen
+
 
 class TextDisplay(AbstractDisplay):
     def __init__(self, config: dict=None):
@@ -31,7 +39,7 @@ class TextDisplay(AbstractDisplay):
         txt = "\t" + txt
         return txt
 
-    def print(self, result):
+    def _format(self, result):
         # get data
         data_dict = result.to_dict()
 
@@ -50,8 +58,97 @@ class TextDisplay(AbstractDisplay):
         else:
             error_txt = ""
 
-        # print
+        # format
         txt = TEMPLATE.format(peaks=peaks_txt, noise=data_dict["noise"],
                               snr=data_dict["snr"], error=error_txt,
                               metadata=data_dict["metadata"])
+        return txt
+
+    def print(self, result):
+        txt = self._format(result)
         print(txt, flush=True)
+
+
+class LiveTextDisplay(TextDisplay):
+    """
+    `print` only hands the result over to a background renderer thread,
+    which draws the latest one at most `refresh_rate` times per second.
+    Results coming in between are skipped, a frame identical to the
+    one on the screen is not drawn again. Every frame is redrawn in
+    place of the previous one (ANSI cursor control), instead of
+    scrolling the terminal.
+
+    config:
+    - refresh_rate - [Hz], default: REFRESH_RATE
+    - stream - file to draw in, default: sys.stdout
+
+    `close` draws the last pending result and stops the thread.
+    """
+    def __init__(self, config: dict=None):
+        super().__init__(config)
+        refresh_rate = self.config.get("refresh_rate", REFRESH_RATE)
+        self.refresh_period = 1 / refresh_rate
+        self.stream = self.config.get("stream", sys.stdout)
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+
+        self._pending = None
+        self._frame = None
+        self._frame_lines = 0
+        self._lock = threading.Lock()
+        self._new_result = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._render_loop, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def print(self, result):
+        with self._lock:
+            if self._pending is not None:
+                self.frames_skipped += 1
+            self._pending = result
+        self._new_result.set()
+
+    def close(self, timeout=1.):
+        self._stop_event.set()
+        self._new_result.set()
+        self._thread.join(timeout=timeout)
+
+    def _render_loop(self):
+        while not self._stop_event.is_set():
+            self._new_result.wait()
+            self._new_result.clear()
+            drawn_at = time.perf_counter()
+            self._render()
+            # coalesce results coming before the next refresh
+            remaining = self.refresh_period - (time.perf_counter() - drawn_at)
+            if remaining > 0:
+                self._stop_event.wait(remaining)
+        self._render()
+
+    def _render(self):
+        with self._lock:
+            result, self._pending = self._pending, None
+        if result is None:
+            return
+        txt = self._format(result)
+        if txt == self._frame:
+            with self._lock:
+                self.frames_skipped += 1
+            return
+
+        if self._frame_lines:
+            txt_out = CURSOR_UP.format(n=self._frame_lines) + CLEAR_DOWN + txt
+        else:
+            txt_out = txt
+        self.stream.write(txt_out + "\n")
+        self.stream.flush()
+        self._frame = txt
+        self._frame_lines = txt.count("\n") + 1
+        self.frames_drawn += 1
@@ -1,11 +1,16 @@
 
+from concurrent.futures import ThreadPoolExecutor
+import json
 import threading
 
+import numpy as np
+
 from modules.abstract.abstract_display import AbstractDisplay
 from modules.abstract.abstract_factory import (
     AbstractEmitter, AbstractFactory, AbstractProcessor,
     AbstractReceiver, AbstractSample
 )
+from modules.instrumentation import NULL_TIMER
 
 
 RELIABILITY_THRESHOLD = 2.5
@@ -28,6 +33,13 @@ class History:
         return self.history[-1]
 
 
+def _to_builtin(o):
+    # numpy scalars and arrays in metadata
+    if isinstance(o, (np.generic, np.ndarray)):
+        return o.tolist()
+    raise TypeError(f"{type(o).__name__} is not JSON serializable")
+
+
 class Result:
     """
     Glossary:
@@ -36,15 +48,44 @@ class Result:
     - noise - median value of wavelet transform matrix
     - snr - signal to noise ratio, snr = [main pulse height] / [noise]
     - intensity - reliability of signal depending on processing method
+
+    Peaks are an [n x 2] array of (distance, intensity) rows, sorted by
+    distance - `distances`, `intensities` and `reliable` are its columns.
+    Their JSON is built once: assign new peaks instead of changing
+    the array in place.
     """
+    __slots__ = ("_peaks", "noise", "snr", "metadata", "error",
+                 "_peaks_json")
+
     def __init__(self, peaks, noise, snr, **metadata):
-        peaks = sorted(peaks, key=lambda p: p[0])
-        self.peaks = list(peaks)
+        self.peaks = peaks
         self.noise = noise
         self.snr = snr
         self.metadata = metadata
         self.error = None
 
+    @property
+    def peaks(self):
+        return self._peaks
+
+    @peaks.setter
+    def peaks(self, peaks):
+        peaks = np.array(peaks, dtype=float).reshape(-1, 2)
+        self._peaks = peaks[np.argsort(peaks[:, 0], kind="stable")]
+        self._peaks_json = None
+
+    @property
+    def distances(self):
+        return self._peaks[:, 0]
+
+    @property
+    def intensities(self):
+        return self._peaks[:, 1]
+
+    @property
+    def reliable(self):
+        return self.intensities > RELIABILITY_THRESHOLD
+
     @classmethod
     def from_error(cls, error, **kwargs):
         init_args = dict(peaks=[(0, 0)], noise=0, snr=0)
@@ -54,20 +95,37 @@ class Result:
         result.error = error_txt
         return result
 
+    def _make_peak_dicts(self):
+        # new ones every call - the caller may change them
+        return [{
+            "distance": distance,
+            "intensity": intensity,
+            "reliable": reliable
+        } for distance, intensity, reliable in zip(
+            self.distances.tolist(), self.intensities.tolist(),
+            self.reliable.tolist())]
+
     def to_dict(self):
-        peaks = [{
-            "distance": p[0],
-            "intensity": p[1],
-            "reliable": bool(p[1] > RELIABILITY_THRESHOLD)
-        } for p in self.peaks]
         return {
-            "peaks": peaks,
+            "peaks": self._make_peak_dicts(),
             "noise": self.noise,
             "snr": self.snr,
             "error": self.error,
             "metadata": self.metadata
         }
 
+    def to_json(self):
+        """`to_dict` as JSON text"""
+        if self._peaks_json is None:
+            self._peaks_json = json.dumps(self._make_peak_dicts())
+        rest = json.dumps({
+            "noise": self.noise,
+            "snr": self.snr,
+            "error": self.error,
+            "metadata": self.metadata
+        }, default=_to_builtin)
+        return '{"peaks": ' + self._peaks_json + ", " + rest[1:]
+
 
 class Measurer:
     def __init__(self, factory: AbstractFactory):
@@ -84,12 +142,23 @@ class Measurer:
 
         self.barrier = threading.Barrier(2)
 
-        # TODO - MAYBE SOME CALLIBRATION SOMEWHERE
+        # latency of the devices is calibrated by a burst of pings of
+        # a measurer, e.g. `modules.concrete.calibration.calibrate`
 
     def check(self):
         self._emitter.check()
         self._receiver.check()
 
+    def warm_up(self):
+        return {
+            "emitter": self._emitter.warm_up(),
+            "receiver": self._receiver.warm_up(),
+        }
+
+    def configure(self, **settings):
+        self._emitter.configure(**settings)
+        self._receiver.configure(**settings)
+
     def single_measurement(self) -> AbstractSample:
         t = threading.Thread(target=self._emit_beep)
         t.start()
@@ -107,17 +176,99 @@ class Measurer:
         return sample
 
 
+class ArrayMeasurer(Measurer):
+    """
+    One emitter and N receivers (`factory.create_receivers`), released
+    together by a barrier: the receivers record in parallel on pool
+    threads kept for the whole run, so a ping takes as long as the
+    slowest receiver, not the sum of them.
+
+    The sample of a ping is the list of recordings, in the order
+    of receivers.
+    """
+    def __init__(self, factory: AbstractFactory):
+        self._emitter = factory.create_emitter()
+        self._receivers = factory.create_receivers()
+        if not isinstance(self._emitter, AbstractEmitter):
+            raise TypeError(
+                "please provide Emitter class based on `modules."
+                "abstract.abstract_factory.AbstractEmitter` interface")
+        if not self._receivers or not all(
+                isinstance(r, AbstractReceiver) for r in self._receivers):
+            raise TypeError(
+                "please provide Receiver classes based on `modules."
+                "abstract.abstract_factory.AbstractReceiver` interface")
+
+        self.barrier = threading.Barrier(len(self._receivers) + 1)
+        self._pool = ThreadPoolExecutor(
+            max_workers=len(self._receivers),
+            thread_name_prefix="receiver")
+
+    def __del__(self):
+        if hasattr(self, "_pool"):
+            self._pool.shutdown(wait=False)
+
+    def check(self):
+        self._emitter.check()
+        for receiver in self._receivers:
+            receiver.check()
+
+    def warm_up(self):
+        return {
+            "emitter": self._emitter.warm_up(),
+            "receivers": [r.warm_up() for r in self._receivers],
+        }
+
+    def configure(self, **settings):
+        self._emitter.configure(**settings)
+        for receiver in self._receivers:
+            receiver.configure(**settings)
+
+    def single_measurement(self) -> list:
+        futures = [self._pool.submit(self._record, receiver)
+                   for receiver in self._receivers]
+        self._emit_beep()
+        return [future.result() for future in futures]
+
+    def _record(self, receiver) -> AbstractSample:
+        self.barrier.wait(timeout=5)
+        return receiver.record_signal()
+
+
 class Controller:
-    def __init__(self, factory: AbstractFactory, display: AbstractDisplay):
-        self.measurer = Measurer(factory)
+    timer = NULL_TIMER
+    scheduler = None
+
+    def __init__(self, factory: AbstractFactory, display: AbstractDisplay,
+                 timer=None, warm_up=True, array=False, scheduler=None):
+        if timer is not None:
+            self.timer = timer
+        # picks settings of the next ping and a pause before it,
+        # e.g. `modules.concrete.scheduler.PcAdaptiveScheduler`
+        self.scheduler = scheduler
+        if array:
+            # all the receivers of the factory at once
+            self.measurer = ArrayMeasurer(factory)
+        else:
+            self.measurer = Measurer(factory)
         self.history = History()
         self.factory = factory
         self.processor = factory.create_processor()
+        if getattr(self.processor, "timer", None) is NULL_TIMER:
+            # a single timer for all the stages of a step
+            self.processor.timer = self.timer
         self.display = display
 
         self.loop_event = threading.Event()
 
         self.measurer.check()
+        # cold versus warm timings [ms] of the one-time costs
+        self.warm_up_timings = self._warm_up() if warm_up else {}
+
+    def _warm_up(self):
+        timings = self.measurer.warm_up()
+        timings["processor"] = self.processor.warm_up()
+        return timings
 
     def loop(self, limit: int=None):
         count = 0
@@ -126,13 +277,24 @@ class Controller:
             count += 1
             if limit is not None and count >= limit:
                 break
+            if self.scheduler is not None:
+                # interrupted by `loop_event` as well
+                self.loop_event.wait(self.scheduler.interval_s)
 
     def _step(self):
-        sample = self._measure()
-        self.history.store(sample)
-        latest_sample = self.history.get_last()
-        result = self._process(sample)
-        self._print(result)
+        timer = self.timer
+        # `timer.last()` - the stages of this step only
+        with timer.run(), timer.stage("step"):
+            with timer.stage("measure"):
+                sample = self._measure()
+            self.history.store(sample)
+            latest_sample = self.history.get_last()
+            with timer.stage("process"):
+                result = self._process(sample)
+            with timer.stage("print"):
+                self._print(result)
+        if self.scheduler is not None:
+            self._schedule(result)
 
     def _measure(self) -> AbstractSample:
         sample = self.measurer.single_measurement()
@@ -144,3 +306,7 @@ class Controller:
 
     def _print(self, result: Result):
         self.display.print(result)
+
+    def _schedule(self, result: Result):
+        settings = self.scheduler.update(result, self.timer.last())
+        self.measurer.configure(**settings)
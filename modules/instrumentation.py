@@ -0,0 +1,155 @@
+
+from collections import deque
+import contextlib
+import time
+
+import numpy as np
+
+
+STAGE_WINDOW = 256  # [measurements]  (per stage)
+PERCENTILES = [50, 95, 99]  # [%]
+N_WARM_CALLS = 3
+
+
+def cold_warm(function, n_warm=N_WARM_CALLS):
+    """
+    duration of the first call versus the best of the next ones [ms]
+    """
+    durations = []
+    for _ in range(1 + n_warm):
+        start = time.perf_counter_ns()
+        function()
+        durations.append((time.perf_counter_ns() - start) / 1e6)
+    return {"cold_ms": durations[0], "warm_ms": min(durations[1:])}
+
+
+class _Stage:
+    __slots__ = ("durations", "_start", "_name", "_timer")
+
+    def __init__(self, timer, name, window):
+        self.durations = deque(maxlen=window)
+        self._start = 0
+        self._name = name
+        self._timer = timer
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = time.perf_counter_ns() - self._start
+        self.durations.append(duration)
+        self._timer._record(self._name, duration)
+        return False
+
+
+class StageTimer:
+    """
+    Wall time of named stages, measured as:
+
+        with timer.stage("process"):
+            ...
+
+    The last `window` durations of every stage are kept, `stats`
+    summarizes them in milliseconds.
+
+    The stages of one ping are a run, `with timer.run() as durations`
+    (the processor's run nested in the controller's one): `last` holds
+    only the stages of the latest outermost run, so a stage skipped
+    by an error is not reported from an earlier ping. With
+    `attach=True`, the processor copies the durations of its run into
+    `Result.metadata["timings_ms"]`.
+
+    A stage is not re-entrant - nested stages need different names.
+    """
+    enabled = True
+
+    def __init__(self, window=STAGE_WINDOW, attach=False):
+        self.window = window
+        self.attach_to_result = attach
+        self._stages = {}
+        # durations [ms] of the open runs, the outermost first
+        self._runs = []
+        self._latest = {}
+
+    def stage(self, name):
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = _Stage(self, name, self.window)
+        return stage
+
+    @contextlib.contextmanager
+    def run(self):
+        """durations [ms] of the stages measured within, by name"""
+        if not self._runs:
+            self._latest = {}
+        durations = {}
+        self._runs.append(durations)
+        try:
+            yield durations
+        finally:
+            self._runs.pop()
+
+    def _record(self, name, duration):
+        duration_ms = duration / 1e6
+        self._latest[name] = duration_ms
+        for durations in self._runs:
+            durations[name] = duration_ms
+
+    def last(self):
+        return dict(self._latest)
+
+    def stats(self):
+        """
+        {stage: {"count": n, "last": ms, "p50": ms, "p95": ms, "p99": ms}}
+        """
+        stats = {}
+        for name, stage in self._stages.items():
+            if not stage.durations:
+                continue
+            durations = np.array(stage.durations) / 1e6
+            stats[name] = {"count": len(durations), "last": durations[-1]}
+            for p, value in zip(
+                    PERCENTILES, np.percentile(durations, PERCENTILES)):
+                stats[name][f"p{p}"] = value
+        return stats
+
+    def reset(self):
+        self._stages.clear()
+        self._latest = {}
+
+    def attach(self, result, durations=None):
+        """durations of a run (by default - `last`)"""
+        if self.attach_to_result:
+            if durations is None:
+                durations = self.last()
+            result.metadata["timings_ms"] = dict(durations)
+
+
+class NullTimer:
+    """
+    `StageTimer` interface doing nothing - the default
+    """
+    enabled = False
+    _null_stage = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._null_stage
+
+    def run(self):
+        return contextlib.nullcontext({})
+
+    def last(self):
+        return {}
+
+    def stats(self):
+        return {}
+
+    def reset(self):
+        pass
+
+    def attach(self, result, durations=None):
+        pass
+
+
+NULL_TIMER = NullTimer()
@@ -1,11 +1,15 @@
 
+import time
 from typing import Union
 
 from fastapi import APIRouter, Request, Response, status
 from fastapi.responses import JSONResponse
 
-from modules.microservice.schemas import \
-     HealthErrorResponse, HealthResponse, LatencyRequest, LatencyResponse
+from modules.microservice.core import metrics
+from modules.microservice.schemas import (
+    HealthErrorResponse, HealthResponse, LatencyRequest, LatencyResponse,
+    SyncRequest, SyncResponse
+)
 from modules.utilities import compute_latency
 
 
@@ -53,6 +57,24 @@ async def get_latency(request: Request, data: LatencyRequest):
     return {"latency_s": latency_s}
 
 
+@router.get("/sync", response_model=SyncResponse)
+async def get_sync(data: SyncRequest):
+    receive_ns = time.time_ns()
+    return {
+        "origin_ns": data.origin_ns,
+        "receive_ns": receive_ns,
+        "transmit_ns": time.time_ns()
+    }
+
+
+@router.get("/metrics")
+async def get_metrics():
+    return Response(
+        content=metrics.REGISTRY.render(),
+        media_type=metrics.CONTENT_TYPE
+    )
+
+
 @router.get("/stop")
 async def shut_down(request: Request):
     request.app.state.server.should_exit = True
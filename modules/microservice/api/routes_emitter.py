@@ -1,8 +1,11 @@
 
+import time
+
 from fastapi import APIRouter, Request, Response, status
 
+from modules.microservice.core import metrics
 from modules.microservice.schemas import PlayRequest
-from modules.utilities import wait_till_time
+from modules.utilities import timestamp_to_ns, wait_till_time
 
 
 router = APIRouter()
@@ -10,6 +13,10 @@ router = APIRouter()
 
 @router.get("/play")
 async def play(request: Request, data: PlayRequest):
-    wait_till_time(data.schedule)
-    request.app.state.emitter.emit_beep()
+    schedule_ns = timestamp_to_ns(data.schedule)
+    wait_till_time(schedule_ns)
+    metrics.SCHEDULE_ERROR.observe(
+        (time.time_ns() - schedule_ns) / 1e9, action="play")
+    with metrics.DEVICE_DURATION.time(action="play"):
+        request.app.state.emitter.emit_beep()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,8 +1,11 @@
 
+import time
+
 from fastapi import APIRouter, Request, Response
 
+from modules.microservice.core import metrics
 from modules.microservice.schemas import RecordRequest
-from modules.utilities import wait_till_time
+from modules.utilities import timestamp_to_ns, wait_till_time
 
 
 router = APIRouter()
@@ -10,8 +13,12 @@ router = APIRouter()
 
 @router.get("/record")
 async def record(request: Request, data: RecordRequest):
-    wait_till_time(data.schedule)
-    sample = request.app.state.receiver.record_signal()
+    schedule_ns = timestamp_to_ns(data.schedule)
+    wait_till_time(schedule_ns)
+    metrics.SCHEDULE_ERROR.observe(
+        (time.time_ns() - schedule_ns) / 1e9, action="record")
+    with metrics.DEVICE_DURATION.time(action="record"):
+        sample = request.app.state.receiver.record_signal()
     return Response(
         content=sample.to_data(),
         media_type="application/octet-stream"
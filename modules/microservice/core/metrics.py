@@ -0,0 +1,254 @@
+"""
+Minimal metrics registry, rendered in the Prometheus text exposition
+format (version 0.0.4) by the `/metrics` endpoint - no client library
+or push gateway needed, a scraper reads the service directly.
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = [
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5.]
+SCHEDULE_ERROR_BUCKETS = [
+    -0.01, -0.005, -0.002, -0.001, 0., 0.001, 0.002, 0.005, 0.01,
+    0.02, 0.05, 0.1]
+BYTES_BUCKETS = [0, 256, 1024, 4096, 16384, 65536, 262144, 1048576]
+LOOP_LAG_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                    0.1, 0.25, 0.5, 1.]
+LOOP_LAG_INTERVAL_S = 0.1  # [s]
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels:
+        value = str(value).replace("\\", r"\\").replace('"', r'\"') \
+            .replace("\n", r"\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Metric(ABC):
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name}: expected labels {self.labelnames}, "
+                f"got {tuple(labels)}")
+        return tuple((name, labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def _samples(self):
+        pass
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            for suffix, labels, value in self._samples():
+                lines.append(f"{self.name}{suffix}{_format_labels(labels)} "
+                             f"{_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        for key, value in sorted(self._values.items()):
+            yield "", key, value
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels))
+
+    def _samples(self):
+        for key, value in sorted(self._values.items()):
+            yield "", key, value
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(
+            time.perf_counter() - self._start, **self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = sorted(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            if key not in self._values:
+                # [per-bucket counts, sum, count] - cumulated on render
+                self._values[key] = [[0] * len(self.buckets), 0., 0]
+            state = self._values[key]
+            i = bisect.bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def get_count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return 0 if state is None else state[2]
+
+    def _samples(self):
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield "_bucket", key + (("le", _format_value(bound)),), \
+                    cumulative
+            yield "_bucket", key + (("le", "+Inf"),), count
+            yield "_sum", key, total
+            yield "_count", key, count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        if any(m.name == metric.name for m in self._metrics):
+            raise ValueError(f"metric already registered: {metric.name}")
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "sonar_http_requests_total", "HTTP requests served",
+    ["method", "path", "status"]))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "sonar_http_request_duration_seconds", "time spent serving a request",
+    ["path"]))
+PAYLOAD_BYTES = REGISTRY.register(Histogram(
+    "sonar_payload_bytes", "size of request and response bodies",
+    ["path", "direction"], buckets=BYTES_BUCKETS))
+SCHEDULE_ERROR = REGISTRY.register(Histogram(
+    "sonar_schedule_error_seconds",
+    "actual start of play / record minus its schedule",
+    ["action"], buckets=SCHEDULE_ERROR_BUCKETS))
+DEVICE_OPEN = REGISTRY.register(Histogram(
+    "sonar_device_open_seconds", "time spent opening an audio stream",
+    ["direction"]))
+DEVICE_DURATION = REGISTRY.register(Histogram(
+    "sonar_device_seconds", "duration of play / record on the device",
+    ["action"]))
+EVENT_LOOP_LAG = REGISTRY.register(Histogram(
+    "sonar_event_loop_lag_seconds",
+    "delay of a periodic event loop wake-up behind its schedule",
+    buckets=LOOP_LAG_BUCKETS))
+WARM_UP = REGISTRY.register(Gauge(
+    "sonar_warm_up_seconds",
+    "device open at startup: the first (cold) and the next (warm) one",
+    ["run"]))
+
+
+class TimedDriver:
+    """
+    wraps a pyaudio driver, measuring the time of opening streams
+    """
+    def __init__(self, pa, histogram=DEVICE_OPEN):
+        self._pa = pa
+        self._histogram = histogram
+
+    def __getattr__(self, name):
+        return getattr(self._pa, name)
+
+    def open(self, *args, **kwargs):
+        direction = "input" if kwargs.get("input") else "output"
+        with self._histogram.time(direction=direction):
+            return self._pa.open(*args, **kwargs)
+
+
+async def track_requests(request, call_next):
+    """
+    HTTP middleware - request counts, durations and payload sizes
+    """
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route is not None else "other"
+
+    REQUESTS.inc(method=request.method, path=path,
+                 status=response.status_code)
+    REQUEST_DURATION.observe(time.perf_counter() - start, path=path)
+    for direction, headers in [("request", request.headers),
+                               ("response", response.headers)]:
+        size = headers.get("content-length")
+        if size is not None:
+            PAYLOAD_BYTES.observe(int(size), path=path, direction=direction)
+    return response
+
+
+async def monitor_event_loop(interval_s=LOOP_LAG_INTERVAL_S):
+    """
+    background task - blocking calls in coroutines show up as lag
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval_s
+        await asyncio.sleep(interval_s)
+        EVENT_LOOP_LAG.observe(max(loop.time() - expected, 0.))
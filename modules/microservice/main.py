@@ -1,13 +1,20 @@
 
+import asyncio
 import os
 
 from fastapi import FastAPI, Request
-import uvicorn
 
 from modules.concrete.pc_sound import PcFactory
-from modules.microservice.api import (
-    routes_common, routes_emitter, routes_receiver)
+from modules.microservice.api import routes_common
+from modules.microservice.core import metrics
 from modules.microservice.core.config import SETTINGS
+from modules.utilities import lazy_import
+
+# only the routes of the running service are loaded
+routes_emitter = lazy_import("modules.microservice.api.routes_emitter")
+routes_receiver = lazy_import("modules.microservice.api.routes_receiver")
+uvicorn = lazy_import("uvicorn")
+pyaudio = lazy_import("pyaudio")
 
 
 SERVICE_TYPE = os.getenv("SERVICE_TYPE", "")
@@ -18,21 +25,32 @@ if SERVICE_TYPE not in ["EMITTER", "RECEIVER"]:
 
 
 async def lifespan(app: FastAPI):
-    factory = PcFactory({})
+    pa = pyaudio.PyAudio()
+    factory = PcFactory({"pyaudio": metrics.TimedDriver(pa)})
 
     app.state.service_type = SERVICE_TYPE
     if SERVICE_TYPE == "EMITTER":
         emitter = factory.create_emitter()
         app.state.emitter = emitter
+        device = emitter
     elif SERVICE_TYPE == "RECEIVER":
         receiver = factory.create_receiver()
         app.state.receiver = receiver
+        device = receiver
+    # pre-open the device, so the first request is not the slow one
+    app.state.warm_up = device.warm_up()
+    for run, key in [("cold", "cold_ms"), ("warm", "warm_ms")]:
+        metrics.WARM_UP.set(app.state.warm_up[key] / 1e3, run=run)
 
+    lag_monitor = asyncio.create_task(metrics.monitor_event_loop())
     yield
+    lag_monitor.cancel()
+    pa.terminate()
 
 
 def main():
     app = FastAPI(lifespan=lifespan)
+    app.middleware("http")(metrics.track_requests)
     app.include_router(routes_common.router)
     if SERVICE_TYPE == "EMITTER":
         app.include_router(routes_emitter.router)
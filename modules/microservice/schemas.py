@@ -1,4 +1,6 @@
 
+from typing import Union
+
 from pydantic import BaseModel
 
 
@@ -12,16 +14,26 @@ class HealthErrorResponse(BaseModel):
 
 
 class LatencyRequest(BaseModel):
-    trigger_timestamp: str
+    trigger_timestamp: Union[int, str]
 
 
 class LatencyResponse(BaseModel):
     latency_s: float
 
 
+class SyncRequest(BaseModel):
+    origin_ns: int
+
+
+class SyncResponse(BaseModel):
+    origin_ns: int
+    receive_ns: int
+    transmit_ns: int
+
+
 class PlayRequest(BaseModel):
-    schedule: str
+    schedule: Union[int, str]
 
 
 class RecordRequest(BaseModel):
-    schedule: str
+    schedule: Union[int, str]
@@ -0,0 +1,176 @@
+
+import threading
+
+import numpy as np
+
+from modules.core import History
+
+
+SYNC_ROUNDS = 4  # [exchanges per host]
+SYNC_WARM_UP_ROUNDS = 1  # [exchanges per host]
+SYNC_INTERVAL_S = 10.  # [s]
+SYNC_WINDOW = 64  # [exchanges]
+
+DELAY_QUANTILE = 0.5  # [-]
+# exchanges queued e.g. behind a ping on the remote side - far above
+# the minimum delay of the window
+MAX_DELAY_FACTOR = 2.  # [-]
+MAX_DELAY_MARGIN_NS = 1_000_000  # [ns]
+OUTLIER_MAD_FACTOR = 3.  # [-]
+JITTER_FACTOR = 3.  # [-]
+MAD_TO_SIGMA = 1.4826  # [-]
+MIN_DRIFT_SPAN_NS = 1_000_000_000  # [ns]
+MIN_MARGIN_S = 0.002  # [s]
+
+
+class ClockEstimator:
+    """
+    Estimates offset and drift of a remote clock from four-timestamp
+    (NTP-style) exchanges:
+    - t1: request sent (local clock)
+    - t2: request received (remote clock)
+    - t3: response sent (remote clock)
+    - t4: response received (local clock)
+
+    Glossary:
+    - offset: remote clock minus local clock,
+        offset = ((t2 - t1) + (t3 - t4)) / 2
+    - delay: round-trip time spent on the network,
+        delay = (t4 - t1) - (t3 - t2)
+    - drift: rate of change of the offset [s / s]
+    - forward delay: time from sending the request until the remote
+        side handles it - this is what a schedule has to outrun
+    - jitter: spread (robust sigma) of the forward delay
+    """
+    def __init__(self, limit=SYNC_WINDOW):
+        self.history = History(limit=limit)
+        self._model = None
+
+    def __len__(self):
+        return len(self.history.history)
+
+    def add(self, t1, t2, t3, t4):
+        offset = ((t2 - t1) + (t3 - t4)) / 2
+        delay = (t4 - t1) - (t3 - t2)
+        forward = t2 - t1
+        self.history.store((t1, offset, delay, forward))
+        self._model = self._fit()
+
+    def _fit(self):
+        data = np.array(self.history.history, dtype=float)
+        t, offsets, delays, forwards = data.T
+
+        # clock filter - low-delay exchanges carry the least asymmetry
+        max_delay = min(
+            np.quantile(delays, DELAY_QUANTILE),
+            MAX_DELAY_FACTOR * np.amin(delays) + MAX_DELAY_MARGIN_NS)
+        keep = delays <= max_delay
+        # reject offset outliers among them
+        deviation = np.abs(offsets - np.median(offsets[keep]))
+        mad = np.median(deviation[keep])
+        keep &= deviation <= OUTLIER_MAD_FACTOR * mad + 1.
+
+        t_ref = t[-1]
+        t_kept = t[keep] - t_ref
+        if len(t_kept) > 1 and np.ptp(t_kept) >= MIN_DRIFT_SPAN_NS:
+            drift, offset = np.polyfit(t_kept, offsets[keep], 1)
+        else:
+            drift, offset = 0., np.median(offsets[keep])
+
+        # forward delays as seen on the local clock, of the kept
+        # exchanges - a queued one would push the lead as well
+        forwards = forwards[keep] - (offset + drift * t_kept)
+        forward = np.median(forwards)
+        jitter = MAD_TO_SIGMA * np.median(np.abs(forwards - forward))
+        return t_ref, offset, drift, forward, jitter
+
+    def _get_model(self):
+        if self._model is None:
+            raise RuntimeError("no clock exchanges collected yet")
+        return self._model
+
+    def offset_ns(self, at_ns):
+        t_ref, offset, drift, _, _ = self._get_model()
+        return offset + drift * (at_ns - t_ref)
+
+    @property
+    def drift(self):
+        return self._get_model()[2]
+
+    @property
+    def forward_s(self):
+        return self._get_model()[3] / 1e9
+
+    @property
+    def jitter_s(self):
+        return self._get_model()[4] / 1e9
+
+    def lead_s(self):
+        return max(self.forward_s, 0.) + JITTER_FACTOR * self.jitter_s \
+               + MIN_MARGIN_S
+
+
+class TimeSync:
+    """
+    Keeps a `ClockEstimator` per host up to date, re-syncing
+    periodically in a background thread.
+
+    `probe(host)` performs a single exchange and returns the
+    timestamps (t1, t2, t3, t4) in nanoseconds.
+    """
+    def __init__(self, probe, hosts, rounds=SYNC_ROUNDS,
+                 interval_s=SYNC_INTERVAL_S):
+        self._probe = probe
+        self.estimators = {host: ClockEstimator() for host in hosts}
+        self.rounds = rounds
+        self.interval_s = interval_s
+
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self._thread = None
+
+    def sync(self, warm_up_rounds=0):
+        for i in range(warm_up_rounds + self.rounds):
+            for host, estimator in self.estimators.items():
+                timestamps = self._probe(host)
+                if i < warm_up_rounds:
+                    continue
+                with self.lock:
+                    estimator.add(*timestamps)
+
+    def start(self):
+        if self.interval_s is None or self._thread is not None:
+            return
+        self.stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval_s):
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"time sync failed: {type(e).__name__}: {e}",
+                      flush=True)
+
+    def offset_s(self, host, at_ns):
+        with self.lock:
+            return self.estimators[host].offset_ns(at_ns) / 1e9
+
+    def lead_s(self):
+        with self.lock:
+            return max(e.lead_s() for e in self.estimators.values())
+
+    def schedule_delay_s(self, host, at_ns):
+        """
+        delay to add to the local time `at_ns` so the resulting
+        timestamp, read on the `host` clock, points to the common
+        instant `lead_s` ahead
+        """
+        return self.lead_s() + self.offset_s(host, at_ns)
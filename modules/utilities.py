@@ -1,41 +1,142 @@
 
 from datetime import datetime
+from functools import lru_cache
+import importlib.util
+import re
+import sys
+import threading
 import time
+import types
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+FRACTION_DIGITS = 9
+NS_PER_S = 1_000_000_000
+
+_FRACTION_PATTERN = re.compile(r"(\d{1,9})(.*)")
+
+
+class _MissingModule:
+    def __init__(self, name):
+        self.__name__ = name
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            # not the API of the module - probed by `hasattr`, `copy`,
+            # `unittest.mock` ...
+            raise AttributeError(attr)
+        raise ModuleNotFoundError(
+            f"No module named {self.__name__!r}", name=self.__name__)
+
+
+# `importlib.util.LazyLoader` is not thread-safe before Python 3.12:
+# a thread could see a module half-executed by another one
+_LAZY_LOCK = threading.RLock()
+_executing = set()
+
+
+class _LazyModule(types.ModuleType):
+    def __getattr__(self, attr):
+        name = self.__name__
+        with _LAZY_LOCK:
+            if type(self) is _LazyModule:
+                if name in _executing:
+                    # accessed by the module itself, e.g. by its imports
+                    raise AttributeError(
+                        f"partially initialized module {name!r} "
+                        f"has no attribute {attr!r}")
+                _executing.add(name)
+                try:
+                    self.__spec__.loader.exec_module(self)
+                    self.__class__ = types.ModuleType
+                finally:
+                    _executing.discard(name)
+        return getattr(self, attr)
+
+
+def lazy_import(name):
+    """
+    module executed on the first access to its attribute - heavy
+    dependencies cost nothing to the code paths not using them;
+    a missing module fails on the first use, not on the import
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return _MissingModule(name)
+    module = importlib.util.module_from_spec(spec)
+    module.__class__ = _LazyModule
+    sys.modules[name] = module
+    return module
+
+
+@lru_cache(maxsize=64)
+def _parse_seconds(main_part):
+    # naive timestamps are local time, aware ones carry their UTC offset
+    if main_part.endswith("Z"):
+        main_part = main_part[:-1] + "+00:00"
+    dt = datetime.fromisoformat(main_part)
+    return int(dt.timestamp())
+
+
+@lru_cache(maxsize=64)
+def _format_seconds(seconds):
+    dt = datetime.fromtimestamp(seconds)
+    return dt.strftime(TIMESTAMP_FORMAT)
 
 
 def _timestamp_to_ns(timestamp):
     main_part, fraction_part = timestamp.split('.')
-    dt = datetime.fromisoformat(main_part)
-    seconds = dt.timestamp()
-    seconds = int(seconds)
+    if fraction_part.isdigit() and len(fraction_part) == FRACTION_DIGITS:
+        digits, zone = fraction_part, ""
+    else:
+        match = _FRACTION_PATTERN.fullmatch(fraction_part)
+        if match is None:
+            raise ValueError(f"wrong fraction of second: {fraction_part!r}")
+        digits, zone = match.groups()
+    seconds = _parse_seconds(main_part + zone)
 
-    nanoseconds = int(fraction_part)
-    time_ns = seconds * 1_000_000_000 + nanoseconds
+    nanoseconds = int(digits.ljust(FRACTION_DIGITS, "0"))
+    time_ns = seconds * NS_PER_S + nanoseconds
     return time_ns
 
 
+def timestamp_to_ns(timestamp):
+    """
+    accepts both forms of the scheduling protocol:
+    - int: nanoseconds since the epoch (fast path)
+    - str: local ISO time, e.g. "2023-10-10T10:10:10.500000000"
+    """
+    if isinstance(timestamp, int):
+        return timestamp
+    return _timestamp_to_ns(timestamp)
+
+
+def get_timestamp_ns(latency_s=0.):
+    return time.time_ns() + int(latency_s * 1e9)
+
+
 def get_timestamp(latency_s=0.):
     now_ns = time.time_ns() + int(latency_s * 1e9)
-    seconds = now_ns // 1_000_000_000
-    nanoseconds = now_ns % 1_000_000_000
+    seconds = now_ns // NS_PER_S
+    nanoseconds = now_ns % NS_PER_S
 
-    dt = datetime.fromtimestamp(seconds)
-    timestamp_txt = f"{dt.strftime(TIMESTAMP_FORMAT)}.{nanoseconds:09d}"
+    timestamp_txt = f"{_format_seconds(seconds)}.{nanoseconds:09d}"
     return timestamp_txt
 
 
 def compute_latency(timestamp):
     now_ns = time.time_ns()
-    time_ns = _timestamp_to_ns(timestamp)
+    time_ns = timestamp_to_ns(timestamp)
     latency_s = (now_ns - time_ns) / 1e9
     return latency_s
 
 
 def wait_till_time(timestamp):
-    scheduled_ns = _timestamp_to_ns(timestamp)
+    # schedules live on the wall clock, `time.sleep` only gets the
+    # remaining duration (it is measured on the monotonic clock)
+    scheduled_ns = timestamp_to_ns(timestamp)
     now_ns = time.time_ns()
     if now_ns > scheduled_ns:
         return
@@ -1,8 +1,11 @@
 
+import hashlib
+import os
+
 from matplotlib import colors
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy import signal
+from scipy import fft
 from scipy.ndimage import maximum_filter
 from scipy.signal import find_peaks
 
@@ -16,6 +19,12 @@ RECORDING_FILENAME = "sound_samples/1200Hz_4ms.dat"
 
 SOUND_SPEED = 343.  # [m/s]
 WL_GAUSS_PARAM = 0.0004  # [-]  (the bigger, the shorter contour)
+FREQUENCIES = np.geomspace(700, 7000, 500)  # [Hz]
+
+KERNEL_TOLERANCE = 1e-6  # [-]  (wavelet truncated below this amplitude)
+FREQUENCY_BLOCK = 50  # [-]  (wavelets convolved at once - memory bound)
+CACHE_DIRECTORY = ".cache"  # (transforms by recording and parameters)
+DISPLAY_WIDTH = 2000  # [px]  (plots are decimated to it)
 
 
 ###############
@@ -23,22 +32,38 @@ WL_GAUSS_PARAM = 0.0004  # [-]  (the bigger, the shorter contour)
 ###############
 
 
-def bytes_to_integer(data):
-    return int.from_bytes(data, byteorder='little', signed=True)
+def load_recording(filename=SOUND_FILENAME):
+    # memory mapped, see `modules.concrete.replay` for whole sessions
+    return np.memmap(filename, dtype=f"<i{BYTES_PER_FRAME}", mode="r")
 
 
-def load_recording(filename=SOUND_FILENAME):
-    with open(filename, 'rb') as f:
-        byte_data = f.read()
-    fragments = [byte_data[i:i + BYTES_PER_FRAME]
-                 for i in range(0, len(byte_data), BYTES_PER_FRAME)]
-    samples = list(map(bytes_to_integer, fragments))
-    return samples
+def decimate(values, width=DISPLAY_WIDTH):
+    """
+    min / max envelopes of about `width` bins of the last axis - drawn,
+    they look the same as all the values; returns the first index
+    of every bin, the minima and the maxima
+    """
+    values = np.asarray(values)
+    n = values.shape[-1]
+    if n <= 2 * width:
+        return np.arange(n), values, values
+    bin_size = n // width
+    n_bins = -(-n // bin_size)
+    # the last bin filled up with its last value
+    padding = [(0, 0)] * (values.ndim - 1) + [(0, n_bins * bin_size - n)]
+    bins = np.pad(values, padding, mode="edge").reshape(
+        values.shape[:-1] + (n_bins, bin_size))
+    return np.arange(n_bins) * bin_size, bins.min(axis=-1), bins.max(axis=-1)
 
 
 def plot(list_of_ints):
     plt.figure(figsize=(12, 4), dpi=100)
-    plt.plot(list_of_ints, linewidth=0.3, color='#1f77b4')
+    x, low, high = decimate(list_of_ints)
+    if low is high:
+        plt.plot(x, low, linewidth=0.3, color='#1f77b4')
+    else:
+        plt.fill_between(x, low, high, step='post', linewidth=0.3,
+                         color='#1f77b4')
     plt.grid(True, which='both', linestyle='--', linewidth=0.5, alpha=0.5)
     plt.title("Sonar Signal")
     plt.xlabel("Sample Index")
@@ -49,12 +74,16 @@ def plot(list_of_ints):
 
 def plot_2d(data_2d, y_annotations=None):
     limit = np.max(data_2d)
+    n_freqs, n = data_2d.shape
+    # maxima only - peaks are what is looked for
+    _, _, data_2d = decimate(data_2d)
 
     #plt.figure(figsize=(10, 6))
     img = plt.imshow(
         data_2d,
         aspect='auto',
         interpolation='nearest',
+        extent=(0, n, n_freqs - 0.5, -0.5),
         norm=colors.LogNorm(vmin=limit/100, vmax=limit)
         #vmin = 0.,
         #vmax = limit
@@ -78,17 +107,65 @@ def plot_2d(data_2d, y_annotations=None):
 ####################
 
 
-def my_wavelet(n, f):
+def my_wavelet(n, f, gauss_param=WL_GAUSS_PARAM):
     """
     n - number of sample points
     f - frequency of carrier wave
     """
     x = np.arange(-n//2, -n//2 + n)
     a = 2 * np.pi * f / RATE * x
-    y = np.exp(-WL_GAUSS_PARAM * a**2 + 1j * a)
+    y = np.exp(-gauss_param * a**2 + 1j * a)
     return y
 
 
+def wavelet_transform(samples, frequencies, gauss_param=WL_GAUSS_PARAM):
+    """
+    abs of `signal.cwt(samples, my_wavelet, frequencies)`, as float32
+    (and centered - `cwt` is late by a sample-point for kernels of even
+    length): FFT convolution with the wavelets truncated where their
+    envelope falls below KERNEL_TOLERANCE
+    """
+    samples = np.asarray(samples, dtype=float)
+    n = len(samples)
+    a_max = np.sqrt(np.log(1 / KERNEL_TOLERANCE) / gauss_param)
+    half = int(np.ceil(a_max * RATE / (2 * np.pi * np.amin(frequencies))))
+    n_fft = fft.next_fast_len(n + 2 * half)
+    spectrum = fft.fft(samples, n_fft)
+
+    matrix = np.empty((len(frequencies), n), dtype=np.float32)
+    for i in range(0, len(frequencies), FREQUENCY_BLOCK):
+        block = frequencies[i:i + FREQUENCY_BLOCK]
+        kernels = np.conj(np.stack([
+            my_wavelet(2 * half + 1, f, gauss_param)[::-1] for f in block]))
+        output = fft.ifft(spectrum * fft.fft(kernels, n_fft), axis=1)
+        matrix[i:i + len(block)] = np.abs(output[:, half:half + n])
+    return matrix
+
+
+def cached_transform(samples, frequencies, gauss_param=WL_GAUSS_PARAM,
+                     directory=CACHE_DIRECTORY):
+    """
+    `wavelet_transform` stored in `directory`, by hash of the recording
+    and the parameters - memory mapped when found there
+    """
+    samples = np.ascontiguousarray(samples)
+    key = hashlib.sha1(samples.tobytes())
+    key.update(str(samples.dtype).encode())
+    key.update(np.asarray(frequencies, dtype=float).tobytes())
+    key.update(repr((gauss_param, KERNEL_TOLERANCE, RATE)).encode())
+    path = os.path.join(directory, f"{key.hexdigest()}.npy")
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+
+    matrix = wavelet_transform(samples, frequencies, gauss_param)
+    os.makedirs(directory, exist_ok=True)
+    # no half-written files for an interrupted run
+    with open(path + ".tmp", "wb") as f:
+        np.save(f, matrix)
+    os.replace(path + ".tmp", path)
+    return matrix
+
+
 def find_main_peak(matrix):
     # Find local maxima by comparing signal to its neighbors
     freq_window, time_window = 5, 30
@@ -120,14 +197,14 @@ def find_secondary_peaks(collapsed_signal, min_h, max_h, gap=30):
     return list(zip(peaks, props['prominences']))
 
 
-def process(samples):
+def process(samples, frequencies=FREQUENCIES, gauss_param=WL_GAUSS_PARAM,
+            show=True):
     # wavelet transform
-    plot(samples)
-    frequencies = np.geomspace(700, 7000, 500)
-    cwt_matrix = signal.cwt(
-        samples, my_wavelet, frequencies)
-    cwt_matrix = np.abs(cwt_matrix)
-    plot_2d(cwt_matrix, y_annotations=frequencies)
+    if show:
+        plot(samples)
+    cwt_matrix = cached_transform(samples, frequencies, gauss_param)
+    if show:
+        plot_2d(cwt_matrix, y_annotations=frequencies)
 
     # find main pulse
     freq_index, offset = find_main_peak(cwt_matrix)
@@ -139,7 +216,8 @@ def process(samples):
 
     # cut out stripe around main freq
     cwt_stripe = cwt_matrix[freq_low:freq_high, :]
-    plot_2d(cwt_stripe)
+    if show:
+        plot_2d(cwt_stripe)
 
     # get background noise level
     noise = np.median(cwt_stripe)
@@ -147,7 +225,8 @@ def process(samples):
 
     # squeeze signal along freq axis
     signal_1d = np.sum(cwt_stripe, axis=0)
-    plot(signal_1d)
+    if show:
+        plot(signal_1d)
 
     # finding peaks
     peaks = find_secondary_peaks(
@@ -211,11 +290,19 @@ main pulse signal-to-noise ratio: {
 
 def main():
     samples = load_recording(RECORDING_FILENAME)
-    frequencies = np.geomspace(700, 7000, 500) 
     results = process(samples)
     format_results(results)
 
 
+def sweep(gauss_params=(0.0001, 0.0004, 0.0016), frequencies=FREQUENCIES):
+    # without plots - every transform is cached for the next run
+    samples = load_recording(RECORDING_FILENAME)
+    for gauss_param in gauss_params:
+        print("WL_GAUSS_PARAM =", gauss_param)
+        results = process(samples, frequencies, gauss_param, show=False)
+        format_results(results)
+
+
 def test():
     pass
     #plot(np.real(my_wavelet(5000, 300)))
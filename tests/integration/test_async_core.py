@@ -0,0 +1,47 @@
+
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+from modules.abstract.abstract_display import AbstractDisplay
+from modules.async_core import AsyncController
+from modules.concrete.fake_pyaudio import FakePyAudio
+from modules.concrete.pc_sound import SOUND_SPEED, PcFactory
+
+
+class TestAsyncControllerIntegration(unittest.TestCase):
+    """
+    test cases include:
+    - test sonars driven by one event loop
+    - test sonars driven by one event loop, without warm-ups
+    """
+    def test_gathered(self):
+        self._check_gathered(warm_up=True)
+
+    def test_gathered_cold(self):
+        # the first processing of both runs on the executor at once
+        self._check_gathered(warm_up=False)
+
+    def _check_gathered(self, warm_up):
+        displays = [MagicMock(spec=AbstractDisplay) for _ in range(2)]
+        controllers = [
+            AsyncController(PcFactory({"pyaudio": FakePyAudio(
+                echoes=[(0.006, 0.15)], noise=0.001, seed=seed)}), display,
+                warm_up=warm_up)
+            for seed, display in enumerate(displays)]
+
+        async def run():
+            await asyncio.gather(*(c.loop(limit=2) for c in controllers))
+        asyncio.run(run())
+
+        expected = 0.006 * SOUND_SPEED / 2
+        for display in displays:
+            self.assertEqual(display.print.call_count, 2)
+            for (result,), _ in display.print.call_args_list:
+                self.assertIsNone(result.error)
+                distance, _ = result.peaks[0]
+                self.assertAlmostEqual(distance, expected, delta=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from modules.concrete.binary_log import (
+    NO_ERROR, BinaryLogDisplay, error_code, read_log)
+from modules.concrete.pc_sound import ProcessorNoPeaksDetectedError
+from modules.core import Result
+
+
+class TestBinaryLogIntegration(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        results = [Result(peaks=[(0.01 * i, 10. + i), (2., 5.)],
+                          noise=0.5 * i, snr=float(i)) for i in range(100)]
+        results.append(Result.from_error(
+            ProcessorNoPeaksDetectedError("nothing found")))
+
+        with BinaryLogDisplay({"path": self.path, "flush_every": 16}) \
+                as display:
+            for result in results:
+                display.print(result)
+
+        log = read_log(self.path)
+        self.assertIsInstance(log, np.memmap)
+        self.assertEqual(len(log), 101)
+        self.assertTrue(np.all(np.diff(log["timestamp_ns"]) >= 0))
+        np.testing.assert_array_equal(log["snr"][:100], np.arange(100))
+        np.testing.assert_allclose(
+            log["distance"][:100, 0], 0.01 * np.arange(100), rtol=1e-6)
+        np.testing.assert_array_equal(log["intensity"][:100, 1], 5.)
+        np.testing.assert_array_equal(log["error_code"][:100], NO_ERROR)
+        self.assertEqual(log["error_code"][100], error_code(results[100].error))
+        self.assertEqual(log["n_peaks"][100], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+
+import unittest
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from modules.abstract.abstract_display import AbstractDisplay
+from modules.concrete.calibration import calibrate
+from modules.concrete.fake_pyaudio import FakePyAudio
+from modules.concrete.pc_sound import SOUND_SPEED, PcArrayFactory, PcFactory
+from modules.concrete.pc_sound import (
+    PcMultiChannelFactory, PcTrackingFactory)
+from modules.concrete.scheduler import PcAdaptiveScheduler
+from modules.core import Controller, Measurer
+
+
+class TestFakeSoundCard(unittest.TestCase):
+    """
+    test cases include:
+    - test virtual clock measurements are reproducible
+    - test controller detects routed echo
+    - test array of receivers on one device
+    - test multi-channel device
+    - test adaptive scheduler
+    - test calibrated recording window
+    - test echo tracked
+    """
+    def test_reproducible(self):
+        pa = FakePyAudio(echoes=[(0.006, 0.15)])
+        factory = PcFactory({"pyaudio": pa})
+        measurer = Measurer(factory)
+        measurer.check()
+        first = measurer.single_measurement().to_values()
+        second = measurer.single_measurement().to_values()
+        self.assertGreater(np.amax(first), 0.5)
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(pa.stats["underruns"], 0)
+        self.assertEqual(pa.stats["overflows"], 0)
+
+    def test_echo_detected(self):
+        pa = FakePyAudio(echoes=[(0.006, 0.15)], noise=0.001, seed=0)
+        display = MagicMock(spec=AbstractDisplay)
+        controller = Controller(PcFactory({"pyaudio": pa}), display)
+        controller.loop(limit=2)
+
+        expected = 0.006 * SOUND_SPEED / 2
+        for (result,), _ in display.print.call_args_list:
+            self.assertIsNone(result.error)
+            distance, _ = result.peaks[0]
+            self.assertAlmostEqual(distance, expected, delta=0.05)
+
+    def test_array(self):
+        pa = FakePyAudio(echoes=[(0.006, 0.15)], noise=0.001, seed=0)
+        factory = PcArrayFactory({"pyaudio": pa, "input_devices": [0, 0, 0]})
+        display = MagicMock(spec=AbstractDisplay)
+        controller = Controller(factory, display, array=True)
+        controller.loop(limit=2)
+
+        samples = controller.history.get_last()
+        self.assertEqual(len(samples), 3)
+        (result,), _ = display.print.call_args
+        self.assertIsNone(result.error)
+        # receivers share the "air" - no differences of arrival
+        np.testing.assert_allclose(result.metadata["tdoa_s"], 0, atol=1e-5)
+        self.assertEqual(len(result.metadata["echo_tdoa_s"]),
+                         len(result.peaks))
+
+    def test_multi_channel(self):
+        pa = FakePyAudio(echoes=[(0.006, 0.15)], noise=0.001, seed=0)
+        factory = PcMultiChannelFactory({"pyaudio": pa, "channels": 2})
+        display = MagicMock(spec=AbstractDisplay)
+        controller = Controller(factory, display)
+        controller.loop(limit=2)
+
+        self.assertEqual(controller.history.get_last().n_channels, 2)
+        (result,), _ = display.print.call_args
+        self.assertIsNone(result.error)
+        expected = 0.006 * SOUND_SPEED / 2
+        self.assertAlmostEqual(result.peaks[0][0], expected, delta=0.05)
+        for channel in result.metadata["channels"]:
+            self.assertIsNone(channel["error"])
+            self.assertAlmostEqual(
+                channel["peaks"][0]["distance"], expected, delta=0.05)
+
+    def test_scheduled(self):
+        pa = FakePyAudio(echoes=[(0.006, 0.15)], noise=0.001, seed=0)
+        display = MagicMock(spec=AbstractDisplay)
+        scheduler = PcAdaptiveScheduler({"explore_every": 100})
+        controller = Controller(
+            PcFactory({"pyaudio": pa}), display, scheduler=scheduler)
+        controller.loop(limit=6)
+
+        for (result,), _ in display.print.call_args_list:
+            self.assertIsNone(result.error)
+        # quieter pulses and recordings cut to the short range
+        self.assertLess(scheduler.volume, 1.)
+        first, last = controller.history.history[0], \
+            controller.history.get_last()
+        self.assertLess(len(last), len(first) / 2)
+        self.assertEqual(scheduler.interval_s, 0.)
+        self.assertGreater(scheduler.updates_per_s(), 0.)
+
+    def test_calibrated(self):
+        pa = FakePyAudio(echoes=[(0.006, 0.15)], noise=0.001, seed=0)
+        # (the driver is terminated with the factory)
+        uncalibrated = PcFactory({"pyaudio": pa})
+        measurer = Measurer(uncalibrated)
+        calibration = calibrate(measurer)
+        # the virtual clock does not wait for the play delay
+        self.assertLess(calibration["latency_s"], 0.)
+        self.assertAlmostEqual(calibration["jitter_s"], 0.)
+
+        full = measurer.single_measurement()
+        factory = PcFactory({"pyaudio": pa, "calibration": calibration})
+        display = MagicMock(spec=AbstractDisplay)
+        controller = Controller(factory, display)
+        controller.loop(limit=2)
+
+        self.assertLess(len(controller.history.get_last()), len(full))
+        (result,), _ = display.print.call_args
+        self.assertIsNone(result.error)
+        expected = 0.006 * SOUND_SPEED / 2
+        self.assertAlmostEqual(result.peaks[0][0], expected, delta=0.05)
+
+    def test_tracking(self):
+        pa = FakePyAudio(echoes=[(0.006, 0.15)], noise=0.001, seed=0)
+        display = MagicMock(spec=AbstractDisplay)
+        controller = Controller(PcTrackingFactory({"pyaudio": pa}), display)
+        controller.loop(limit=4)
+
+        expected = 0.006 * SOUND_SPEED / 2
+        searches = []
+        for (result,), _ in display.print.call_args_list:
+            self.assertIsNone(result.error)
+            searches.append(result.metadata["search"])
+            distance, _ = result.peaks[0]
+            self.assertAlmostEqual(distance, expected, delta=0.05)
+        # confirmed by the second ping
+        self.assertEqual(searches, 2 * ["full"] + 2 * ["tracked"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,16 @@
 
+import time
 import unittest
 from unittest.mock import ANY, call, MagicMock, patch
 
-from modules.concrete.http_caller import HttpEmitter, HttpFactory, HttpReceiver
-from modules.concrete.pc_sound import PcProcessor, PcSample
+import numpy as np
+
+from modules.abstract.abstract_display import AbstractDisplay
+from modules.concrete.http_caller import (
+    HttpArrayFactory, HttpEmitter, HttpFactory, HttpReceiver)
+from modules.concrete.pc_sound import (
+    PcArrayProcessor, PcProcessor, PcSample)
+from modules.core import Controller, Result
 from modules.microservice.core.config import SETTINGS
 
 
@@ -26,10 +33,10 @@ class TestHttpEmitter(unittest.TestCase):
         mock_requests.get.assert_called_once_with(expected_url)
 
     @patch('modules.concrete.http_caller.requests')
-    @patch('modules.concrete.http_caller.get_timestamp')
+    @patch('modules.concrete.http_caller.get_timestamp_ns')
     def test_beep(self, mock_timestamp, mock_requests):
         # arrange
-        fake_timestamp = "2023-10-10T10:10:10.000000000"
+        fake_timestamp = 1696925410000000000
         mock_timestamp.return_value = fake_timestamp
         mock_response = MagicMock()
         mock_response.ok = True
@@ -53,12 +60,12 @@ class TestHttpReceiver(unittest.TestCase):
                          f":{SETTINGS.RECEIVER.PORT}")
 
     @patch('modules.concrete.http_caller.PcSample')
-    @patch('modules.concrete.http_caller.get_timestamp')
+    @patch('modules.concrete.http_caller.get_timestamp_ns')
     @patch('modules.concrete.http_caller.requests')
     def test_record_signal(self, mock_requests,
                            mock_timestamp, mock_sample_cls):
         # arrange
-        fake_timestamp = "2024-01-01T12:00:00.000000000"
+        fake_timestamp = 1704106800000000000
         mock_timestamp.return_value = fake_timestamp
         mock_sample = MagicMock()
         mock_sample_cls.from_data.return_value = mock_sample
@@ -86,27 +93,42 @@ class TestHttpReceiver(unittest.TestCase):
         mock_timestamp.assert_called_once_with(0.05)
 
 
-class TestHttpFactory(unittest.TestCase):
-    @patch('modules.concrete.http_caller.LATENCY_MARGIN_S', 0.05)
-    @patch('modules.concrete.http_caller.get_timestamp')
-    @patch('modules.concrete.http_caller.requests')
-    def test_creations(self, mock_requests, mock_timestamp):
-        # arrange
-        mock_latency_measurements = [
-            0.5, 0.6, 0.1, 0.12, 0.08, 0.09, 0.11, 0.10]
-        mock_responses = []
-
-        for latency_i in mock_latency_measurements:
+def _make_sync_responses(offsets_s, n_rounds, forward_s=0.010):
+    """
+    simulate clock exchanges, returns mocked responses and the local
+    timestamps (t1, t4) to be returned by `time.time_ns`
+    """
+    responses = []
+    local_ns = []
+    t1 = 1_000_000_000_000
+    for _ in range(n_rounds):
+        for offset_s in offsets_s:
+            t2 = t1 + int((forward_s + offset_s) * 1e9)
+            t3 = t2 + 1_000_000
+            t4 = t3 + int((forward_s - offset_s) * 1e9)
             m = MagicMock()
             m.ok = True
-            m.json.return_value = {"latency_s": latency_i}
-            mock_responses.append(m)
+            m.json.return_value = {
+                "origin_ns": t1, "receive_ns": t2, "transmit_ns": t3}
+            responses.append(m)
+            local_ns += [t1, t4]
+            t1 = t4 + 100_000_000
+    return responses, local_ns
+
 
+class TestHttpFactory(unittest.TestCase):
+    @patch('modules.concrete.http_caller.SYNC_WARM_UP_ROUNDS', 1)
+    @patch('modules.concrete.http_caller.time')
+    @patch('modules.concrete.http_caller.requests')
+    def test_creations(self, mock_requests, mock_time):
+        # arrange
+        mock_responses, local_ns = _make_sync_responses(
+            offsets_s=[0.5, -0.25], n_rounds=5)
         mock_requests.get.side_effect = mock_responses
-        mock_timestamp.return_value = "mock_timestamp"
+        mock_time.time_ns.side_effect = local_ns + [local_ns[-1]]
 
         # act
-        factory = HttpFactory({})
+        factory = HttpFactory({"sync_interval_s": None})
         emitter = factory.create_emitter()
         receiver = factory.create_receiver()
         processor = factory.create_processor()
@@ -116,11 +138,121 @@ class TestHttpFactory(unittest.TestCase):
         self.assertIsInstance(receiver, HttpReceiver)
         self.assertIsInstance(processor, PcProcessor)
 
-        expected_latency = 1.1 * 0.12 + 0.05
-        self.assertAlmostEqual(factory.config["latency_s"], expected_latency)
-        self.assertEqual(mock_requests.get.call_count, 8)
-        self.assertEqual(emitter.delay, expected_latency)
-        self.assertEqual(receiver.delay, expected_latency)
+        time_sync = factory.config["time_sync"]
+        self.assertEqual(mock_requests.get.call_count, 10)
+        self.assertAlmostEqual(
+            time_sync.offset_s(emitter.base_url, local_ns[-1]), 0.5)
+        self.assertAlmostEqual(
+            time_sync.offset_s(receiver.base_url, local_ns[-1]), -0.25)
+        self.assertAlmostEqual(
+            factory.config["latency_s"], 0.010 + 0.002, places=6)
+        self.assertEqual(emitter.delay, factory.config["latency_s"])
+        self.assertEqual(receiver.delay, factory.config["latency_s"])
+        self.assertIs(emitter.time_sync, time_sync)
+        self.assertIs(receiver.time_sync, time_sync)
+
+    @patch('modules.concrete.http_caller.SYNC_WARM_UP_ROUNDS', 1)
+    @patch('modules.concrete.http_caller.time')
+    @patch('modules.concrete.http_caller.requests')
+    def test_array_of_receivers(self, mock_requests, mock_time):
+        # arrange
+        urls = ["http://10.0.0.2:8002", "http://10.0.0.3:8002"]
+        mock_responses, local_ns = _make_sync_responses(
+            offsets_s=[0.5, -0.25, 0.125], n_rounds=5)
+        mock_requests.get.side_effect = mock_responses
+        mock_time.time_ns.side_effect = local_ns + [local_ns[-1]]
+
+        # act
+        factory = HttpArrayFactory(
+            {"sync_interval_s": None, "receiver_urls": urls})
+        receivers = factory.create_receivers()
+        processor = factory.create_processor()
+
+        # assert
+        self.assertListEqual([r.base_url for r in receivers], urls)
+        self.assertIsInstance(processor, PcArrayProcessor)
+        time_sync = factory.config["time_sync"]
+        for receiver, offset_s in zip(receivers, [-0.25, 0.125]):
+            self.assertIs(receiver.time_sync, time_sync)
+            self.assertAlmostEqual(
+                time_sync.offset_s(receiver.base_url, local_ns[-1]),
+                offset_s)
+
+    @patch('modules.concrete.http_caller.SYNC_WARM_UP_ROUNDS', 1)
+    @patch('modules.concrete.http_caller.requests')
+    def test_single_receiver_of_many(self, mock_requests):
+        # arrange
+        urls = ["http://10.0.0.2:8002", "http://10.0.0.3:8002"]
+        mock_responses, _ = _make_sync_responses(
+            offsets_s=[0.5, -0.25, 0.125], n_rounds=5)
+        mock_requests.get.side_effect = mock_responses
+        factory = HttpFactory(
+            {"sync_interval_s": None, "receiver_urls": urls})
+
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.content = PcSample.from_values(
+            np.zeros(1024)).to_data()
+        mock_requests.get.side_effect = None
+        mock_requests.get.return_value = mock_response
+        display = MagicMock(spec=AbstractDisplay)
+
+        # act
+        controller = Controller(factory, display, warm_up=False)
+        controller.loop(limit=1)
+
+        # assert
+        self.assertIsInstance(controller.processor, PcProcessor)
+        self.assertNotIsInstance(controller.processor, PcArrayProcessor)
+        mock_requests.get.assert_any_call(urls[0] + "/record", json=ANY)
+        (result,), _ = display.print.call_args
+        self.assertIsInstance(result, Result)
+
+    @patch('modules.concrete.http_caller.time')
+    @patch('modules.concrete.http_caller.get_timestamp_ns')
+    @patch('modules.concrete.http_caller.requests')
+    def test_schedule_in_remote_clock(self, mock_requests, mock_timestamp,
+                                      mock_time):
+        # arrange
+        mock_responses, local_ns = _make_sync_responses(
+            offsets_s=[0.5, -0.25], n_rounds=5)
+        mock_requests.get.side_effect = mock_responses
+        mock_time.time_ns.side_effect = local_ns + 3 * [local_ns[-1]]
+        factory = HttpFactory({"sync_interval_s": None})
+        emitter = factory.create_emitter()
+        receiver = factory.create_receiver()
+
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.content = b""
+        mock_requests.get.side_effect = None
+        mock_requests.get.return_value = mock_response
+
+        # act
+        emitter.emit_beep()
+        receiver.record_signal()
+
+        # assert
+        (emitter_delay,), _ = mock_timestamp.call_args_list[0]
+        (receiver_delay,), _ = mock_timestamp.call_args_list[1]
+        self.assertAlmostEqual(emitter_delay - receiver_delay, 0.75, places=3)
+
+    @patch('modules.concrete.http_caller.requests')
+    def test_background_sync(self, mock_requests):
+        # arrange
+        mock_responses, _ = _make_sync_responses(
+            offsets_s=[0.1, 0.2], n_rounds=100)
+        mock_requests.get.side_effect = mock_responses
+
+        # act
+        factory = HttpFactory({"sync_interval_s": 0.01})
+        time_sync = factory.config["time_sync"]
+        time.sleep(0.1)
+        time_sync.stop()
+
+        # assert
+        self.assertGreater(mock_requests.get.call_count, 10)
+        self.assertIsNone(time_sync._thread)
 
 
 class TestHttpModule(unittest.TestCase):
@@ -129,8 +261,8 @@ class TestHttpModule(unittest.TestCase):
                        f":{SETTINGS.EMITTER.PORT}")
         receiver_url = (f"http://{SETTINGS.RECEIVER.HOST}"
                         f":{SETTINGS.RECEIVER.PORT}")
-        self.emitter_latency = emitter_url + "/latency"
-        self.receiver_latency = receiver_url + "/latency"
+        self.emitter_sync = emitter_url + "/sync"
+        self.receiver_sync = receiver_url + "/sync"
         self.emitter_health = emitter_url + "/health"
         self.receiver_health = receiver_url + "/health"
         self.emitter_play = emitter_url + "/play"
@@ -143,12 +275,8 @@ class TestHttpModule(unittest.TestCase):
             b"\x04\x00\x08\x00\t\x00\x14\x00\x06\x00\xff\xff\xf5"
             b"\xff\xfc\xff\xf7\xff\xf8\xff\xf2\xff\x05\x00\x00\x00"
         )
-        mock_responses = []
-        for _ in range(8):
-            m = MagicMock()
-            m.ok = True
-            m.json.return_value = {"latency_s": 0.1}
-            mock_responses.append(m)
+        mock_responses, _ = _make_sync_responses(
+            offsets_s=[0.0, 0.0], n_rounds=5)
         for _ in range(2):
             m = MagicMock()
             m.ok = True
@@ -167,7 +295,7 @@ class TestHttpModule(unittest.TestCase):
         mock_requests.get.side_effect = mock_responses
 
         # act
-        factory = HttpFactory({})
+        factory = HttpFactory({"sync_interval_s": None})
         emitter = factory.create_emitter()
         receiver = factory.create_receiver()
         processor = factory.create_processor()
@@ -185,9 +313,9 @@ class TestHttpModule(unittest.TestCase):
         self.assertIsInstance(sample, PcSample)
         self.assertEqual(fake_sound_data, sample.to_data())
 
-        calibration_calls = 4 * [
-            call(self.emitter_latency, json={"trigger_timestamp": ANY}),
-            call(self.receiver_latency, json={"trigger_timestamp": ANY}),
+        calibration_calls = 5 * [
+            call(self.emitter_sync, json={"origin_ns": ANY}),
+            call(self.receiver_sync, json={"origin_ns": ANY}),
         ]
         action_calls = [
             call(self.emitter_health),
@@ -7,7 +7,11 @@ import numpy as np
 
 import modules.concrete.pc_sound as pcs
 from modules.concrete.pc_sound import (
-    PcEmitter, PcFactory, PcProcessor, PcReceiver, PcSample, _Series, _Stripe)
+    PcEmitter, PcFactory, PcProcessor, PcReceiver, PcSample, _Stripe)
+from modules.concrete.pc_sound import (
+    PcChirpEmitter, PcChirpProcessor, PcStackingProcessor,
+    PcStreamingProcessor, PcStreamingReceiver)
+from modules.concrete.pc_sound import PcArrayProcessor
 from modules.concrete.pc_sound import (
     ProcessorEmptyDataError,
     ProcessorNoisyDataError,
@@ -16,6 +20,7 @@ from modules.concrete.pc_sound import (
     ProcessorWrongFrequencyError
 )
 from modules.core import Result
+from modules.instrumentation import StageTimer
 
 
 class TestPcSample(unittest.TestCase):
@@ -91,6 +96,9 @@ class TestPcProcessor(unittest.TestCase):
     test cases include:
     - test all errors
     - test happy path
+    - test stage timings
+    - test stage timings of an error
+    - test stage timings of the subclasses
     """
     def setUp(self):
         n = 20000
@@ -159,6 +167,354 @@ class TestPcProcessor(unittest.TestCase):
         result = proc.process(sample)
         self.assertIsInstance(result, Result)
         self.assertIsNone(result.error)
+        self.assertNotIn("timings_ms", result.metadata)
+
+    def test_process_timed(self):
+        shifted = np.roll(self.pulse_values, 500)
+        values = 0.8 * self.pulse_values + 0.1 * shifted
+        timer = StageTimer(attach=True)
+
+        proc = PcProcessor({"timer": timer})
+        result = proc.process(PcSample.from_values(values))
+        proc.process(PcSample.from_values(values[:100]))
+
+        self.assertIsNone(result.error)
+        self.assertListEqual(sorted(result.metadata["timings_ms"]),
+                             ["offset", "peaks", "transform", "validate"])
+        stats = timer.stats()
+        self.assertEqual(stats["validate"]["count"], 2)
+        self.assertEqual(stats["transform"]["count"], 1)
+
+    def test_error_timed(self):
+        shifted = np.roll(self.pulse_values, 500)
+        values = 0.8 * self.pulse_values + 0.1 * shifted
+        timer = StageTimer(attach=True)
+
+        proc = PcProcessor({"timer": timer})
+        proc.process(PcSample.from_values(values))
+        result = proc.process(PcSample.from_values([]))
+
+        self.assertIn(ProcessorEmptyDataError.__name__, result.error)
+        # not the stages of the earlier sample
+        self.assertListEqual(list(result.metadata["timings_ms"]),
+                             ["validate"])
+        self.assertListEqual(list(timer.last()), ["validate"])
+
+    def test_subclasses_timed(self):
+        for processor_class in [PcStackingProcessor, PcChirpProcessor,
+                                PcStreamingProcessor]:
+            timer = StageTimer(attach=True)
+            proc = processor_class({"timer": timer})
+            result = proc.process(proc._make_warm_up_sample())
+            self.assertIsNone(result.error, processor_class.__name__)
+            self.assertListEqual(
+                sorted(result.metadata["timings_ms"]),
+                ["offset", "peaks", "transform", "validate"])
+
+
+class TestPcStackingProcessor(unittest.TestCase):
+    """
+    test cases include:
+    - test weak echo found only after coherent stacking
+    - test incoherent stacking
+    """
+    def setUp(self):
+        n = 20000
+        self.rng = np.random.default_rng(0)
+        self.pulse_values = np.real(
+            _Stripe._my_wavelet(n, pcs.CARRIER_FREQUENCY))
+        self.echo_delay = 800
+        self.distance = self.echo_delay / pcs.RATE * pcs.SOUND_SPEED / 2
+
+    def _make_sample(self, echo):
+        shift = int(self.rng.integers(-300, 300))
+        values = 0.8 * np.roll(self.pulse_values, shift) \
+                 + echo * np.roll(self.pulse_values, shift + self.echo_delay) \
+                 + 0.25 * self.rng.standard_normal(len(self.pulse_values))
+        return PcSample.from_values(values)
+
+    def _found_echo(self, result):
+        return result.error is None and any(
+            abs(distance - self.distance) < 0.05
+            for distance, _ in result.peaks)
+
+    def test_coherent(self):
+        proc = PcProcessor({})
+        stacking_proc = PcStackingProcessor({"depth": 8})
+        for _ in range(8):
+            sample = self._make_sample(echo=0.15)
+            single = proc.process(sample)
+            stacked = stacking_proc.process(sample)
+        self.assertFalse(self._found_echo(single))
+        self.assertTrue(self._found_echo(stacked))
+        self.assertEqual(stacked.metadata["stack_depth"], 8)
+        self.assertGreater(stacked.snr, 2 * single.snr)
+
+    def test_incoherent(self):
+        stacking_proc = PcStackingProcessor({"depth": 4, "coherent": False})
+        for _ in range(4):
+            result = stacking_proc.process(self._make_sample(echo=0.2))
+        self.assertIsInstance(result, Result)
+        self.assertEqual(result.metadata["stack_depth"], 4)
+        self.assertGreater(result.snr, pcs.SNR_THRESHOLD)
+
+
+class TestPcChirpProcessor(unittest.TestCase):
+    """
+    test cases include:
+    - test two close echoes resolved
+    - test no sidelobes reported as echoes
+    - test noise
+    """
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+        self.n = 22050
+        self.start = 3000
+
+    def _make_sample(self, method, delays, noise=0.05):
+        emitter = PcChirpEmitter({"pyaudio": MagicMock(), "chirp": method})
+        beep = emitter._make_beep_sample().to_values()
+        values = np.zeros(self.n)
+        values[self.start:self.start + len(beep)] += 0.6 * beep
+        for delay in delays:
+            start = self.start + delay
+            values[start:start + len(beep)] += 0.08 * beep
+        values += noise * self.rng.standard_normal(self.n)
+        return PcSample.from_values(values)
+
+    def test_close_echoes(self):
+        delays = [700, 730]
+        expected = [d / pcs.RATE * pcs.SOUND_SPEED / 2 for d in delays]
+        sample = self._make_sample("linear", delays)
+        result = PcChirpProcessor({}).process(sample)
+        self.assertIsNone(result.error)
+        distances = [distance for distance, _ in result.peaks]
+        np.testing.assert_allclose(distances, expected, atol=0.02)
+
+    def test_hyperbolic(self):
+        sample = self._make_sample("hyperbolic", [1500])
+        result = PcChirpProcessor({"chirp": "hyperbolic"}).process(sample)
+        self.assertIsNone(result.error)
+        self.assertAlmostEqual(
+            result.peaks[0][0], 1500 / pcs.RATE * pcs.SOUND_SPEED / 2,
+            delta=0.02)
+
+    def test_no_echoes(self):
+        for method in ["linear", "hyperbolic"]:
+            sample = self._make_sample(method, [], noise=0.002)
+            result = PcChirpProcessor({"chirp": method}).process(sample)
+            self.assertIn(
+                ProcessorNoPeaksDetectedError.__name__, result.error)
+
+    @patch("modules.concrete.pc_sound.SNR_THRESHOLD", 1000)
+    def test_noise(self):
+        result = PcChirpProcessor({}).process(
+            self._make_sample("linear", [700]))
+        self.assertIn(ProcessorNoisyDataError.__name__, result.error)
+
+
+class TestPcStreamingProcessor(unittest.TestCase):
+    """
+    test cases include:
+    - test same result as batch processor
+    - test peaks reported incrementally while recording
+    """
+    def setUp(self):
+        n = 22050
+        rng = np.random.default_rng(1)
+        pulse = np.real(_Stripe._my_wavelet(n, pcs.CARRIER_FREQUENCY))
+        values = 0.8 * np.roll(pulse, -6000) \
+                 + 0.1 * np.roll(pulse, -5200) \
+                 + 0.08 * np.roll(pulse, -3000) \
+                 + 0.01 * rng.standard_normal(n)
+        self.sample = PcSample.from_values(values)
+
+    def test_same_as_batch(self):
+        expected = PcProcessor({}).process(self.sample)
+        result = PcStreamingProcessor({}).process(self.sample)
+        self.assertIsNone(result.error)
+        self.assertEqual(len(result.peaks), len(expected.peaks))
+        for peak, expected_peak in zip(result.peaks, expected.peaks):
+            self.assertAlmostEqual(peak[0], expected_peak[0])
+            # truncated kernels - equal up to KERNEL_TOLERANCE
+            self.assertAlmostEqual(peak[1] / expected_peak[1], 1., places=5)
+        self.assertAlmostEqual(result.snr / expected.snr, 1., places=5)
+        self.assertEqual(result.metadata, expected.metadata)
+
+    def test_incremental_peaks(self):
+        reports = []
+        chunks = self.sample.to_chunks()
+        mock_pa = MagicMock()
+        mock_pa.open.return_value.read.side_effect = chunks
+        proc = PcStreamingProcessor(
+            {"on_peaks": lambda peaks: reports.append(
+                (len(chunks) - mock_pa.open.return_value.read.call_count,
+                 peaks))})
+        receiver = PcStreamingReceiver(
+            {"pyaudio": mock_pa, "processor": proc})
+
+        with patch("modules.concrete.pc_sound.RECORDING_MARGIN_SECONDS",
+                   len(self.sample) / pcs.RATE - 0.2):
+            sample = receiver.record_signal()
+        result = proc.process(sample)
+
+        self.assertEqual(len(reports), 2)
+        # both echoes reported before the recording ended
+        chunks_left, first = reports[0]
+        self.assertGreater(chunks_left, 0)
+        self.assertAlmostEqual(first[0][0], result.peaks[0][0])
+        _, second = reports[1]
+        self.assertAlmostEqual(second[0][0], result.peaks[1][0])
+
+
+class TestPcArrayProcessor(unittest.TestCase):
+    """
+    test cases include:
+    - test differences of arrival of the pulse and of the echo
+    - test same peaks as the single processor
+    - test noisy reference
+    """
+    def setUp(self):
+        n = 22050
+        self.rng = np.random.default_rng(2)
+        self.pulse = np.real(_Stripe._my_wavelet(n, pcs.CARRIER_FREQUENCY))
+
+    def _make_sample(self, pulse_shift, echo_shift, noise=0.01):
+        values = 0.8 * np.roll(self.pulse, -6000 + pulse_shift) \
+                 + 0.1 * np.roll(self.pulse, -5200 + echo_shift) \
+                 + noise * self.rng.standard_normal(len(self.pulse))
+        return PcSample.from_values(values)
+
+    def test_tdoa(self):
+        shifts = [(0, 0), (20, -35), (-7, 12)]
+        samples = [self._make_sample(*shift, noise=0.002) for shift in shifts]
+        result = PcArrayProcessor({}).process(samples)
+
+        self.assertIsNone(result.error)
+        pulse_shifts, echo_shifts = np.array(shifts).T
+        np.testing.assert_allclose(
+            np.array(result.metadata["tdoa_s"]) * pcs.RATE,
+            pulse_shifts, atol=0.5)
+        (echo_tdoa_s,) = result.metadata["echo_tdoa_s"]
+        np.testing.assert_allclose(
+            np.array(echo_tdoa_s) * pcs.RATE, echo_shifts, atol=1.5)
+
+    def test_same_peaks(self):
+        sample = self._make_sample(0, 0)
+        expected = PcProcessor({}).process(sample)
+        result = PcArrayProcessor({}).process([sample, sample])
+        self.assertEqual(len(result.peaks), len(expected.peaks))
+        for (distance, _), (expected_distance, _) in zip(
+                result.peaks, expected.peaks):
+            self.assertAlmostEqual(distance, expected_distance, delta=0.01)
+        np.testing.assert_array_equal(result.metadata["tdoa_s"], [0, 0])
+
+    def test_noisy(self):
+        samples = [self._make_sample(0, 0, noise=.2), self._make_sample(0, 0)]
+        result = PcArrayProcessor({}).process(samples)
+        self.assertIsNotNone(result.error)
+        self.assertEqual(len(result.metadata["tdoa_s"]), 2)
+
+
+class TestFloat32Processing(unittest.TestCase):
+    """
+    test cases include:
+    - test float32 results match float64 for every processor
+    """
+    def test_results_match(self):
+        n = 22050
+        rng = np.random.default_rng(2)
+        pulse = np.real(_Stripe._my_wavelet(n, pcs.CARRIER_FREQUENCY))
+        values = 0.8 * np.roll(pulse, -6000) \
+                 + 0.1 * np.roll(pulse, -5200) \
+                 + 0.01 * rng.standard_normal(n)
+        sample = PcSample.from_values(values)
+
+        for cls in [PcProcessor, PcStackingProcessor, PcStreamingProcessor]:
+            with self.subTest(processor=cls.__name__):
+                expected = cls({}).process(sample)
+                result = cls({"dtype": "float32"}).process(sample)
+                self.assertIsNone(result.error)
+                self.assertEqual(len(result.peaks), len(expected.peaks))
+                for peak, expected_peak in zip(result.peaks, expected.peaks):
+                    self.assertAlmostEqual(peak[0], expected_peak[0])
+                    self.assertAlmostEqual(
+                        peak[1] / expected_peak[1], 1., places=4)
+                self.assertAlmostEqual(
+                    result.snr / expected.snr, 1., places=4)
+
+
+class TestRangeGate(unittest.TestCase):
+    """
+    test cases include:
+    - test gated results match the whole recording
+    - test echoes out of the gate dropped
+    """
+    def setUp(self):
+        n = 22050
+        rng = np.random.default_rng(3)
+        pulse = np.real(_Stripe._my_wavelet(n, pcs.CARRIER_FREQUENCY))
+        # echoes at ~1.6 m and ~4.7 m
+        values = 0.8 * np.roll(pulse, -6000) \
+                 + 0.1 * np.roll(pulse, -5600) \
+                 + 0.1 * np.roll(pulse, -4800) \
+                 + 0.01 * rng.standard_normal(n)
+        self.sample = PcSample.from_values(values)
+
+    def test_results_match(self):
+        for dtype in ["float64", "float32"]:
+            with self.subTest(dtype=dtype):
+                expected = PcProcessor({"dtype": dtype}).process(self.sample)
+                result = PcProcessor(
+                    {"dtype": dtype, "max_range": 6.}).process(self.sample)
+                self.assertIsNone(result.error)
+                self.assertEqual(len(result.peaks), 2)
+                for peak, expected_peak in zip(result.peaks, expected.peaks):
+                    self.assertAlmostEqual(peak[0], expected_peak[0])
+                    self.assertAlmostEqual(
+                        peak[1] / expected_peak[1], 1., delta=0.1)
+                self.assertAlmostEqual(
+                    result.snr / expected.snr, 1., delta=0.1)
+
+    def test_gate(self):
+        near = PcProcessor({"max_range": 3.}).process(self.sample)
+        far = PcProcessor({"min_range": 3.}).process(self.sample)
+        (near_peak,), (far_peak,) = near.peaks, far.peaks
+        self.assertAlmostEqual(near_peak[0], 1.56, delta=0.05)
+        self.assertAlmostEqual(far_peak[0], 4.67, delta=0.05)
+
+
+class TestWarmUp(unittest.TestCase):
+    """
+    test cases include:
+    - test synthetic recording is processed fine
+    - test warm up of every processor, state left clean
+    """
+    def test_warm_up_sample(self):
+        proc = PcProcessor({})
+        result = proc.process(proc._make_warm_up_sample())
+        self.assertIsNone(result.error)
+        self.assertTrue(any(
+            abs(distance - pcs.WARM_UP_ECHO_DISTANCE) < 0.05
+            for distance, _ in result.peaks))
+
+    def test_warm_up(self):
+        timer = StageTimer()
+        processors = [
+            PcProcessor({"timer": timer}),
+            PcProcessor({"dtype": "float32"}),
+            PcStackingProcessor({}),
+            PcChirpProcessor({}),
+            PcStreamingProcessor({}),
+        ]
+        for proc in processors:
+            timings = proc.warm_up()
+            self.assertListEqual(sorted(timings), ["cold_ms", "warm_ms"])
+            self.assertGreater(timings["cold_ms"], 0)
+        self.assertIs(processors[0].timer, timer)
+        self.assertDictEqual(timer.stats(), {})
+        self.assertListEqual(processors[2].history.history, [])
+        self.assertIsNone(processors[4]._sample)
 
 
 class TestPcFactory(unittest.TestCase):
@@ -0,0 +1,48 @@
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from modules.abstract.abstract_display import AbstractDisplay
+from modules.concrete.fake_pyaudio import FakePyAudio
+from modules.concrete.pc_sound import SOUND_SPEED, PcFactory
+from modules.concrete.replay import ReplayFactory, save_session
+from modules.core import Controller, Measurer
+
+
+class TestReplayIntegration(unittest.TestCase):
+    """
+    test cases include:
+    - test recorded session replayed by the controller
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "session.dat")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_record_replay(self):
+        pa = FakePyAudio(echoes=[(0.006, 0.15)], noise=0.001, seed=0)
+        factory = PcFactory({"pyaudio": pa})
+        measurer = Measurer(factory)
+        measurer.check()
+        samples = [measurer.single_measurement() for _ in range(3)]
+        save_session(samples, self.path)
+
+        display = MagicMock(spec=AbstractDisplay)
+        controller = Controller(ReplayFactory({
+            "path": self.path, "frames_per_ping": len(samples[0]),
+            "processor": "tracking"}), display)
+        controller.loop(limit=3)
+
+        expected = 0.006 * SOUND_SPEED / 2
+        self.assertEqual(display.print.call_count, 3)
+        for (result,), _ in display.print.call_args_list:
+            self.assertIsNone(result.error)
+            self.assertAlmostEqual(result.peaks[0][0], expected, delta=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
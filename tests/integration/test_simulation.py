@@ -0,0 +1,62 @@
+
+import unittest
+from unittest.mock import MagicMock
+
+from modules.abstract.abstract_display import AbstractDisplay
+from modules.concrete.pc_sound import PcTrackingProcessor
+from modules.concrete.simulation import SimFactory
+from modules.core import Controller
+
+
+class TestSimulatedSonar(unittest.TestCase):
+    """
+    test cases include:
+    - test echoes detected by controller loop
+    - test chirp mode resolves close echoes
+    - test chirp mode without echoes
+    - test echoes tracked on a noisy, reverberant scene
+    """
+    def _run(self, config, n_pings):
+        display = MagicMock(spec=AbstractDisplay)
+        controller = Controller(SimFactory(config), display)
+        controller.loop(limit=n_pings)
+        self.assertEqual(display.print.call_count, n_pings)
+        return [args[0] for args, _ in display.print.call_args_list]
+
+    def _assert_detected(self, result, distances, tolerance):
+        self.assertIsNone(result.error)
+        for distance in distances:
+            found = [p for p, _ in result.peaks
+                     if abs(p - distance) < tolerance]
+            self.assertTrue(found, f"{distance} m not in {result.peaks}")
+
+    def test_echoes_detected(self):
+        config = {"seed": 3, "echoes": [(1.0, 0.15), (2.5, 0.1)]}
+        for result in self._run(config, n_pings=3):
+            self._assert_detected(result, [1.0, 2.5], tolerance=0.05)
+
+    def test_chirp_close_echoes(self):
+        config = {"seed": 3, "chirp": "linear",
+                  "echoes": [(1.0, 0.15), (1.2, 0.15)]}
+        for result in self._run(config, n_pings=3):
+            self._assert_detected(result, [1.0, 1.2], tolerance=0.02)
+
+    def test_chirp_no_echoes(self):
+        config = {"seed": 3, "chirp": "linear", "echoes": [], "reverb": 0.}
+        for result in self._run(config, n_pings=3):
+            self.assertIn("ProcessorNoPeaksDetectedError", result.error)
+
+    def test_tracking(self):
+        # the default noise and reverb
+        receiver = SimFactory({"seed": 3}).create_receiver()
+        processor = PcTrackingProcessor({})
+        searches = []
+        for _ in range(30):
+            result = processor.process(receiver.record_signal())
+            searches.append(result.metadata["search"])
+            self._assert_detected(result, [1.0, 2.5], tolerance=0.05)
+        self.assertGreaterEqual(searches.count("tracked"), 24)
+
+
+if __name__ == '__main__':
+    unittest.main()
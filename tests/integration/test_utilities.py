@@ -2,10 +2,10 @@
 from datetime import datetime
 import time
 import unittest
-from unittest.mock import MagicMock, patch
 
 from modules.utilities import \
      get_timestamp, compute_latency, wait_till_time, _timestamp_to_ns, TIMESTAMP_FORMAT
+from modules.utilities import get_timestamp_ns, timestamp_to_ns
 
 
 class TestTimestamps(unittest.TestCase):
@@ -15,6 +15,8 @@ class TestTimestamps(unittest.TestCase):
     - test get latency after sleep
     - test wait 0.4 seconds
     - test wait -1.5 seconds
+    - test str and int forms agree
+    - test wait int timestamp
     """
     def setUp(self):
         self.delta = 0.05
@@ -61,6 +63,22 @@ class TestTimestamps(unittest.TestCase):
         elapsed = end - start
         self.assertLess(abs(elapsed), self.delta)
 
+    def test_str_and_int_agree(self):
+        ts_ns = get_timestamp_ns(latency_s=0.25)
+        ts_txt = get_timestamp(latency_s=0.25)
+        self.assertAlmostEqual(timestamp_to_ns(ts_txt) / 1e9, ts_ns / 1e9,
+                               delta=self.delta)
+
+    def test_wait_int_timestamp(self):
+        target_ns = get_timestamp_ns(latency_s=self.delay)
+
+        start = time.time()
+        wait_till_time(target_ns)
+        end = time.time()
+
+        elapsed = end - start
+        self.assertAlmostEqual(elapsed, self.delay, delta=self.delta)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,9 +1,8 @@
 
 import unittest
-from unittest.mock import MagicMock, patch
 
 from modules.microservice import schemas
-from modules.microservice.core import config, security
+from modules.microservice.core import config
 
 
 class TestImports(unittest.TestCase):
@@ -17,6 +16,7 @@ class TestImports(unittest.TestCase):
     def test_schemas(self):
         schemas.HealthResponse
         schemas.LatencyRequest
+        schemas.SyncResponse
         with self.assertRaises(AttributeError):
             schemas.NotExisting
 
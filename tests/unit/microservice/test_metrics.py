@@ -0,0 +1,165 @@
+
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from modules.microservice.api import routes_common, routes_emitter
+from modules.microservice.core import metrics
+from modules.microservice.core.metrics import (
+    Counter, Gauge, Histogram, Registry, TimedDriver)
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    test cases include:
+    - test counter
+    - test gauge
+    - test labels validated
+    - test histogram text format
+    - test histogram timer
+    - test registry
+    - test metric base abstract
+    - test timed driver
+    """
+    def test_counter(self):
+        counter = Counter("c_total", "things", ["kind"])
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        counter.inc(kind='b"')
+        self.assertEqual(counter.get(kind="a"), 3)
+        with self.assertRaises(ValueError):
+            counter.inc(-1, kind="a")
+        self.assertEqual(counter.render(), "\n".join([
+            "# HELP c_total things",
+            "# TYPE c_total counter",
+            'c_total{kind="a"} 3',
+            'c_total{kind="b\\""} 1']))
+
+    def test_gauge(self):
+        gauge = Gauge("g_seconds", "last value", ["run"])
+        self.assertIsNone(gauge.get(run="cold"))
+        gauge.set(0.5, run="cold")
+        gauge.set(0.25, run="cold")
+        self.assertEqual(gauge.get(run="cold"), 0.25)
+        self.assertEqual(gauge.render(), "\n".join([
+            "# HELP g_seconds last value",
+            "# TYPE g_seconds gauge",
+            'g_seconds{run="cold"} 0.25']))
+
+    def test_labels(self):
+        counter = Counter("c_total", "things", ["kind"])
+        with self.assertRaises(ValueError):
+            counter.inc()
+        with self.assertRaises(ValueError):
+            counter.inc(kind="a", other="b")
+
+    def test_histogram(self):
+        histogram = Histogram("h_seconds", "lag", buckets=[0.1, 1.])
+        for value in [0.05, 0.1, 0.5, 3.]:
+            histogram.observe(value)
+        self.assertEqual(histogram.get_count(), 4)
+        self.assertEqual(histogram.render(), "\n".join([
+            "# HELP h_seconds lag",
+            "# TYPE h_seconds histogram",
+            'h_seconds_bucket{le="0.1"} 2',
+            'h_seconds_bucket{le="1.0"} 3',
+            'h_seconds_bucket{le="+Inf"} 4',
+            "h_seconds_sum 3.65",
+            "h_seconds_count 4"]))
+
+    def test_histogram_timer(self):
+        histogram = Histogram("h_seconds", "duration", ["action"])
+        with histogram.time(action="play"):
+            time.sleep(0.002)
+        self.assertEqual(histogram.get_count(action="play"), 1)
+        _, total, _ = histogram._values[(("action", "play"),)]
+        self.assertGreaterEqual(total, 0.002)
+
+    def test_registry(self):
+        registry = Registry()
+        registry.register(Counter("a_total", "a"))
+        with self.assertRaises(ValueError):
+            registry.register(Counter("a_total", "a"))
+        self.assertTrue(registry.render().endswith("counter\n"))
+
+    def test_metric_abstract(self):
+        with self.assertRaises(TypeError):
+            metrics._Metric("m", "no samples")
+
+    def test_timed_driver(self):
+        pa = MagicMock()
+        histogram = Histogram("open_seconds", "open", ["direction"])
+        driver = TimedDriver(pa, histogram)
+        stream = driver.open(rate=44100, input=True)
+        self.assertIs(stream, pa.open.return_value)
+        pa.open.assert_called_once_with(rate=44100, input=True)
+        driver.terminate()
+        pa.terminate.assert_called_once_with()
+        self.assertEqual(histogram.get_count(direction="input"), 1)
+
+
+class TestMetricsService(unittest.TestCase):
+    """
+    test cases include:
+    - test metrics endpoint and middleware
+    - test schedule error of play
+    - test event loop lag
+    """
+    def setUp(self):
+        app = FastAPI()
+        app.middleware("http")(metrics.track_requests)
+        app.include_router(routes_common.router)
+        app.include_router(routes_emitter.router)
+        app.state.emitter = MagicMock()
+        self.client = TestClient(app)
+
+    def test_endpoint(self):
+        before = metrics.REQUESTS.get(
+            method="GET", path="/sync", status=200)
+        response = self.client.request("GET", "/sync", json={"origin_ns": 1})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response.headers["content-type"].startswith("text/plain"))
+        self.assertIn("# TYPE sonar_http_requests_total counter",
+                      response.text)
+        self.assertIn('sonar_payload_bytes_count{path="/sync",'
+                      'direction="request"}', response.text)
+        self.assertEqual(metrics.REQUESTS.get(
+            method="GET", path="/sync", status=200), before + 1)
+
+    def test_play(self):
+        before = metrics.SCHEDULE_ERROR.get_count(action="play")
+        schedule = time.time_ns() + 5_000_000
+        response = self.client.request("GET", "/play", json={"schedule": schedule})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            metrics.SCHEDULE_ERROR.get_count(action="play"), before + 1)
+        self.assertGreaterEqual(
+            metrics.DEVICE_DURATION.get_count(action="play"), 1)
+
+    def test_event_loop_lag(self):
+        before = metrics.EVENT_LOOP_LAG.get_count()
+
+        async def blocked_loop():
+            task = asyncio.create_task(
+                metrics.monitor_event_loop(interval_s=0.001))
+            await asyncio.sleep(0.005)
+            time.sleep(0.02)  # blocking call
+            await asyncio.sleep(0.005)
+            task.cancel()
+
+        asyncio.run(blocked_loop())
+        self.assertGreater(metrics.EVENT_LOOP_LAG.get_count(), before)
+        _, total, _ = metrics.EVENT_LOOP_LAG._values[()]
+        self.assertGreater(total, 0.015)
+
+
+if __name__ == '__main__':
+    unittest.main()
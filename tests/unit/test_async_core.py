@@ -0,0 +1,236 @@
+
+import asyncio
+import threading
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+from modules.abstract.abstract_display import (
+    AbstractAsyncDisplay, AbstractDisplay)
+from modules.abstract.abstract_factory import (
+    AbstractAsyncEmitter, AbstractAsyncProcessor, AbstractAsyncReceiver,
+    AbstractEmitter, AbstractFactory, AbstractProcessor, AbstractReceiver,
+    AbstractSample)
+from modules.async_core import (
+    AsyncController, AsyncMeasurer, ThreadedDisplay, ThreadedEmitter,
+    ThreadedProcessor, ThreadedReceiver, as_async)
+from modules.instrumentation import NULL_TIMER, StageTimer
+
+
+class TestAsAsync(unittest.TestCase):
+    """
+    test cases include:
+    - test async objects returned as they are
+    - test sync objects wrapped
+    - test unknown objects
+    - test sync calls run on a thread
+    """
+    def test_async(self):
+        for spec in [AbstractAsyncEmitter, AbstractAsyncReceiver,
+                     AbstractAsyncProcessor, AbstractAsyncDisplay]:
+            obj = MagicMock(spec=spec)
+            self.assertIs(as_async(obj), obj)
+
+    def test_wrapped(self):
+        for spec, wrapper in [(AbstractEmitter, ThreadedEmitter),
+                              (AbstractReceiver, ThreadedReceiver),
+                              (AbstractProcessor, ThreadedProcessor),
+                              (AbstractDisplay, ThreadedDisplay)]:
+            obj = MagicMock(spec=spec)
+            wrapped = as_async(obj)
+            self.assertIsInstance(wrapped, wrapper)
+            self.assertIs(wrapped.wrapped, obj)
+
+    def test_unknown(self):
+        with self.assertRaises(TypeError):
+            as_async(object())
+
+    def test_thread(self):
+        threads = []
+        processor = MagicMock(spec=AbstractProcessor)
+        processor.process.side_effect = \
+            lambda sample: threads.append(threading.current_thread())
+
+        asyncio.run(as_async(processor).process("sample"))
+
+        processor.process.assert_called_once_with("sample")
+        self.assertIsNot(threads[0], threading.current_thread())
+
+
+class TestAsyncMeasurer(unittest.TestCase):
+    """
+    test cases include:
+    - test sync devices wrapped
+    - test validation of devices
+    - test check, warm up and configure
+    - test single measurement
+    - test array of receivers
+    """
+    def setUp(self):
+        self.mock_factory = MagicMock(spec=AbstractFactory)
+        self.mock_emitter = MagicMock(spec=AbstractAsyncEmitter)
+        self.mock_receiver = MagicMock(spec=AbstractAsyncReceiver)
+        self.mock_factory.create_emitter.return_value = self.mock_emitter
+        self.mock_factory.create_receiver.return_value = self.mock_receiver
+        self.measurer = AsyncMeasurer(self.mock_factory)
+
+    def test_wrapped(self):
+        self.mock_factory.create_emitter.return_value = \
+            MagicMock(spec=AbstractEmitter)
+        measurer = AsyncMeasurer(self.mock_factory)
+        self.assertIsInstance(measurer._emitter, ThreadedEmitter)
+
+    def test_validation(self):
+        self.mock_factory.create_emitter.return_value = \
+            MagicMock(spec=AbstractReceiver)
+        with self.assertRaises(TypeError):
+            AsyncMeasurer(self.mock_factory)
+
+    def test_check_warm_up_configure(self):
+        asyncio.run(self.measurer.check())
+        self.mock_emitter.check.assert_awaited_once()
+        self.mock_receiver.check.assert_awaited_once()
+
+        self.mock_emitter.warm_up.return_value = {"stream": 1.}
+        timings = asyncio.run(self.measurer.warm_up())
+        self.assertDictEqual(timings, {
+            "emitter": {"stream": 1.},
+            "receiver": self.mock_receiver.warm_up.return_value,
+        })
+
+        asyncio.run(self.measurer.configure(volume=0.5))
+        self.mock_emitter.configure.assert_awaited_once_with(volume=0.5)
+        self.mock_receiver.configure.assert_awaited_once_with(volume=0.5)
+
+    def test_single_measurement(self):
+        sample = MagicMock(spec=AbstractSample)
+        self.mock_receiver.record_signal.return_value = sample
+        self.assertIs(asyncio.run(self.measurer.single_measurement()), sample)
+        self.mock_emitter.emit_beep.assert_awaited_once()
+
+    def test_array(self):
+        receivers = [MagicMock(spec=AbstractAsyncReceiver) for _ in range(3)]
+        for i, receiver in enumerate(receivers):
+            receiver.record_signal.return_value = i
+        self.mock_factory.create_receivers.return_value = receivers
+        measurer = AsyncMeasurer(self.mock_factory, array=True)
+
+        self.assertListEqual(
+            asyncio.run(measurer.single_measurement()), [0, 1, 2])
+        timings = asyncio.run(measurer.warm_up())
+        self.assertEqual(len(timings["receivers"]), 3)
+
+
+class TestAsyncController(unittest.TestCase):
+    """
+    test cases include:
+    - test sync processor wrapped with the executor and timed
+    - test start warms up
+    - test start without warm up
+    - test loop respects limit
+    - test loop stops on event
+    - test loop scheduled
+    - test step
+    - test step scheduled
+    """
+    def setUp(self):
+        self.mock_factory = MagicMock(spec=AbstractFactory)
+        self.mock_emitter = MagicMock(spec=AbstractAsyncEmitter)
+        self.mock_receiver = MagicMock(spec=AbstractAsyncReceiver)
+        self.mock_processor = MagicMock(spec=AbstractAsyncProcessor)
+        self.mock_display = MagicMock(spec=AbstractAsyncDisplay)
+        self.mock_factory.create_emitter.return_value = self.mock_emitter
+        self.mock_factory.create_receiver.return_value = self.mock_receiver
+        self.mock_factory.create_processor.return_value = self.mock_processor
+        self.controller = AsyncController(
+            self.mock_factory, self.mock_display)
+
+    def test_init_sync_processor(self):
+        processor = MagicMock(spec=AbstractProcessor)
+        processor.timer = NULL_TIMER
+        self.mock_factory.create_processor.return_value = processor
+        executor = MagicMock()
+        timer = StageTimer()
+        controller = AsyncController(
+            self.mock_factory, MagicMock(spec=AbstractDisplay),
+            timer=timer, executor=executor)
+
+        self.assertIsInstance(controller.processor, ThreadedProcessor)
+        self.assertIs(controller.processor.executor, executor)
+        self.assertIs(processor.timer, timer)
+        self.assertIsInstance(controller.display, ThreadedDisplay)
+
+    def test_start(self):
+        self.mock_processor.warm_up.return_value = {"plan": 1.}
+        self.assertFalse(self.controller.started)
+        asyncio.run(self.controller.start())
+
+        self.assertTrue(self.controller.started)
+        self.mock_emitter.check.assert_awaited_once()
+        self.assertDictEqual(self.controller.warm_up_timings["processor"],
+                             {"plan": 1.})
+
+    def test_start_without_warm_up(self):
+        controller = AsyncController(
+            self.mock_factory, self.mock_display, warm_up=False)
+        asyncio.run(controller.start())
+        self.mock_processor.warm_up.assert_not_awaited()
+        self.assertDictEqual(controller.warm_up_timings, {})
+
+    def test_loop_respects_limit(self):
+        self.controller._step = AsyncMock()
+        asyncio.run(self.controller.loop(limit=3))
+        self.assertEqual(self.controller._step.await_count, 3)
+        self.assertTrue(self.controller.started)
+
+    def test_loop_stops_on_event(self):
+        self.controller._step = AsyncMock()
+        self.controller.loop_event.set()
+        asyncio.run(self.controller.loop())
+        self.controller._step.assert_not_awaited()
+
+    def test_loop_scheduled(self):
+        self.controller._step = AsyncMock()
+        self.controller._pause = AsyncMock()
+        self.controller.scheduler = MagicMock(interval_s=0.25)
+        asyncio.run(self.controller.loop(limit=3))
+        # no pause after the last step
+        self.assertEqual(self.controller._pause.await_count, 2)
+        self.controller._pause.assert_awaited_with(0.25)
+
+    def test_pause_interrupted(self):
+        async def run():
+            pause = asyncio.create_task(self.controller._pause(60.))
+            await asyncio.sleep(0)
+            self.controller.loop_event.set()
+            await asyncio.wait_for(pause, 1.)
+        asyncio.run(run())
+
+    def test_step(self):
+        sample = MagicMock(spec=AbstractSample)
+        self.mock_receiver.record_signal.return_value = sample
+        timer = StageTimer()
+        self.controller.timer = timer
+
+        result = asyncio.run(self.controller._step())
+
+        self.assertIs(self.controller.history.get_last(), sample)
+        self.mock_processor.process.assert_awaited_once_with(sample)
+        self.assertIs(result, self.mock_processor.process.return_value)
+        self.mock_display.print.assert_awaited_once_with(result)
+        self.assertSetEqual(set(timer.last()),
+                            {"step", "measure", "process", "print"})
+
+    def test_step_scheduled(self):
+        scheduler = MagicMock()
+        scheduler.update.return_value = {"volume": 0.5}
+        self.controller.scheduler = scheduler
+
+        result = asyncio.run(self.controller._step())
+
+        scheduler.update.assert_called_once_with(result, {})
+        self.mock_emitter.configure.assert_awaited_once_with(volume=0.5)
+        self.mock_receiver.configure.assert_awaited_once_with(volume=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
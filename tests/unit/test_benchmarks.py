@@ -0,0 +1,63 @@
+
+import json
+import os
+import tempfile
+import unittest
+
+from benchmarks.regression import (
+    _flatten, compare, load_baseline, save_baseline)
+
+
+class TestRegression(unittest.TestCase):
+    """
+    test cases include:
+    - test flatten nested results
+    - test compare within threshold
+    - test compare regression
+    - test compare skips missing
+    - test compare within noise floor
+    - test compare skips unchecked
+    - test baseline round trip
+    """
+    def test_flatten(self):
+        results = {"a": 1., "b": {"c": 2., "d": {"e": 3.}}}
+        self.assertDictEqual(
+            _flatten(results), {"a": 1., "b: c": 2., "b: d: e": 3.})
+
+    def test_compare_within_threshold(self):
+        self.assertListEqual(
+            compare({"x": 1.2, "y": 0.5}, {"x": 1., "y": 1.}, 0.25), [])
+
+    def test_compare_regression(self):
+        regressions = compare({"x": 1.3, "y": 1.}, {"x": 1., "y": 1.}, 0.25)
+        self.assertListEqual(regressions, [("x", 1., 1.3)])
+
+    def test_compare_missing(self):
+        self.assertListEqual(compare({"new": 5.}, {"old": 1.}), [])
+
+    def test_compare_noise_floor(self):
+        floors = [("skew", 500.), ("[ms]", 0.05)]
+        results = {"open skew [us]": 400., "xruns [-]": 1.,
+                   "tiny [ms]": 0.04, "big [ms]": 2.}
+        baseline = {"open skew [us]": 10., "xruns [-]": 0.,
+                    "tiny [ms]": 0.01, "big [ms]": 1.}
+        regressions = compare(results, baseline, 0.25, floors, [])
+        self.assertListEqual(regressions, [
+            ("xruns [-]", 0., 1.), ("big [ms]", 1., 2.)])
+
+    def test_compare_unchecked(self):
+        results = {"startup / import [ms]": 2., "xruns [-]": 3.}
+        baseline = {"startup / import [ms]": 1., "xruns [-]": 0.}
+        self.assertListEqual(compare(results, baseline), [])
+
+    def test_baseline_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            save_baseline({"x": 1.5}, path)
+            self.assertDictEqual(load_baseline(path), {"x": 1.5})
+            with open(path) as f:
+                self.assertIn("environment", json.load(f))
+
+
+if __name__ == '__main__':
+    unittest.main()
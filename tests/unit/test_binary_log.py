@@ -0,0 +1,158 @@
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from modules.abstract.abstract_display import AbstractDisplay
+from modules.concrete.binary_log import (
+    HEADER_DTYPE, MAX_PEAKS, NO_ERROR, OTHER_ERROR, RECORD_DTYPE,
+    BinaryLogDisplay, error_code, read_log
+)
+
+
+class TestErrorCode(unittest.TestCase):
+    """
+    test cases include:
+    - test no error
+    - test known error
+    - test unknown error
+    """
+    def test_no_error(self):
+        self.assertEqual(error_code(None), NO_ERROR)
+
+    def test_known_error(self):
+        code = error_code("ProcessorNoSoundError: no main pulse")
+        self.assertNotIn(code, [NO_ERROR, OTHER_ERROR])
+
+    def test_unknown_error(self):
+        self.assertEqual(error_code("KeyError: 'x'"), OTHER_ERROR)
+
+
+class TestBinaryLogDisplay(unittest.TestCase):
+    """
+    test cases include:
+    - test creation
+    - test header
+    - test buffered write
+    - test close twice
+    - test record values
+    - test error record
+    - test too many peaks
+    - test append
+    - test wrong file
+    - test read empty log
+    """
+    @staticmethod
+    def _make_mock_result(peaks=(), noise=2., snr=40., error=None):
+        mock_result = MagicMock()
+        mock_result.peaks = list(peaks)
+        mock_result.noise = noise
+        mock_result.snr = snr
+        mock_result.error = error
+        return mock_result
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_creation(self):
+        with BinaryLogDisplay({"path": self.path}) as display:
+            self.assertIsInstance(display, AbstractDisplay)
+            self.assertEqual(display.config, {"path": self.path})
+        self.assertEqual(os.path.getsize(self.path), HEADER_DTYPE.itemsize)
+
+    def test_header(self):
+        BinaryLogDisplay({"path": self.path}).close()
+        header = np.fromfile(self.path, dtype=HEADER_DTYPE)
+        self.assertEqual(header["magic"][0], b"SONARLOG")
+        self.assertEqual(header["record_size"][0], RECORD_DTYPE.itemsize)
+        self.assertEqual(header["max_peaks"][0], MAX_PEAKS)
+
+    def test_buffered_write(self):
+        display = BinaryLogDisplay({"path": self.path, "flush_every": 3})
+        for _ in range(2):
+            display.print(self._make_mock_result())
+        self.assertEqual(len(read_log(self.path)), 0)
+        display.print(self._make_mock_result())
+        self.assertEqual(len(read_log(self.path)), 3)
+        display.print(self._make_mock_result())
+        display.close()
+        self.assertEqual(len(read_log(self.path)), 4)
+
+    def test_close_twice(self):
+        display = BinaryLogDisplay({"path": self.path})
+        display.print(self._make_mock_result())
+        display.close()
+        display.close()
+        with display:
+            pass
+        self.assertEqual(len(read_log(self.path)), 1)
+
+    @patch("modules.concrete.binary_log.time.time_ns",
+           return_value=1_700_000_000_123_456_789)
+    def test_record_values(self, mock_time_ns):
+        result = self._make_mock_result(
+            peaks=[(1.5, 20.), (3.25, 8.)], noise=1.5, snr=55.)
+        with BinaryLogDisplay({"path": self.path}) as display:
+            display.print(result)
+
+        log = read_log(self.path)
+        self.assertEqual(log["timestamp_ns"][0], 1_700_000_000_123_456_789)
+        self.assertEqual(log["noise"][0], 1.5)
+        self.assertEqual(log["snr"][0], 55.)
+        self.assertEqual(log["error_code"][0], NO_ERROR)
+        self.assertEqual(log["n_peaks"][0], 2)
+        np.testing.assert_array_equal(log["distance"][0], [1.5, 3.25, 0, 0, 0])
+        np.testing.assert_array_equal(log["intensity"][0], [20, 8, 0, 0, 0])
+
+    def test_error_record(self):
+        result = self._make_mock_result(
+            peaks=[(0, 0)], noise=0, snr=0,
+            error="ProcessorNoSoundError: no main pulse")
+        with BinaryLogDisplay({"path": self.path}) as display:
+            display.print(result)
+
+        log = read_log(self.path)
+        self.assertEqual(log["error_code"][0],
+                         error_code("ProcessorNoSoundError: x"))
+        self.assertEqual(log["n_peaks"][0], 0)
+
+    def test_too_many_peaks(self):
+        peaks = [(d, i) for d, i in zip(range(1, 8), [5, 1, 7, 2, 6, 4, 3])]
+        with BinaryLogDisplay({"path": self.path}) as display:
+            display.print(self._make_mock_result(peaks=peaks))
+
+        log = read_log(self.path)
+        self.assertEqual(log["n_peaks"][0], MAX_PEAKS)
+        np.testing.assert_array_equal(log["distance"][0], [1, 3, 5, 6, 7])
+        np.testing.assert_array_equal(log["intensity"][0], [5, 7, 6, 4, 3])
+
+    def test_append(self):
+        for snr in [10., 20.]:
+            with BinaryLogDisplay({"path": self.path}) as display:
+                display.print(self._make_mock_result(snr=snr))
+        np.testing.assert_array_equal(read_log(self.path)["snr"], [10, 20])
+
+    def test_wrong_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a log" * 10)
+        with self.assertRaises(ValueError):
+            BinaryLogDisplay({"path": self.path})
+        with self.assertRaises(ValueError):
+            read_log(self.path)
+
+    def test_read_empty_log(self):
+        BinaryLogDisplay({"path": self.path}).close()
+        log = read_log(self.path)
+        self.assertEqual(len(log), 0)
+        self.assertEqual(log.dtype, RECORD_DTYPE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import numpy as np
+
+import modules.concrete.calibration as cal
+import modules.concrete.pc_sound as pcs
+from modules.concrete.calibration import (
+    CalibrationError, calibrate, device_key, load_calibration,
+    measure_latency, save_calibration)
+from modules.concrete.pc_sound import PcSample, _Stripe
+
+
+def _make_sample(latency_s, n=20000):
+    pulse = np.real(_Stripe._my_wavelet(n, pcs.CARRIER_FREQUENCY))
+    played_s = pcs.PLAY_DELAY_SECONDS + pcs.PLAYING_DURATION_SECONDS / 2
+    position = int(round((played_s + latency_s) * pcs.RATE))
+    values = np.roll(pulse, position - n // 2) \
+        + 0.001 * np.random.default_rng(0).standard_normal(n)
+    return PcSample.from_values(values)
+
+
+class TestMeasureLatency(unittest.TestCase):
+    """
+    test cases include:
+    - test latency of the pulse
+    - test no pulse
+    """
+    def test_latency(self):
+        for latency_s in [0.01, -0.005]:
+            self.assertAlmostEqual(
+                measure_latency(_make_sample(latency_s)), latency_s,
+                delta=1 / pcs.RATE)
+
+    def test_no_pulse(self):
+        noise = np.random.default_rng(0).standard_normal(20000)
+        self.assertIsNone(measure_latency(PcSample.from_values(noise)))
+        self.assertIsNone(measure_latency(PcSample.from_values([])))
+
+
+class TestCalibrate(unittest.TestCase):
+    """
+    test cases include:
+    - test latency and jitter of the burst
+    - test too few pulses found
+    """
+    def test_calibrate(self):
+        measurer = MagicMock()
+        measurer.single_measurement.side_effect = [
+            _make_sample(0.010), _make_sample(0.012),
+            PcSample.from_values(np.zeros(100))]
+        calibration = calibrate(measurer, n_pings=3)
+        self.assertEqual(measurer.single_measurement.call_count, 3)
+        self.assertEqual(calibration["n_pings"], 2)
+        self.assertAlmostEqual(calibration["latency_s"], 0.011, delta=1e-4)
+        self.assertAlmostEqual(calibration["jitter_s"], 0.001, delta=1e-4)
+
+    def test_failed(self):
+        measurer = MagicMock()
+        measurer.single_measurement.return_value = \
+            PcSample.from_values(np.zeros(100))
+        with self.assertRaises(CalibrationError):
+            calibrate(measurer, n_pings=4)
+
+
+class TestStorage(unittest.TestCase):
+    """
+    test cases include:
+    - test device key
+    - test missing calibration
+    - test save and load per device
+    - test default file next to the module
+    """
+    def setUp(self):
+        self.pa = MagicMock()
+        self.pa.get_default_output_device_info.return_value = {"name": "out"}
+        self.pa.get_default_input_device_info.return_value = {"name": "in"}
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "calibration.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_device_key(self):
+        self.assertEqual(device_key(self.pa), "out -> in")
+
+    def test_missing(self):
+        self.assertIsNone(load_calibration(self.pa, self.path))
+
+    def test_save_load(self):
+        calibration = {"latency_s": 0.01, "jitter_s": 0.001, "n_pings": 10}
+        save_calibration(self.pa, calibration, self.path)
+        other = MagicMock()
+        other.get_default_output_device_info.return_value = {"name": "usb"}
+        other.get_default_input_device_info.return_value = {"name": "in"}
+        save_calibration(other, {"latency_s": 0.}, self.path)
+
+        self.assertDictEqual(
+            load_calibration(self.pa, self.path), calibration)
+        self.assertDictEqual(
+            load_calibration(other, self.path), {"latency_s": 0.})
+
+    def test_default_file(self):
+        self.assertEqual(os.path.dirname(cal.CALIBRATION_FILE),
+                         os.path.dirname(cal.__file__))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,13 @@
 
+import json
+import threading
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import call, MagicMock, patch
 
 import numpy as np
 
-from modules.core import Controller, History, Measurer, Result
+from modules.core import ArrayMeasurer, Controller, History, Measurer, Result
+from modules.instrumentation import NULL_TIMER, StageTimer
 from modules.abstract.abstract_factory import (
     AbstractEmitter, AbstractFactory, AbstractReceiver, AbstractSample)
 
@@ -128,13 +131,54 @@ class TestResult(unittest.TestCase):
     def test_peaks_sorting(self):
         peaks = [self.peak_3, self.peak_1, self.peak_2]
         r = Result(peaks, **self.metadata)
-        self.assertListEqual(r.peaks, [self.peak_1, self.peak_2, self.peak_3])
+        np.testing.assert_array_equal(
+            r.peaks, [self.peak_1, self.peak_2, self.peak_3])
         self.assertIsNone(r.error)
 
     def test_reliable_bool(self):
         peaks = [self.peak_numpy]
         res = Result(peaks, **self.metadata).to_dict()
         self.assertIsInstance(res["peaks"][0]["reliable"], bool)
+        self.assertIsInstance(res["peaks"][0]["distance"], float)
+
+    def test_columns(self):
+        peaks = np.array([self.peak_2, self.peak_1])
+        r = Result(peaks, **self.metadata)
+        np.testing.assert_array_equal(r.distances, [1/7, 6/7])
+        np.testing.assert_array_equal(r.intensities, [25.25655789, 1.25655789])
+        np.testing.assert_array_equal(r.reliable, [True, False])
+        # a copy - the array of the caller is not sorted in place
+        self.assertEqual(peaks[0, 0], 6/7)
+
+    def test_slots(self):
+        r = Result([], **self.metadata)
+        with self.assertRaises(AttributeError):
+            r.other = 1
+
+    def test_peaks_replaced(self):
+        r = Result([self.peak_1], **self.metadata)
+        first = r.to_dict()["peaks"]
+        # the caller owns the dicts
+        first[0]["distance"] = 0.
+        first.clear()
+        self.assertEqual(r.to_dict()["peaks"][0]["distance"], 1/7)
+        r.peaks = [self.peak_3, self.peak_2]
+        self.assertEqual(
+            [p["distance"] for p in r.to_dict()["peaks"]], [6/7, 1.8])
+
+    def test_to_json(self):
+        r = Result([self.peak_3, self.peak_1], other=np.float32(0.5),
+                   tdoa=np.array([0., 1e-3]), **self.metadata)
+        r.error = self.error_output
+        decoded = json.loads(r.to_json())
+        expected = r.to_dict()
+        expected["metadata"] = {"other": 0.5, "tdoa": [0., 1e-3]}
+        self.assertEqual(decoded, expected)
+        # peaks encoded once
+        with patch("modules.core.json.dumps",
+                   side_effect=json.dumps) as mock_dumps:
+            r.to_json()
+        self.assertEqual(mock_dumps.call_count, 1)
 
 
 class TestMeasurer(unittest.TestCase):
@@ -156,6 +200,18 @@ class TestMeasurer(unittest.TestCase):
         self.mock_emitter.check.assert_called_once()
         self.mock_receiver.check.assert_called_once()
 
+    def test_warm_up(self):
+        timings = self.measurer.warm_up()
+        self.assertDictEqual(timings, {
+            "emitter": self.mock_emitter.warm_up.return_value,
+            "receiver": self.mock_receiver.warm_up.return_value,
+        })
+
+    def test_configure(self):
+        self.measurer.configure(volume=0.5)
+        self.mock_emitter.configure.assert_called_once_with(volume=0.5)
+        self.mock_receiver.configure.assert_called_once_with(volume=0.5)
+
     def test_single_measurement_returns_sample(self):
         # Arrange expected sample from receiver
         expected_sample = MagicMock(spec=AbstractSample)
@@ -193,6 +249,73 @@ class TestMeasurer(unittest.TestCase):
         self.assertEqual(result, expected_sample)
 
 
+class TestArrayMeasurer(unittest.TestCase):
+    """
+    test cases include:
+    - test init validation
+    - test barrier for all devices
+    - test check
+    - test warm up
+    - test configure
+    - test measurement of all receivers
+    - test receivers record in parallel
+    """
+    def setUp(self):
+        self.mock_factory = MagicMock(spec=AbstractFactory)
+        self.mock_emitter = MagicMock(spec=AbstractEmitter)
+        self.mock_receivers = [
+            MagicMock(spec=AbstractReceiver) for _ in range(3)]
+
+        self.mock_factory.create_emitter.return_value = self.mock_emitter
+        self.mock_factory.create_receivers.return_value = self.mock_receivers
+        self.measurer = ArrayMeasurer(self.mock_factory)
+
+    def test_init_validation(self):
+        self.mock_factory.create_receivers.return_value = [MagicMock()]
+        with self.assertRaises(TypeError):
+            ArrayMeasurer(self.mock_factory)
+        self.mock_factory.create_receivers.return_value = []
+        with self.assertRaises(TypeError):
+            ArrayMeasurer(self.mock_factory)
+
+    def test_barrier(self):
+        self.assertEqual(self.measurer.barrier.parties, 4)
+
+    def test_check(self):
+        self.measurer.check()
+        self.mock_emitter.check.assert_called_once()
+        for receiver in self.mock_receivers:
+            receiver.check.assert_called_once()
+
+    def test_warm_up(self):
+        timings = self.measurer.warm_up()
+        self.assertEqual(len(timings["receivers"]), 3)
+        self.mock_emitter.warm_up.assert_called_once()
+
+    def test_configure(self):
+        self.measurer.configure(margin_s=0.1)
+        self.mock_emitter.configure.assert_called_once_with(margin_s=0.1)
+        for receiver in self.mock_receivers:
+            receiver.configure.assert_called_once_with(margin_s=0.1)
+
+    def test_single_measurement(self):
+        for i, receiver in enumerate(self.mock_receivers):
+            receiver.record_signal.return_value = i
+        samples = self.measurer.single_measurement()
+        self.assertListEqual(samples, [0, 1, 2])
+        self.mock_emitter.emit_beep.assert_called_once()
+
+    def test_parallel(self):
+        # every recording waits for all the others - serial calls
+        # would break the barrier
+        recording = threading.Barrier(3)
+        for receiver in self.mock_receivers:
+            receiver.record_signal.side_effect = \
+                lambda: recording.wait(timeout=1)
+        samples = self.measurer.single_measurement()
+        self.assertListEqual(sorted(samples), [0, 1, 2])
+
+
 class TestController(unittest.TestCase):
     def setUp(self):
         self.mock_factory = MagicMock()
@@ -212,6 +335,35 @@ class TestController(unittest.TestCase):
         self.assertEqual(self.controller.display, self.mock_display)
         self.assertEqual(self.controller.processor, self.mock_processor)
 
+    def test_init_warms_up(self):
+        processor = MagicMock()
+        self.mock_factory.create_processor.return_value = processor
+        with patch('modules.core.Measurer') as mock_measurer:
+            mock_measurer.return_value.warm_up.return_value = {"emitter": {}}
+            controller = Controller(self.mock_factory, self.mock_display)
+        processor.warm_up.assert_called_once()
+        self.assertDictEqual(controller.warm_up_timings, {
+            "emitter": {},
+            "processor": processor.warm_up.return_value,
+        })
+
+    def test_init_without_warm_up(self):
+        processor = MagicMock()
+        self.mock_factory.create_processor.return_value = processor
+        with patch('modules.core.Measurer') as mock_measurer:
+            controller = Controller(
+                self.mock_factory, self.mock_display, warm_up=False)
+        mock_measurer.return_value.warm_up.assert_not_called()
+        processor.warm_up.assert_not_called()
+        self.assertDictEqual(controller.warm_up_timings, {})
+
+    def test_init_array(self):
+        with patch('modules.core.ArrayMeasurer') as mock_array_measurer:
+            controller = Controller(
+                self.mock_factory, self.mock_display, array=True)
+        mock_array_measurer.assert_called_once_with(self.mock_factory)
+        self.assertIs(controller.measurer, mock_array_measurer.return_value)
+
     # --- Loop Method Tests ---
     def test_loop_respects_limit(self):
         self.controller._step = MagicMock()
@@ -224,6 +376,32 @@ class TestController(unittest.TestCase):
         self.controller.loop()
         self.controller._step.assert_not_called()
 
+    def test_loop_scheduled(self):
+        self.controller._step = MagicMock()
+        self.controller.loop_event = MagicMock()
+        self.controller.loop_event.is_set.return_value = False
+        self.controller.scheduler = MagicMock(interval_s=0.25)
+        self.controller.loop(limit=3)
+        # no pause after the last step
+        self.assertListEqual(
+            self.controller.loop_event.wait.call_args_list,
+            2 * [call(0.25)])
+
+    def test_step_scheduled(self):
+        scheduler = MagicMock()
+        scheduler.update.return_value = {"volume": 0.5}
+        self.controller.scheduler = scheduler
+        self.controller._measure = MagicMock()
+        self.controller._process = MagicMock()
+        self.controller._print = MagicMock()
+
+        self.controller._step()
+
+        scheduler.update.assert_called_once_with(
+            self.controller._process.return_value, {})
+        self.controller.measurer.configure.assert_called_once_with(
+            volume=0.5)
+
     # --- Step Method Tests ---
     def test_step_logic_flow(self):
         sample = MagicMock()
@@ -238,6 +416,49 @@ class TestController(unittest.TestCase):
         self.controller.history.get_last.assert_called_once()
         self.controller._print.assert_called_with(result)
 
+    def test_step_timed(self):
+        timer = StageTimer()
+        self.controller.timer = timer
+        self.controller._measure = MagicMock()
+        self.controller._process = MagicMock()
+        self.controller._print = MagicMock()
+
+        self.controller._step()
+        self.controller._step()
+
+        stats = timer.stats()
+        self.assertListEqual(
+            sorted(stats), ["measure", "print", "process", "step"])
+        self.assertEqual(stats["step"]["count"], 2)
+        self.assertIs(Controller.timer, NULL_TIMER)
+
+    def test_step_timings_current(self):
+        timer = StageTimer()
+        # of an earlier step
+        with timer.stage("transform"):
+            pass
+        self.controller.timer = timer
+        scheduler = MagicMock()
+        scheduler.update.return_value = {}
+        self.controller.scheduler = scheduler
+
+        self.controller._step()
+
+        _, timings = scheduler.update.call_args[0]
+        self.assertListEqual(
+            sorted(timings), ["measure", "print", "process", "step"])
+
+    def test_timer_shared_with_processor(self):
+        timer = StageTimer()
+        processor = MagicMock()
+        processor.timer = NULL_TIMER
+        self.mock_factory.create_processor.return_value = processor
+        with patch('modules.core.Measurer'):
+            controller = Controller(
+                self.mock_factory, self.mock_display, timer=timer)
+        self.assertIs(controller.timer, timer)
+        self.assertIs(processor.timer, timer)
+
     # --- Internal Method Tests & Errors ---
     def test_measure_calls_measurer(self):
         mock_sample = MagicMock()
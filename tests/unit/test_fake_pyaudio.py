@@ -0,0 +1,142 @@
+
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from modules.concrete import fake_pyaudio
+from modules.concrete.fake_pyaudio import FakePyAudio
+
+
+def _to_bytes(values):
+    return (np.array(values) * 2 ** 15).astype("<i2").tobytes()
+
+
+def _to_values(data):
+    return np.frombuffer(data, dtype="<i2") / 2 ** 15
+
+
+class TestFakePyAudio(unittest.TestCase):
+    """
+    test cases include:
+    - test module interface
+    - test wrong streams
+    - test routing with latency
+    - test echoes
+    - test channels
+    - test virtual read waits for output
+    - test injected xruns
+    - test late write underrun on real clock
+    - test blocking read on real clock
+    - test terminate
+    """
+    def _open(self, pa, **kwargs):
+        return pa.open(format=fake_pyaudio.paInt16, channels=1,
+                       rate=44100, frames_per_buffer=100, **kwargs)
+
+    def test_interface(self):
+        self.assertIs(fake_pyaudio.PyAudio, FakePyAudio)
+        pa = fake_pyaudio.PyAudio()
+        self.assertEqual(pa.get_sample_size(fake_pyaudio.paInt16), 2)
+        pa.get_default_input_device_info()
+        pa.get_default_output_device_info()
+
+    def test_wrong_streams(self):
+        pa = FakePyAudio()
+        with self.assertRaises(ValueError):
+            pa.open(format=fake_pyaudio.paInt16, channels=1, rate=44100)
+        with self.assertRaises(ValueError):
+            pa.open(format=fake_pyaudio.paInt16, channels=1, rate=8000,
+                    input=True)
+        with self.assertRaises(ValueError):
+            FakePyAudio(clock="sundial")
+
+    def test_routing(self):
+        pa = FakePyAudio(latency_s=10 / 44100)
+        source = np.linspace(-0.5, 0.5, 50)
+        stream_in = self._open(pa, input=True)
+        stream_out = self._open(pa, output=True)
+        stream_out.write(_to_bytes(source))
+        stream_out.close()
+        recorded = _to_values(stream_in.read(100))
+        np.testing.assert_array_equal(recorded[:10], 0)
+        np.testing.assert_allclose(recorded[10:60], source, atol=1e-4)
+        np.testing.assert_array_equal(recorded[60:], 0)
+        self.assertEqual(pa.stats["frames_written"], 50)
+        self.assertEqual(pa.stats["frames_read"], 100)
+
+    def test_echoes(self):
+        pa = FakePyAudio(latency_s=0., echoes=[(20 / 44100, 0.5)])
+        stream_in = self._open(pa, input=True)
+        stream_out = self._open(pa, output=True)
+        stream_out.write(_to_bytes([0.5]))
+        stream_out.close()
+        recorded = _to_values(stream_in.read(30))
+        self.assertEqual(recorded[0], 0.5)
+        self.assertEqual(recorded[20], 0.25)
+        self.assertEqual(np.count_nonzero(recorded), 2)
+
+    def test_channels(self):
+        pa = FakePyAudio(latency_s=0.)
+        stream_in = pa.open(format=fake_pyaudio.paInt16, channels=2,
+                            rate=44100, input=True)
+        stream_out = pa.open(format=fake_pyaudio.paInt16, channels=2,
+                             rate=44100, output=True)
+        stream_out.write(_to_bytes([0.5, 0.25]))
+        stream_out.close()
+        recorded = _to_values(stream_in.read(2))
+        np.testing.assert_array_equal(recorded, [0.375, 0.375, 0, 0])
+
+    def test_virtual_read_waits(self):
+        pa = FakePyAudio(latency_s=0., settle_s=1.)
+        stream_in = self._open(pa, input=True)
+        stream_out = self._open(pa, output=True)
+
+        def play():
+            time.sleep(0.05)
+            stream_out.write(_to_bytes(0.5 * np.ones(100)))
+            stream_out.close()
+
+        thread = threading.Thread(target=play)
+        thread.start()
+        recorded = _to_values(stream_in.read(100))
+        thread.join()
+        np.testing.assert_array_equal(recorded, 0.5)
+
+    def test_xruns(self):
+        pa = FakePyAudio(xrun_rate=1., seed=0)
+        stream_in = self._open(pa, input=True)
+        with self.assertRaises(OSError):
+            stream_in.read(10)
+        stream_in.read(10, exception_on_overflow=False)
+        self.assertEqual(pa.stats["overflows"], 2)
+
+        stream_out = self._open(pa, output=True)
+        stream_out.write(_to_bytes(np.zeros(10)))
+        self.assertEqual(pa.stats["underruns"], 1)
+
+    def test_real_underrun(self):
+        pa = FakePyAudio(clock="real")
+        stream_out = self._open(pa, output=True)
+        stream_out.write(_to_bytes(np.zeros(10)))
+        time.sleep(0.01)
+        stream_out.write(_to_bytes(np.zeros(10)))
+        self.assertEqual(pa.stats["underruns"], 1)
+
+    def test_real_blocking_read(self):
+        pa = FakePyAudio(clock="real")
+        stream_in = self._open(pa, input=True)
+        start = time.perf_counter()
+        stream_in.read(2205)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.045)
+
+    def test_terminate(self):
+        pa = FakePyAudio()
+        pa.terminate()
+        with self.assertRaises(OSError):
+            self._open(pa, input=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
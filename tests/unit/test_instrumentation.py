@@ -0,0 +1,151 @@
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from modules.instrumentation import (
+    NULL_TIMER, NullTimer, StageTimer, cold_warm)
+
+
+class TestStageTimer(unittest.TestCase):
+    """
+    test cases include:
+    - test stage measured
+    - test stage measured on exception
+    - test rolling window
+    - test percentiles
+    - test attach
+    - test runs
+    - test nested runs
+    - test reset
+    """
+    @patch("modules.instrumentation.time.perf_counter_ns")
+    def test_stage(self, mock_clock):
+        mock_clock.side_effect = [1_000_000, 3_000_000]
+        timer = StageTimer()
+        with timer.stage("cwt"):
+            pass
+        self.assertDictEqual(timer.last(), {"cwt": 2.})
+        self.assertIs(timer.stage("cwt"), timer.stage("cwt"))
+
+    def test_exception(self):
+        timer = StageTimer()
+        with self.assertRaises(ValueError):
+            with timer.stage("validate"):
+                raise ValueError("wrong")
+        self.assertEqual(timer.stats()["validate"]["count"], 1)
+
+    def test_window(self):
+        timer = StageTimer(window=3)
+        for _ in range(5):
+            with timer.stage("peaks"):
+                pass
+        self.assertEqual(timer.stats()["peaks"]["count"], 3)
+
+    def test_percentiles(self):
+        timer = StageTimer()
+        timer.stage("a").durations.extend(
+            [i * 1_000_000 for i in range(1, 101)])
+        stats = timer.stats()["a"]
+        self.assertAlmostEqual(stats["p50"], 50.5)
+        self.assertAlmostEqual(stats["p95"], 95.05)
+        self.assertAlmostEqual(stats["p99"], 99.01)
+        self.assertEqual(stats["last"], 100.)
+
+    def test_attach(self):
+        result = MagicMock()
+        result.metadata = {}
+        timer = StageTimer()
+        with timer.stage("a"):
+            pass
+        timer.attach(result)
+        self.assertDictEqual(result.metadata, {})
+
+        timer = StageTimer(attach=True)
+        with timer.stage("a"):
+            pass
+        timer.attach(result)
+        self.assertListEqual(list(result.metadata["timings_ms"]), ["a"])
+        timer.attach(result, {"b": 1.})
+        self.assertDictEqual(result.metadata["timings_ms"], {"b": 1.})
+
+    def test_run(self):
+        timer = StageTimer()
+        with timer.run():
+            with timer.stage("validate"):
+                pass
+            with timer.stage("transform"):
+                pass
+        with timer.run() as durations:
+            with timer.stage("validate"):
+                pass
+        # nothing left of the earlier run
+        self.assertListEqual(list(durations), ["validate"])
+        self.assertListEqual(list(timer.last()), ["validate"])
+        self.assertEqual(timer.stats()["transform"]["count"], 1)
+
+    def test_nested_runs(self):
+        timer = StageTimer()
+        with timer.run() as outer, timer.stage("step"):
+            with timer.stage("measure"):
+                pass
+            with timer.stage("process"), timer.run() as inner:
+                with timer.stage("validate"):
+                    pass
+        self.assertListEqual(list(inner), ["validate"])
+        self.assertListEqual(
+            sorted(outer), ["measure", "process", "step", "validate"])
+        self.assertDictEqual(timer.last(), outer)
+
+    def test_reset(self):
+        timer = StageTimer()
+        with timer.stage("a"):
+            pass
+        timer.reset()
+        self.assertDictEqual(timer.stats(), {})
+
+
+class TestNullTimer(unittest.TestCase):
+    """
+    test cases include:
+    - test interface
+    """
+    def test_interface(self):
+        self.assertIsInstance(NULL_TIMER, NullTimer)
+        self.assertFalse(NULL_TIMER.enabled)
+        self.assertTrue(StageTimer.enabled)
+        with self.assertRaises(KeyError):
+            with NULL_TIMER.stage("a"):
+                raise KeyError("passes through")
+        result = MagicMock()
+        result.metadata = {}
+        NULL_TIMER.attach(result)
+        with NULL_TIMER.run() as durations:
+            pass
+        NULL_TIMER.attach(result, durations)
+        self.assertDictEqual(result.metadata, {})
+        self.assertDictEqual(NULL_TIMER.stats(), {})
+        self.assertDictEqual(NULL_TIMER.last(), {})
+        NULL_TIMER.reset()
+
+
+class TestColdWarm(unittest.TestCase):
+    """
+    test cases include:
+    - test calls
+    - test cold versus warm
+    """
+    def test_calls(self):
+        function = MagicMock()
+        timings = cold_warm(function, n_warm=2)
+        self.assertEqual(function.call_count, 3)
+        self.assertListEqual(sorted(timings), ["cold_ms", "warm_ms"])
+
+    @patch("modules.instrumentation.time.perf_counter_ns",
+           side_effect=[0, 5_000_000, 0, 2_000_000, 0, 1_000_000])
+    def test_cold_versus_warm(self, mock_perf_counter_ns):
+        timings = cold_warm(MagicMock(), n_warm=2)
+        self.assertDictEqual(timings, {"cold_ms": 5., "warm_ms": 1.})
+
+
+if __name__ == '__main__':
+    unittest.main()
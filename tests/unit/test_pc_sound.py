@@ -1,4 +1,5 @@
 
+from functools import partial
 import unittest
 from unittest.mock import call, MagicMock, patch
 
@@ -7,8 +8,21 @@ import numpy as np
 from modules.abstract.abstract_factory import (
     AbstractEmitter, AbstractFactory, AbstractProcessor,
     AbstractReceiver, AbstractSample)
+from modules.concrete import fake_pyaudio
+import modules.concrete.pc_sound as pcs
 from modules.concrete.pc_sound import (
     PcEmitter, PcFactory, PcProcessor, PcReceiver, PcSample, _Series, _Stripe)
+from modules.concrete.pc_sound import (
+    PcChirpEmitter, PcChirpFactory, PcChirpProcessor,
+    PcStackingFactory, PcStackingProcessor, _make_chirp)
+from modules.concrete.pc_sound import (
+    PcStreamingFactory, PcStreamingProcessor, PcStreamingReceiver,
+    _FilterBank)
+from modules.concrete.pc_sound import PcArrayFactory, PcArrayProcessor
+from modules.concrete.pc_sound import (
+    PcMultiChannelFactory, PcMultiChannelProcessor)
+from modules.concrete.pc_sound import (
+    PcTrackingFactory, PcTrackingProcessor, _Track)
 from modules.concrete.pc_sound import (
     ProcessorEmptyDataError,
     ProcessorNoisyDataError,
@@ -40,6 +54,9 @@ class TestPcSample(unittest.TestCase):
     - test to signal
     - test to data
     - test to chunks
+    - test channels
+    - test channels are views
+    - test channels kept
     """
     def setUp(self):
         self.sample = PcSample.__new__(PcSample)
@@ -177,12 +194,46 @@ class TestPcSample(unittest.TestCase):
         for res in result2:
             self.assertEqual(len(res), 2*5)
 
+    # channels
+
+    def test_channels(self):
+        sample = PcSample.from_signal(2 * self.signal_1, channels=2)
+        self.assertEqual(sample.n_channels, 2)
+        self.assertEqual(len(sample), 3)
+        np.testing.assert_array_equal(
+            sample.channel(1), np.array(self.values_1)[[1, 0, 2]])
+        self.assertTupleEqual(sample.to_channels().shape, (2, 3))
+        self.assertEqual(PcSample.from_values([]).n_channels, 1)
+        with self.assertRaises(ValueError):
+            PcSample.from_signal(self.signal_1, channels=2)
+
+    def test_channel_views(self):
+        sample = PcSample.from_data(2 * self.data_1, channels=3)
+        values = sample.to_values()
+        self.assertTrue(np.shares_memory(sample.channel(2), values))
+        self.assertTrue(np.shares_memory(sample.to_channels(), values))
+        np.testing.assert_array_equal(
+            sample.to_channels()[0], values[0::3])
+
+    @patch('modules.concrete.pc_sound.CHUNK', 2)
+    def test_channels_kept(self):
+        sample = PcSample.from_signal(2 * self.signal_1, channels=2)
+        self.assertEqual(sample.astype(np.float32).n_channels, 2)
+        chunks = sample.to_chunks()
+        # chunks are counted in frames of all the channels
+        self.assertListEqual([len(c) for c in chunks], [8, 4])
+        restored = PcSample.from_chunks(chunks, channels=2)
+        self.assertEqual(restored.to_data(), sample.to_data())
+
 
 class TestPcFactory(unittest.TestCase):
     """
     - test creation
+    - test creation with injected driver
     - test destructor
+    - test destructor with injected driver
     - test create objects
+    - test calibration passed to receivers
     - test check
     """
     def setUp(self):
@@ -190,22 +241,33 @@ class TestPcFactory(unittest.TestCase):
         self.mock_factory = MagicMock(spec=PcFactory)
         self.mock_factory.pa = self.mock_driver
 
-    @patch("modules.concrete.pc_sound.pyaudio.PyAudio")
-    def test_creation(self, mock_audio):
-        mock_audio.return_value = self.mock_driver
+    @patch("modules.concrete.pc_sound.pyaudio")
+    def test_creation(self, mock_pyaudio):
+        mock_pyaudio.PyAudio.return_value = self.mock_driver
         factory = PcFactory({})
         self.assertTrue(isinstance(factory, AbstractFactory))
         self.assertIs(factory.pa, self.mock_driver)
-        mock_audio.assert_called_once()
+        mock_pyaudio.PyAudio.assert_called_once()
+
+    @patch("modules.concrete.pc_sound.pyaudio")
+    def test_creation_injected_driver(self, mock_pyaudio):
+        factory = PcFactory({"pyaudio": self.mock_driver})
+        self.assertIs(factory.pa, self.mock_driver)
+        mock_pyaudio.PyAudio.assert_not_called()
 
-    @patch("modules.concrete.pc_sound.pyaudio.PyAudio")
-    def test_destructor(self, mock_audio):
-        mock_audio.return_value = self.mock_driver
+    @patch("modules.concrete.pc_sound.pyaudio")
+    def test_destructor(self, mock_pyaudio):
+        mock_pyaudio.PyAudio.return_value = self.mock_driver
         factory = PcFactory({})
         self.mock_driver.terminate.assert_not_called()
         del factory
         self.mock_driver.terminate.assert_called_once()
 
+    def test_destructor_injected_driver(self):
+        factory = PcFactory({"pyaudio": self.mock_driver})
+        del factory
+        self.mock_driver.terminate.assert_not_called()
+
     @patch("modules.concrete.pc_sound.PcEmitter")
     def test_create_emitter(self, mock_emitter_class):
         PcFactory.create_emitter(self.mock_factory)
@@ -214,9 +276,16 @@ class TestPcFactory(unittest.TestCase):
 
     @patch("modules.concrete.pc_sound.PcReceiver")
     def test_create_receiver(self, mock_receiver_class):
+        self.mock_factory.calibration = None
         PcFactory.create_receiver(self.mock_factory)
         mock_receiver_class.assert_called_once_with(
-            {"pyaudio": self.mock_driver})
+            {"pyaudio": self.mock_driver, "calibration": None})
+
+    def test_calibration(self):
+        calibration = {"latency_s": 0.01, "jitter_s": 0.001}
+        factory = PcFactory(
+            {"pyaudio": self.mock_driver, "calibration": calibration})
+        self.assertIs(factory.create_receiver().calibration, calibration)
 
     @patch("modules.concrete.pc_sound.PcProcessor")
     def test_create_processor(self, mock_processor_class):
@@ -232,8 +301,11 @@ class TestPcEmitter(unittest.TestCase):
     """
     - test init
     - test check
+    - test warm up
     - test make beep
     - test emit beep
+    - test volume
+    - test sample format of the driver
     """
     def setUp(self):
         self.mock_pa = MagicMock()
@@ -256,6 +328,25 @@ class TestPcEmitter(unittest.TestCase):
         self.mock_stream.stop_stream.assert_called_once()
         self.mock_stream.close.assert_called_once()
 
+    def test_warm_up(self):
+        timings = self.emitter.warm_up()
+        self.assertListEqual(sorted(timings), ["cold_ms", "warm_ms"])
+        self.assertEqual(self.mock_pa.open.call_count, 2)
+        self.assertTrue(self.mock_pa.open.call_args.kwargs["output"])
+        self.assertEqual(self.mock_stream.close.call_count, 2)
+
+    @patch("modules.concrete.pc_sound.pyaudio")
+    def test_format(self, mock_pyaudio):
+        emitter = PcEmitter({"pyaudio": self.mock_pa})
+        self.assertIs(emitter.format, mock_pyaudio.paInt16)
+        emitter._open_close()
+        self.assertIs(self.mock_pa.open.call_args.kwargs["format"],
+                      mock_pyaudio.paInt16)
+
+        # a ready driver brings its own
+        emitter = PcEmitter({"pyaudio": fake_pyaudio.FakePyAudio()})
+        self.assertEqual(emitter.format, fake_pyaudio.paInt16)
+
     @patch('modules.concrete.pc_sound.PLAYING_DURATION_SECONDS', 0.001)
     @patch('modules.concrete.pc_sound.PcSample')
     def test_make_beep(self, mock_sample_class):
@@ -279,6 +370,7 @@ class TestPcEmitter(unittest.TestCase):
         # arrange
         mock_emitter = MagicMock(spec=PcEmitter)
         mock_emitter.pa = self.mock_pa
+        mock_emitter.volume = 1.
         mock_sample = MagicMock()
         mock_emitter._make_beep_sample.return_value = mock_sample
         fake_data = b"\x00\x01"
@@ -293,12 +385,32 @@ class TestPcEmitter(unittest.TestCase):
         self.mock_stream.stop_stream.assert_called_once_with()
         self.mock_stream.close.assert_called_once_with()
 
+    @patch("modules.concrete.pc_sound.time.sleep")
+    def test_volume(self, mock_sleep):
+        self.assertEqual(self.emitter.volume, 1.)
+        self.emitter.configure(volume=0.25, margin_s=0.1)
+        self.assertEqual(self.emitter.volume, 0.25)
+        self.emitter.configure(margin_s=0.1)
+        self.assertEqual(self.emitter.volume, 0.25)
+
+        self.emitter.emit_beep()
+        data = b"".join(
+            c.args[0] for c in self.mock_stream.write.call_args_list)
+        loudest = np.amax(np.abs(PcSample.from_data(data).to_values()))
+        expected = 0.25 * np.amax(self.emitter._make_beep_sample().to_values())
+        self.assertAlmostEqual(loudest, expected, places=4)
+
 
 class TestPcReceiver(unittest.TestCase):
     """
     - test init
     - test check
+    - test input device
+    - test channels
+    - test warm up
     - test n_chunks
+    - test margin
+    - test calibrated window
     - test stream called
     """
     def setUp(self):
@@ -323,6 +435,32 @@ class TestPcReceiver(unittest.TestCase):
         self.mock_stream.stop_stream.assert_called_once()
         self.mock_stream.close.assert_called_once()
 
+    def test_input_device(self):
+        self.receiver.check()
+        self.assertIsNone(
+            self.mock_pa.open.call_args.kwargs["input_device_index"])
+        receiver = PcReceiver(
+            {"pyaudio": self.mock_pa, "input_device_index": 3})
+        receiver.check()
+        self.assertEqual(
+            self.mock_pa.open.call_args.kwargs["input_device_index"], 3)
+
+    def test_channels(self):
+        self.mock_stream.read.return_value = b"\x00\x01" * 4
+        receiver = PcReceiver({"pyaudio": self.mock_pa, "channels": 4})
+        sample = receiver.record_signal()
+        self.assertEqual(self.mock_pa.open.call_args.kwargs["channels"], 4)
+        self.assertEqual(sample.n_channels, 4)
+        self.assertEqual(len(sample), self.mock_stream.read.call_count)
+
+    def test_warm_up(self):
+        timings = self.receiver.warm_up()
+        self.assertListEqual(sorted(timings), ["cold_ms", "warm_ms"])
+        self.assertEqual(self.mock_pa.open.call_count, 2)
+        self.assertTrue(self.mock_pa.open.call_args.kwargs["input"])
+        self.mock_stream.read.assert_not_called()
+        self.assertEqual(self.mock_stream.close.call_count, 2)
+
     @patch('modules.concrete.pc_sound.CHUNK', 100)
     @patch('modules.concrete.pc_sound.PcSample')
     def test_n_chunks(self, mock_sample_class):
@@ -335,7 +473,7 @@ class TestPcReceiver(unittest.TestCase):
 
         n_chunks = self.mock_stream.read.call_count
         mock_sample_class.from_chunks.assert_called_once_with(
-            n_chunks * [fake_data])
+            n_chunks * [fake_data], channels=1)
         self.assertIs(result, mock_sample)
 
     @patch('modules.concrete.pc_sound.CHUNK', 10)
@@ -346,6 +484,41 @@ class TestPcReceiver(unittest.TestCase):
         self.mock_stream.stop_stream.assert_called_once_with()
         self.mock_stream.close.assert_called_once_with()
 
+    @patch('modules.concrete.pc_sound.CHUNK', 441)
+    def test_margin(self):
+        self.mock_stream.read.return_value = b"\x00\x01"
+        self.receiver.record_signal()
+        full = self.mock_stream.read.call_count
+        self.receiver.configure(margin_s=0.05, volume=0.5)
+        self.assertEqual(self.receiver.margin_s, 0.05)
+        self.receiver.record_signal()
+        # 100 chunks per second
+        self.assertEqual(
+            full - (self.mock_stream.read.call_count - full), 29)
+        self.receiver.configure()
+        self.assertIsNone(self.receiver.margin_s)
+
+    @patch('modules.concrete.pc_sound.CHUNK', 441)
+    def test_calibrated(self):
+        _, n_full = self.receiver._window()
+        self.receiver.calibration = {"latency_s": 0.011, "jitter_s": 0.001}
+        n_skipped, n_chunks = self.receiver._window()
+        # pulse at 19 + 50 + 11 ms, 9 ms of guard, 20 ms of lead
+        self.assertEqual(n_skipped, 5)
+        self.assertEqual(n_chunks, int(100 * (0.080 + 0.009 + 0.34)) + 1)
+        self.assertLess(n_chunks - n_skipped, n_full)
+
+        self.mock_stream.read.side_effect = \
+            lambda n: bytes([self.mock_stream.read.call_count]) + b"\x00"
+        sample = self.receiver.record_signal()
+        # the skipped chunks read at once
+        self.mock_stream.read.assert_any_call(n_skipped * 441)
+        self.assertEqual(self.mock_stream.read.call_count,
+                         n_chunks - n_skipped + 1)
+        self.assertEqual(len(sample), n_chunks - n_skipped)
+        # the first chunk kept
+        self.assertEqual(sample.to_signal()[0], 2)
+
 
 class TestStripe(unittest.TestCase):
     """
@@ -428,7 +601,9 @@ class TestSeries(unittest.TestCase):
     - test get peaks
     - test get peaks
     - test get noise
+    - test get noise estimated
     - test get pulse max
+    - test get pulse max estimated
     """
     def test_init_type_error(self):
         with self.assertRaises(TypeError):
@@ -461,7 +636,7 @@ class TestSeries(unittest.TestCase):
         # act
         peaks = _Series.get_peaks(mock_series)
         # assert
-        self.assertListEqual(peaks, [])
+        self.assertEqual(peaks.shape, (0, 2))
 
     @patch('modules.concrete.pc_sound.SIGNAL_WIDTH_SECONDS', 1)
     @patch('modules.concrete.pc_sound.RATE', 100)
@@ -478,20 +653,43 @@ class TestSeries(unittest.TestCase):
         # assert
         mock_find_peaks.assert_called_once_with(
             mock_series._series, height=(8., 2.5), distance=101, prominence=4)
-        self.assertListEqual(peaks, [(5, 10)])
+        np.testing.assert_array_equal(peaks, [(5, 10)])
+
+    @patch('modules.concrete.pc_sound.RATE', 100)
+    @patch('modules.concrete.pc_sound.find_peaks')
+    def test_get_peaks_width(self, mock_find_peaks):
+        mock_series = MagicMock()
+        mock_series._noise = 2.0
+        mock_series._pulse_max = 10.0
+        mock_find_peaks.return_value = (np.array([]),
+                                        {"prominences": np.array([])})
+        _Series.get_peaks(mock_series, width_s=0.1)
+        args, kwargs = mock_find_peaks.call_args
+        self.assertEqual(kwargs["distance"], 11)
 
     def test_get_noise(self):
         mock_series = MagicMock()
         mock_series._series = np.array([1, 5, 10, 2])
+        mock_series._noise_estimate = None
         res = _Series._noise.fget(mock_series)
         self.assertEqual(res, 3.5)
 
+    def test_get_noise_estimated(self):
+        series = _Series(np.array([1., 5., 10., 2.]), noise=0.5)
+        self.assertEqual(series._noise, 0.5)
+        self.assertEqual(series.get_nps_metadata(), (0.5, 10., 20.))
+
     def test_get_pulse_max(self):
         mock_series = MagicMock()
         mock_series._series = np.array([-10, 100, 20])
+        mock_series._pulse_max_estimate = None
         res = _Series._pulse_max.fget(mock_series)
         self.assertEqual(res, 100)
 
+    def test_get_pulse_max_estimated(self):
+        series = _Series(np.array([1., 5., 2.]), noise=0.5, pulse_max=20.)
+        self.assertEqual(series.get_nps_metadata(), (0.5, 20., 40.))
+
 
 class TestPcProcessor(unittest.TestCase):
     """
@@ -503,9 +701,20 @@ class TestPcProcessor(unittest.TestCase):
     - test process low snr
     - test process no peaks
     - test process
+    - test no range gate
+    - test range gate
+    - test peaks of the range gate
+    - test most prominent peaks
+    - test distances of peaks
     """
     def setUp(self):
         self.mock_proc = MagicMock(spec=PcProcessor)
+        # no range gate
+        self.mock_proc._gate.side_effect = lambda sample: (sample, None)
+        self.mock_proc.peak_width_s = None
+        for hook in ["_check_frequency", "_transform", "_locate_offset"]:
+            getattr(self.mock_proc, hook).side_effect = partial(
+                getattr(PcProcessor, hook), self.mock_proc)
 
     def test_base_class(self):
         with self.assertRaises(TypeError):
@@ -527,12 +736,12 @@ class TestPcProcessor(unittest.TestCase):
         with self.assertRaises(ProcessorNoSoundError):
             PcProcessor._validate_sample(self.mock_proc, mock_sample)
 
-    @patch('modules.concrete.pc_sound.np.fft.fftfreq')
+    @patch('modules.concrete.pc_sound.np.fft.rfftfreq')
     def test_validate_sample_wrong_freq_error(self, mock_fft_freq):
         mock_sample = MagicMock()
         mock_sample.__len__.return_value = 4
         mock_sample.to_values.return_value = np.array([0, 1, 0, -1])
-        mock_fft_freq.return_value = np.array([0, 5, 10, 15])
+        mock_fft_freq.return_value = np.array([0, 5, 10])
 
         with self.assertRaises(ProcessorWrongFrequencyError) as cm:
             PcProcessor._validate_sample(self.mock_proc, mock_sample)
@@ -560,6 +769,7 @@ class TestPcProcessor(unittest.TestCase):
     @patch('modules.concrete.pc_sound.SNR_THRESHOLD', 10.0)
     def test_process_low_snr_error(self, mock_stripe_cls, mock_result_cls):
         mock_sample = MagicMock()
+        mock_sample.astype.return_value = mock_sample
         mock_stripe = MagicMock()
         mock_series = MagicMock()
         mock_result = MagicMock()
@@ -573,13 +783,14 @@ class TestPcProcessor(unittest.TestCase):
         mock_series.get_nps_metadata.return_value = (5.55, 5, 0.9)
 
         # act
-        result = PcProcessor.process(self.mock_proc, sample=mock_sample)
+        result = PcProcessor._process(self.mock_proc, sample=mock_sample)
 
         # assert
         self.assertIs(result, mock_result)
 
         kwargs = {
             "f_max": 369., "f_max_stripe": 375., "noise": 5.55, "snr": 0.9}
+        mock_sample.astype.assert_called_once_with(self.mock_proc.dtype)
         mock_stripe_cls.from_sample.assert_called_once_with(mock_sample)
         error_arg, error_kwargs = mock_result_cls.from_error.call_args
         self.assertIsInstance(error_arg[0], ProcessorNoisyDataError)
@@ -587,13 +798,14 @@ class TestPcProcessor(unittest.TestCase):
 
         self.mock_proc._validate_sample.assert_called_once_with(mock_sample)
         mock_stripe.get_offset.assert_called_once_with()
-        mock_stripe.squeeze.assert_called_once_with()
+        mock_stripe.squeeze.assert_called_once_with(None)
         mock_series.get_nps_metadata.assert_called_once_with()
 
     @patch('modules.concrete.pc_sound._Stripe')
     @patch('modules.concrete.pc_sound.Result')
     def test_process_no_peaks_error(self, mock_result_cls, mock_stripe_cls):
         mock_sample = MagicMock()
+        mock_sample.astype.return_value = mock_sample
         mock_stripe = MagicMock()
         mock_series = MagicMock()
         mock_result = MagicMock()
@@ -611,13 +823,14 @@ class TestPcProcessor(unittest.TestCase):
         mock_series.get_peaks.return_value = 'peaks_data'
 
         # act
-        result = PcProcessor.process(self.mock_proc, sample=mock_sample)
+        result = PcProcessor._process(self.mock_proc, sample=mock_sample)
 
         # assert
         self.assertIs(result, mock_result)
 
         kwargs = {
             "f_max": 369., "f_max_stripe": 375., "noise": 0.146, "snr": 445.21}
+        mock_sample.astype.assert_called_once_with(self.mock_proc.dtype)
         mock_stripe_cls.from_sample.assert_called_once_with(mock_sample)
         error_arg, error_kwargs = mock_result_cls.from_error.call_args
         self.assertIsInstance(error_arg[0], ProcessorNoPeaksDetectedError)
@@ -629,9 +842,9 @@ class TestPcProcessor(unittest.TestCase):
             'filtered_data', 123, 0.146)
 
         mock_stripe.get_offset.assert_called_once_with()
-        mock_stripe.squeeze.assert_called_once_with()
+        mock_stripe.squeeze.assert_called_once_with(None)
         mock_series.get_nps_metadata.assert_called_once_with()
-        mock_series.get_peaks.assert_called_once_with()
+        mock_series.get_peaks.assert_called_once_with(width_s=None)
 
     @patch('modules.concrete.pc_sound._Stripe')
     @patch('modules.concrete.pc_sound.Result')
@@ -639,6 +852,7 @@ class TestPcProcessor(unittest.TestCase):
     def test_process(self, mock_result_cls, mock_stripe_cls):
         # arrange
         mock_sample = MagicMock()
+        mock_sample.astype.return_value = mock_sample
         mock_stripe = MagicMock()
         mock_series = MagicMock()
         mock_result = MagicMock()
@@ -656,13 +870,14 @@ class TestPcProcessor(unittest.TestCase):
         mock_series.get_peaks.return_value = 'peaks_data'
 
         # act
-        result = PcProcessor.process(self.mock_proc, sample=mock_sample)
+        result = PcProcessor._process(self.mock_proc, sample=mock_sample)
 
         # assert
         self.assertIs(result, mock_result)
 
         kwargs = {
             "f_max": 369., "f_max_stripe": 375., "noise": 0.146, "snr": 445.21}
+        mock_sample.astype.assert_called_once_with(self.mock_proc.dtype)
         mock_stripe_cls.from_sample.assert_called_once_with(mock_sample)
         mock_result_cls.assert_called_once_with('processed_data', **kwargs)
 
@@ -672,9 +887,653 @@ class TestPcProcessor(unittest.TestCase):
             'filtered_data', 123, 0.146)
 
         mock_stripe.get_offset.assert_called_once_with()
-        mock_stripe.squeeze.assert_called_once_with()
+        mock_stripe.squeeze.assert_called_once_with(None)
         mock_series.get_nps_metadata.assert_called_once_with()
-        mock_series.get_peaks.assert_called_once_with()
+        mock_series.get_peaks.assert_called_once_with(width_s=None)
+
+    def test_no_gate(self):
+        processor = PcProcessor({})
+        sample = PcSample.from_values(np.ones(10))
+        self.assertEqual(processor._gate(sample), (sample, None))
+
+    def test_gate(self):
+        processor = PcProcessor({"max_range": 1.})
+        pulse = np.real(_Stripe._my_wavelet(20000, pcs.CARRIER_FREQUENCY))
+        values = np.roll(pulse, 5000 - 10000) \
+            + 0.01 * np.random.default_rng(0).standard_normal(20000)
+        window, noise = processor._gate(PcSample.from_values(values))
+
+        bank = _Stripe._get_bank(
+            (float(pcs.CARRIER_FREQUENCY),), np.dtype(float))
+        self.assertEqual(window.to_values()[0], values[5000 - bank.half_width])
+        lag = int(2 * 1. / pcs.SOUND_SPEED * pcs.RATE)
+        self.assertEqual(len(window), lag + 2 * bank.half_width)
+        # close to the noise of the whole recording
+        series = _Stripe.from_sample(PcSample.from_values(values)).squeeze()
+        self.assertAlmostEqual(noise / series._noise, 1., delta=0.1)
+
+    def test_gate_peaks(self):
+        processor = PcProcessor({"min_range": 1., "max_range": 2.})
+        lag = 2 / pcs.SOUND_SPEED * pcs.RATE
+        raw_peaks = [(100 + int(d * lag), 1.) for d in [0.5, 1.5, 2.5]]
+        np.testing.assert_array_equal(
+            processor._filter_peaks(raw_peaks, 100), [raw_peaks[1]])
+        # default - behind the main pulse
+        processor = PcProcessor({})
+        np.testing.assert_array_equal(
+            processor._filter_peaks(raw_peaks + [(100, 5.)], 100), raw_peaks)
+
+    def test_filter_peaks_top(self):
+        processor = PcProcessor({})
+        prominences = [5., 1., 7., 2., 6., 4., 3.]
+        raw_peaks = np.column_stack((np.arange(1, 8) * 10., prominences))
+        valid_peaks = processor._filter_peaks(raw_peaks, 0)
+        self.assertEqual(len(valid_peaks), pcs.MAX_PEAKS)
+        # the most prominent, in the order of timings
+        np.testing.assert_array_equal(
+            valid_peaks[:, 0], [10., 30., 50., 60., 70.])
+
+    def test_process_peaks(self):
+        processor = PcProcessor({})
+        lag = 2 / pcs.SOUND_SPEED * pcs.RATE
+        peaks = processor._process_peaks([(100 + lag, 8.), (100, 4.)], 100, 2.)
+        np.testing.assert_allclose(peaks, [(1., 4.), (0., 2.)])
+        self.assertEqual(processor._process_peaks([], 100, 2.).shape, (0, 2))
+
+
+class TestPcStackingProcessor(unittest.TestCase):
+    """
+    - test init
+    - test stack incoherent alignment
+    - test stack depth
+    - test stack reset on length change
+    - test refine offsets
+    - test single gated transform per ping
+    - test factory
+    """
+    def test_init(self):
+        proc = PcStackingProcessor({})
+        self.assertIsInstance(proc, PcProcessor)
+        self.assertEqual(proc.depth, 4)
+        self.assertTrue(proc.coherent)
+        proc = PcStackingProcessor({"depth": 7, "coherent": False})
+        self.assertEqual(proc.depth, 7)
+        self.assertEqual(proc.history.limit, 7)
+        self.assertFalse(proc.coherent)
+
+    def test_stack_alignment(self):
+        proc = PcStackingProcessor({"coherent": False})
+        first = np.array([0., 0., 4., 0., 2., 0.])
+        second = np.array([0., 0., 0., 4., 0., 2.])
+        proc._stack(first, 2)
+        stacked, offset = proc._stack(second, 3)
+        self.assertEqual(offset, 2)
+        np.testing.assert_array_equal(stacked, [0., 0., 4., 0., 2.])
+
+    def test_stack_depth(self):
+        proc = PcStackingProcessor({"depth": 2, "coherent": False})
+        proc._stack(np.array([9., 9.]), 0)
+        proc._stack(np.array([1., 1.]), 0)
+        stacked, _ = proc._stack(np.array([3., 3.]), 0)
+        np.testing.assert_array_equal(stacked, [2., 2.])
+
+    def test_stack_reset(self):
+        proc = PcStackingProcessor({"coherent": False})
+        proc._stack(np.array([9., 9.]), 0)
+        stacked, _ = proc._stack(np.array([1., 1., 1.]), 0)
+        self.assertEqual(len(proc.history.history), 1)
+        np.testing.assert_array_equal(stacked, [1., 1., 1.])
+
+    def test_refine_offsets(self):
+        n = 2000
+        pulse = np.real(_Stripe._my_wavelet(n, 3310))
+        matrix = np.stack([np.roll(pulse, 7), np.roll(pulse, -3), pulse])
+        # coarse offsets off by a few sample-points
+        offsets = np.array([n // 2 + 5, n // 2 - 1, n // 2 + 2])
+        result = PcStackingProcessor._refine_offsets(matrix, offsets)
+        np.testing.assert_array_equal(
+            result - result[-1], [7, -3, 0])
+
+    def test_single_transform(self):
+        for coherent in [True, False]:
+            proc = PcStackingProcessor(
+                {"coherent": coherent, "max_range": 2.})
+            sample = proc._make_warm_up_sample()
+            with patch.object(_Stripe, "from_sample",
+                              side_effect=_Stripe.from_sample) as mock:
+                for _ in range(2):
+                    result = proc.process(sample)
+            self.assertIsNone(result.error)
+            self.assertEqual(mock.call_count, 2)
+            (gated,), _ = mock.call_args
+            self.assertLess(len(gated), len(sample) / 4)
+
+    @patch("modules.concrete.pc_sound.pyaudio")
+    def test_factory(self, mock_pyaudio):
+        factory = PcStackingFactory({"depth": 3})
+        processor = factory.create_processor()
+        self.assertIsInstance(processor, PcStackingProcessor)
+        self.assertEqual(processor.depth, 3)
+
+
+class TestChirp(unittest.TestCase):
+    """
+    - test make chirp
+    - test emitter beep sample
+    - test validate sample wrong frequency
+    - test validate sample in band
+    - test compress
+    - test replica spectrum cache
+    - test factory
+    """
+    def test_make_chirp(self):
+        for method in ["linear", "hyperbolic"]:
+            chirp = _make_chirp(method)
+            self.assertEqual(len(chirp), 441)
+            self.assertTrue(np.iscomplexobj(chirp))
+            self.assertLessEqual(np.amax(np.abs(chirp)), 1. + 1e-9)
+            self.assertAlmostEqual(np.abs(chirp[220]), 1.)
+
+    def test_emitter_beep_sample(self):
+        emitter = PcChirpEmitter({"pyaudio": MagicMock()})
+        self.assertIsInstance(emitter, PcEmitter)
+        self.assertEqual(emitter.method, "linear")
+        values = emitter._make_beep_sample().to_values()
+        self.assertEqual(len(values), 4410)
+        self.assertLessEqual(np.amax(np.abs(values)), 1.)
+        self.assertEqual(values[0], 0.)
+        self.assertEqual(values[-1], 0.)
+
+    def test_validate_sample_wrong_freq_error(self):
+        values = 0.5 * np.sin(2 * np.pi * 500 / 44100 * np.arange(4000))
+        sample = PcSample.from_values(values)
+        with self.assertRaises(ProcessorWrongFrequencyError):
+            PcChirpProcessor({})._validate_sample(sample)
+
+    def test_validate_sample_in_band(self):
+        values = 0.5 * np.sin(2 * np.pi * 4500 / 44100 * np.arange(4000))
+        sample = PcSample.from_values(values)
+        f_max = PcChirpProcessor({})._validate_sample(sample)
+        self.assertAlmostEqual(f_max, 4500, delta=50)
+
+    def test_compress(self):
+        proc = PcChirpProcessor({})
+        values = np.zeros(3000)
+        values[1000:1441] = np.real(_make_chirp())
+        envelope = proc._compress(values)
+        self.assertEqual(len(envelope), 3000)
+        self.assertEqual(np.argmax(envelope), 1000)
+
+    def test_replica_spectrum_cache(self):
+        proc = PcChirpProcessor({})
+        spectrum = proc._replica_spectrum(1024)
+        self.assertEqual(len(spectrum), 513)
+        self.assertIs(proc._replica_spectrum(1024), spectrum)
+
+    @patch("modules.concrete.pc_sound.pyaudio")
+    def test_factory(self, mock_pyaudio):
+        factory = PcChirpFactory({"chirp": "hyperbolic"})
+        emitter = factory.create_emitter()
+        processor = factory.create_processor()
+        self.assertIsInstance(emitter, PcChirpEmitter)
+        self.assertIsInstance(processor, PcChirpProcessor)
+        self.assertIs(emitter.pa, factory.pa)
+        self.assertEqual(emitter.method, "hyperbolic")
+        self.assertEqual(processor.method, "hyperbolic")
+
+
+class TestFilterBank(unittest.TestCase):
+    """
+    - test kernels
+    - test output alignment
+    - test chunked equals batch
+    - test reset
+    - test transform of an array
+    """
+    def setUp(self):
+        self.frequencies = np.array([3000., 3300.])
+        self.bank = _FilterBank(self.frequencies)
+
+    def test_kernels(self):
+        n_kernel = 2 * self.bank.half_width + 1
+        self.assertEqual(self.bank._kernels.shape, (2, n_kernel))
+        # envelope at the truncation point is negligible
+        edge = np.abs(_Stripe._my_wavelet(n_kernel, 3000.)[0])
+        self.assertLess(edge, 1e-5)
+
+    def test_output_alignment(self):
+        values = np.zeros(2000)
+        values[700] = 1.
+        output = np.concatenate(
+            [self.bank.feed(values), self.bank.flush()], axis=1)
+        self.assertEqual(output.shape, (2, 2000))
+        self.assertEqual(np.argmax(np.abs(output[0])), 700)
+
+    def test_chunked_equals_batch(self):
+        values = np.random.default_rng(0).standard_normal(3000)
+        batch = np.concatenate(
+            [self.bank.feed(values), self.bank.flush()], axis=1)
+        chunked = [self.bank.feed(values[i:i + 100])
+                   for i in range(0, 3000, 100)]
+        chunked = np.concatenate(chunked + [self.bank.flush()], axis=1)
+        np.testing.assert_allclose(chunked, batch, atol=1e-9)
+
+    def test_reset(self):
+        self.bank.feed(np.ones(1000))
+        self.bank.reset()
+        self.assertTrue(np.all(self.bank._tail == 0))
+        self.assertEqual(self.bank._skip, self.bank.half_width)
+
+    def test_transform_array(self):
+        values = np.random.default_rng(0).standard_normal((3, 2000))
+        output = self.bank.transform(values)
+        self.assertEqual(output.shape, (3, 2, 2000))
+        for row, row_output in zip(values, output):
+            np.testing.assert_allclose(
+                row_output, self.bank.transform(row), atol=1e-9)
+
+
+class TestDtypePolicy(unittest.TestCase):
+    """
+    - test sample dtype
+    - test astype
+    - test filter bank precision
+    - test transform equals streamed output
+    - test float32 stripe
+    - test metadata plain floats
+    - test processor dtype
+    """
+    def test_sample_dtype(self):
+        data = b"\x00\x40\x00\xc0"
+        sample = PcSample.from_data(data, dtype=np.float32)
+        self.assertEqual(sample.to_values().dtype, np.float32)
+        np.testing.assert_array_equal(sample.to_values(), [0.5, -0.5])
+        self.assertEqual(PcSample.from_data(data).to_values().dtype,
+                         np.float64)
+
+    def test_astype(self):
+        sample = PcSample.from_values([0.5, -0.25])
+        self.assertIs(sample.astype(np.float64), sample)
+        converted = sample.astype("float32")
+        self.assertEqual(converted.to_values().dtype, np.float32)
+        self.assertEqual(sample.to_values().dtype, np.float64)
+
+    def test_filter_bank_precision(self):
+        bank = _FilterBank(np.array([3000., 3300.]), dtype=np.float32)
+        self.assertEqual(bank._kernels.dtype, np.complex64)
+        output = bank.feed(np.ones(500, dtype=np.float32))
+        self.assertEqual(output.dtype, np.complex64)
+
+    def test_transform(self):
+        bank = _FilterBank(np.array([3000., 3300.]))
+        values = np.random.default_rng(0).standard_normal(2000)
+        streamed = np.concatenate(
+            [bank.feed(values), bank.flush()], axis=1)
+        np.testing.assert_allclose(
+            bank.transform(values), streamed, atol=1e-9)
+
+    def test_float32_stripe(self):
+        values = np.real(_Stripe._my_wavelet(3000, 3310))
+        stripe_64 = _Stripe.from_sample(PcSample.from_values(values))
+        stripe_32 = _Stripe.from_sample(
+            PcSample.from_values(values, dtype=np.float32))
+        self.assertEqual(stripe_32._data.dtype, np.float32)
+        np.testing.assert_allclose(
+            stripe_32._data, stripe_64._data,
+            atol=1e-5 * np.amax(stripe_64._data))
+
+    def test_metadata_plain_floats(self):
+        series = _Series(np.array([1., 2., 10.], dtype=np.float32))
+        for value in series.get_nps_metadata():
+            self.assertIs(type(value), float)
+
+    def test_processor_dtype(self):
+        self.assertEqual(PcProcessor({}).dtype, np.float64)
+        proc = PcStreamingProcessor({"dtype": "float32"})
+        self.assertEqual(proc.dtype, np.float32)
+        self.assertEqual(proc.bank.dtype, np.float32)
+
+
+class TestPcStreamingProcessor(unittest.TestCase):
+    """
+    - test init
+    - test pulse offset pending
+    - test pulse offset after pulse passed
+    - test finish errors
+    - test process returns streamed result
+    """
+    def setUp(self):
+        self.proc = PcStreamingProcessor({})
+
+    def test_init(self):
+        self.assertIsInstance(self.proc, PcProcessor)
+        self.assertIsNone(self.proc.on_peaks)
+        self.assertIsNone(self.proc.pulse_offset)
+
+    @patch('modules.concrete.pc_sound.SIGNAL_WIDTH_SECONDS', 10 / 44100)
+    def test_pulse_offset(self):
+        self.proc._pulse = (3300., 100)
+        self.proc._n_timings = 105
+        self.assertIsNone(self.proc.pulse_offset)
+        self.proc._n_timings = 112
+        self.assertEqual(self.proc.pulse_offset, 100)
+
+    def test_finish_empty(self):
+        result = self.proc.finish(PcSample.from_values([]))
+        self.assertIn(ProcessorEmptyDataError.__name__, result.error)
+
+    def test_process_streamed_sample(self):
+        sample = PcSample.from_values(np.zeros(10))
+        self.proc._sample = sample
+        self.proc._result = "result"
+        self.assertEqual(self.proc.process(sample), "result")
+        result = self.proc.process(PcSample.from_values(np.zeros(10)))
+        self.assertIsInstance(result, Result)
+        self.assertIn(ProcessorNoSoundError.__name__, result.error)
+
+
+class TestPcStreamingReceiver(unittest.TestCase):
+    """
+    - test chunks fed to processor
+    - test factory shares processor
+    """
+    @patch('modules.concrete.pc_sound.CHUNK', 100)
+    def test_chunks_fed(self):
+        mock_pa = MagicMock()
+        mock_stream = MagicMock()
+        mock_pa.open.return_value = mock_stream
+        mock_stream.read.return_value = b"\x00\x01"
+        mock_processor = MagicMock()
+        receiver = PcStreamingReceiver(
+            {"pyaudio": mock_pa, "processor": mock_processor})
+
+        sample = receiver.record_signal()
+
+        mock_processor.reset.assert_called_once_with()
+        n_chunks = mock_stream.read.call_count
+        self.assertEqual(mock_processor.feed.call_count, n_chunks)
+        mock_processor.finish.assert_called_once_with(sample)
+
+    @patch("modules.concrete.pc_sound.pyaudio")
+    def test_factory(self, mock_pyaudio):
+        factory = PcStreamingFactory({})
+        receiver = factory.create_receiver()
+        processor = factory.create_processor()
+        self.assertIsInstance(receiver, PcStreamingReceiver)
+        self.assertIsInstance(processor, PcStreamingProcessor)
+        self.assertIs(receiver.processor, processor)
+
+
+class TestPcArray(unittest.TestCase):
+    """
+    - test arrivals
+    - test arrivals sub-sample
+    - test factory
+    """
+    def test_arrivals(self):
+        series = np.zeros((2, 100))
+        series[0, 50] = 1.
+        series[1, 53] = 1.
+        # out of the window
+        series[1, 90] = 5.
+        arrivals = PcArrayProcessor._arrivals(series, 50, max_lag=5)
+        np.testing.assert_allclose(arrivals, [50, 53])
+
+    def test_arrivals_sub_sample(self):
+        timings = np.arange(100)
+        series = np.stack([
+            -(timings - 40.) ** 2, -(timings - 42.25) ** 2]) + 1e4
+        arrivals = PcArrayProcessor._arrivals(series, 40, max_lag=5)
+        np.testing.assert_allclose(arrivals, [40, 42.25])
+
+    def test_factory(self):
+        mock_driver = MagicMock()
+        factory = PcArrayFactory(
+            {"pyaudio": mock_driver, "input_devices": [1, 2]})
+        receivers = factory.create_receivers()
+        self.assertListEqual([r.device_index for r in receivers], [1, 2])
+        self.assertTrue(all(r.pa is mock_driver for r in receivers))
+        self.assertIsInstance(factory.create_processor(), PcArrayProcessor)
+        self.assertListEqual(
+            [r.device_index for r in PcFactory.create_receivers(factory)],
+            [None])
+
+
+class TestPcMultiChannel(unittest.TestCase):
+    """
+    - test channel results
+    - test fused result
+    - test warm up sample
+    - test factory
+    """
+    def setUp(self):
+        self.processor = PcMultiChannelProcessor({})
+        self.rng = np.random.default_rng(0)
+        series = 0.1 + 0.01 * self.rng.random(3000)
+        series[1000] = 10.
+        series[1500] = 2.
+        self.series = series
+
+    def test_channel_results(self):
+        noise_only = 0.1 + 0.01 * self.rng.random(3000)
+        result = self.processor._channel_result(self.series)
+        self.assertIsNone(result.error)
+        self.assertEqual(len(result.peaks), 1)
+        result = self.processor._channel_result(noise_only)
+        self.assertIn(ProcessorNoisyDataError.__name__, result.error)
+
+    @patch("modules.concrete.pc_sound._Stripe.squeeze_many")
+    @patch.object(PcMultiChannelProcessor, "_validate_sample")
+    def test_fused(self, mock_validate, mock_squeeze_many):
+        noise_only = 0.1 + 0.01 * self.rng.random(3000)
+        mock_squeeze_many.return_value = np.stack([self.series, noise_only])
+        mock_validate.return_value = 3300.
+        sample = PcSample.from_values(np.zeros(6000), channels=2)
+
+        result = self.processor.process(sample)
+
+        self.assertEqual(mock_squeeze_many.call_args.args[0].shape, (2, 3000))
+        self.assertIsNone(result.error)
+        self.assertEqual(len(result.peaks), 1)
+        first, second = result.metadata["channels"]
+        self.assertIsNone(first["error"])
+        self.assertIsNotNone(second["error"])
+
+    def test_warm_up_sample(self):
+        sample = self.processor._make_warm_up_sample()
+        self.assertEqual(sample.n_channels, 2)
+        np.testing.assert_array_equal(sample.channel(0), sample.channel(1))
+
+    def test_factory(self):
+        mock_driver = MagicMock()
+        factory = PcMultiChannelFactory({"pyaudio": mock_driver})
+        self.assertEqual(factory.create_receiver().channels, 2)
+        factory = PcMultiChannelFactory(
+            {"pyaudio": mock_driver, "channels": 4})
+        self.assertEqual(factory.create_receiver().channels, 4)
+        self.assertIsInstance(
+            factory.create_processor(), PcMultiChannelProcessor)
+
+
+def _make_echo_sample(distance, noise=0.001, seed=0):
+    """the warm-up recording with the echo at `distance`"""
+    processor = PcProcessor({})
+    pulse = processor._make_warm_up_pulse()
+    n = len(processor._make_warm_up_sample())
+    start = int(pcs.PLAY_DELAY_SECONDS * pcs.RATE)
+    echo = start + int(2 * distance / pcs.SOUND_SPEED * pcs.RATE)
+    values = noise * np.random.default_rng(seed).standard_normal(n)
+    values[start:start + len(pulse)] += 0.5 * pulse
+    values[echo:echo + len(pulse)] += 0.1 * pulse
+    return PcSample.from_values(values)
+
+
+class TestTrack(unittest.TestCase):
+    """
+    - test prediction
+    - test update
+    - test miss
+    - test confirmation
+    """
+    def test_predict(self):
+        track = _Track(2., 10.)
+        self.assertEqual(track.predict(), 2.)
+        track.velocity = 0.1
+        self.assertAlmostEqual(track.predict(), 2.1)
+
+    def test_update(self):
+        track = _Track(2., 10.)
+        track.misses = 1
+        track.update(2.2, 20., alpha=0.5, beta=0.1)
+        self.assertAlmostEqual(track.distance, 2.1)
+        self.assertAlmostEqual(track.velocity, 0.02)
+        self.assertEqual(track.intensity, 20.)
+        self.assertEqual(track.misses, 0)
+
+    def test_miss(self):
+        track = _Track(2., 10.)
+        track.velocity = 0.1
+        track.miss()
+        self.assertAlmostEqual(track.distance, 2.1)
+        self.assertEqual(track.misses, 1)
+        self.assertDictEqual(
+            track.to_dict(),
+            {"distance": track.distance, "velocity": 0.1, "misses": 1,
+             "hits": 1})
+
+    def test_confirmed(self):
+        track = _Track(2., 10.)
+        self.assertFalse(track.confirmed)
+        for _ in range(pcs.TRACK_CONFIRM_HITS - 1):
+            track.update(2., 10., alpha=0.5, beta=0.1)
+        self.assertTrue(track.confirmed)
+
+
+class TestPcTrackingProcessor(unittest.TestCase):
+    """
+    - test association of peaks to tracks
+    - test lost tracks pruned
+    - test tentative tracks dropped on a miss
+    - test full search schedule
+    - test series of the searched parts
+    - test moving echo tracked
+    - test lost echo
+    - test echo predicted beyond the recording
+    - test warm up
+    - test factory
+    """
+    def setUp(self):
+        self.processor = PcTrackingProcessor({"full_search_every": 5})
+
+    @staticmethod
+    def _make_confirmed(distance):
+        track = _Track(distance, 10.)
+        track.hits = pcs.TRACK_CONFIRM_HITS
+        return track
+
+    def test_associate(self):
+        self.processor.tracks = [_Track(1., 10.), _Track(3., 10.)]
+        self.processor._associate(
+            np.array([(1.1, 20.), (1.2, 30.), (2., 40.)]))
+        first, second, *new = self.processor.tracks
+        self.assertAlmostEqual(first.distance, 1.05)
+        self.assertEqual(first.intensity, 20.)
+        self.assertEqual(second.misses, 1)
+        self.assertEqual([t.distance for t in new], [1.2, 2.])
+
+    def test_prune(self):
+        kept, lost = self._make_confirmed(1.), self._make_confirmed(2.)
+        kept.misses = 1
+        lost.misses = pcs.TRACK_MAX_MISSES + 1
+        self.processor.tracks = [kept, lost]
+        self.processor._prune()
+        self.assertEqual(self.processor.tracks, [kept])
+        self.assertTrue(self.processor._needs_full_search())
+
+    def test_prune_tentative(self):
+        confirmed, tentative = self._make_confirmed(1.), _Track(2., 10.)
+        tentative.misses = 1
+        self.processor.tracks = [confirmed, tentative]
+        self.processor.count = 1
+        self.processor._prune()
+        self.assertEqual(self.processor.tracks, [confirmed])
+        self.assertFalse(self.processor._needs_full_search())
+
+    def test_full_search_schedule(self):
+        self.assertTrue(self.processor._needs_full_search())
+        self.processor.tracks = [_Track(1., 10.)]
+        self.processor.count = 1
+        # tentative tracks only
+        self.assertTrue(self.processor._needs_full_search())
+        self.processor.tracks = [self._make_confirmed(1.)]
+        self.assertFalse(self.processor._needs_full_search())
+        self.processor.count = 5
+        self.assertTrue(self.processor._needs_full_search())
+
+    def test_window_series(self):
+        values = np.random.default_rng(0).standard_normal(3000)
+        centers = np.array([100, 1500, 2990])
+        parts = PcTrackingProcessor._window_series(values, centers, 50)
+        whole = _Stripe.squeeze_many(values[np.newaxis])[0]
+        self.assertEqual(parts.shape, (3, 101))
+        np.testing.assert_allclose(parts[1], whole[1450:1551], rtol=1e-6)
+        # out of the recording - transform of zeros
+        np.testing.assert_allclose(parts[2, :60], whole[2940:3000], rtol=1e-6)
+        self.assertTrue(np.all(parts[2, 70:] < parts[2, :60].min()))
+
+    def test_tracking(self):
+        searches = []
+        for i in range(6):
+            distance = 1.5 + 0.02 * i
+            result = self.processor.process(
+                _make_echo_sample(distance, seed=i))
+            searches.append(result.metadata["search"])
+            self.assertIsNone(result.error)
+            self.assertEqual(len(result.peaks), 1)
+            self.assertAlmostEqual(result.peaks[0][0], distance, delta=0.03)
+        self.assertEqual(
+            searches, 2 * ["full"] + 3 * ["tracked"] + ["full"])
+        track, = self.processor.tracks
+        self.assertAlmostEqual(track.velocity, 0.02, delta=0.01)
+
+    def test_lost(self):
+        for _ in range(pcs.TRACK_CONFIRM_HITS):
+            self.processor.process(_make_echo_sample(1.5))
+        result = self.processor.process(_make_echo_sample(2.5))
+        self.assertEqual(result.metadata["search"], "tracked")
+        self.assertIn(ProcessorNoPeaksDetectedError.__name__, result.error)
+        self.assertEqual(result.metadata["tracks"][0]["misses"], 1)
+
+        result = self.processor.process(_make_echo_sample(2.5))
+        self.assertEqual(result.metadata["search"], "full")
+        self.assertAlmostEqual(result.peaks[0][0], 2.5, delta=0.03)
+        self.assertEqual(len(self.processor.tracks), 2)
+
+    def test_beyond_recording(self):
+        for _ in range(pcs.TRACK_CONFIRM_HITS):
+            self.processor.process(_make_echo_sample(1.5))
+        near, = self.processor.tracks
+        far = self._make_confirmed(200.)
+        self.processor.tracks.append(far)
+
+        result = self.processor.process(_make_echo_sample(1.5))
+
+        self.assertEqual(result.metadata["search"], "tracked")
+        self.assertIsNone(result.error)
+        self.assertAlmostEqual(result.peaks[0][0], 1.5, delta=0.03)
+        self.assertEqual(near.misses, 0)
+        self.assertEqual(far.misses, 1)
+
+    def test_warm_up(self):
+        self.processor.warm_up()
+        self.assertEqual(self.processor.tracks, [])
+        self.assertEqual(self.processor.count, 0)
+
+    def test_factory(self):
+        factory = PcTrackingFactory({"pyaudio": MagicMock(), "gate": 0.5})
+        processor = factory.create_processor()
+        self.assertIsInstance(processor, PcTrackingProcessor)
+        self.assertEqual(processor.gate, 0.5)
 
 
 if __name__ == '__main__':
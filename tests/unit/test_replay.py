@@ -0,0 +1,194 @@
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from modules.concrete.binary_log import NO_ERROR, read_log
+from modules.concrete.pc_sound import (
+    PcProcessor, PcSample, PcTrackingProcessor)
+from modules.concrete.replay import (
+    ReplayError, ReplayFactory, ReplayReceiver, find_sessions, main,
+    open_session, replay, replay_session, save_session)
+
+
+def _make_recordings(n, seed=0):
+    sample = PcProcessor({})._make_warm_up_sample()
+    rng = np.random.default_rng(seed)
+    return [PcSample.from_values(
+        sample.to_values() + 0.001 * rng.standard_normal(len(sample)))
+        for _ in range(n)]
+
+
+class TestSession(unittest.TestCase):
+    """
+    test cases include:
+    - test save and open
+    - test single recording
+    - test recordings not split
+    - test empty session
+    - test sessions of directories
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "session.dat")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_open(self):
+        samples = [PcSample.from_values([0.5, -0.5, 0.]),
+                   PcSample.from_values([0.25, 0., -1.])]
+        save_session(samples[:1], self.path)
+        save_session(samples[1:], self.path)
+        pings = open_session(self.path, frames_per_ping=3)
+        self.assertIsInstance(pings, np.memmap)
+        self.assertEqual(pings.shape, (2, 3))
+        for ping, sample in zip(pings, samples):
+            np.testing.assert_array_equal(ping, sample.to_signal())
+
+    def test_single(self):
+        save_session([PcSample.from_values(np.zeros(10))], self.path)
+        self.assertEqual(open_session(self.path).shape, (1, 10))
+
+    def test_not_split(self):
+        save_session([PcSample.from_values(np.zeros(10))], self.path)
+        with self.assertRaises(ReplayError):
+            open_session(self.path, frames_per_ping=3)
+        with self.assertRaises(ReplayError):
+            open_session(self.path, frames_per_ping=3, channels=2)
+
+    def test_empty(self):
+        open(self.path, "wb").close()
+        with self.assertRaises(ReplayError):
+            open_session(self.path)
+
+    def test_find_sessions(self):
+        for name in ["b.dat", "a.dat", "notes.txt"]:
+            open(os.path.join(self.directory.name, name), "wb").close()
+        sessions = find_sessions([self.directory.name, "other.dat"])
+        self.assertEqual(
+            [os.path.basename(s) for s in sessions],
+            ["a.dat", "b.dat", "other.dat"])
+
+
+class TestReplayReceiver(unittest.TestCase):
+    """
+    test cases include:
+    - test recordings in order
+    - test end of session
+    - test loop
+    - test channels
+    - test factory
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "session.dat")
+        self.samples = [PcSample.from_values([0.5, -0.5]),
+                        PcSample.from_values([0.25, 0.])]
+        save_session(self.samples, self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_record(self):
+        receiver = ReplayReceiver({"path": self.path, "frames_per_ping": 2})
+        receiver.check()
+        self.assertEqual(receiver.n_pings, 2)
+        for sample in self.samples:
+            np.testing.assert_allclose(
+                receiver.record_signal().to_values(), sample.to_values(),
+                atol=1e-4)
+
+    def test_end(self):
+        receiver = ReplayReceiver({"path": self.path, "frames_per_ping": 2})
+        receiver.record_signal()
+        receiver.record_signal()
+        with self.assertRaises(ReplayError):
+            receiver.record_signal()
+
+    def test_loop(self):
+        receiver = ReplayReceiver(
+            {"path": self.path, "frames_per_ping": 2, "loop": True})
+        values = [receiver.record_signal().to_values()[0] for _ in range(3)]
+        self.assertAlmostEqual(values[2], values[0])
+
+    def test_channels(self):
+        receiver = ReplayReceiver(
+            {"path": self.path, "frames_per_ping": 1, "channels": 2})
+        sample = receiver.record_signal()
+        self.assertEqual(sample.n_channels, 2)
+        self.assertEqual(len(sample), 1)
+
+    def test_factory(self):
+        factory = ReplayFactory({"path": self.path, "processor": "tracking"})
+        self.assertIsInstance(factory.create_processor(), PcTrackingProcessor)
+        self.assertEqual(factory.create_receiver().path, self.path)
+        with self.assertRaises(ValueError):
+            ReplayFactory({"processor": "unknown"})
+
+
+class TestReplay(unittest.TestCase):
+    """
+    test cases include:
+    - test results of a session
+    - test batch in this process
+    - test batch on a process pool
+    - test command line
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.directory.name, "replay.log")
+        recordings = _make_recordings(4)
+        self.frames = len(recordings[0])
+        self.paths = []
+        for i in range(2):
+            path = os.path.join(self.directory.name, f"{i}.dat")
+            save_session(recordings[2 * i:2 * i + 2], path)
+            self.paths.append(path)
+        self.config = {"frames_per_ping": self.frames}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replay_session(self):
+        results = replay_session(self.paths[0], self.config)
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertIsNone(result.error)
+            self.assertAlmostEqual(result.peaks[0][0], 2., delta=0.05)
+
+    def test_in_process(self):
+        stats = replay([self.directory.name], self.log_path, self.config,
+                       workers=0)
+        self.assertEqual(stats["sessions"], 2)
+        self.assertEqual(stats["pings"], 4)
+        self.assertGreater(stats["pings_per_s"], 0.)
+        log = read_log(self.log_path)
+        self.assertEqual(len(log), 4)
+        self.assertTrue(np.all(log["error_code"] == NO_ERROR))
+
+    def test_pool(self):
+        config = dict(self.config, processor="tracking")
+        stats = replay(self.paths, self.log_path, config, workers=2)
+        self.assertEqual(stats["pings"], 4)
+        log = read_log(self.log_path)
+        np.testing.assert_allclose(log["distance"][:, 0], 2., atol=0.05)
+
+    def test_main(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            code = main(self.paths + [
+                "-o", self.log_path, "-f", str(self.frames), "-w", "0",
+                "-c", '{"dtype": "float32"}'])
+        self.assertEqual(code, 0)
+        self.assertIn("4 pings of 2 sessions", out.getvalue())
+        self.assertIn("pings/s", out.getvalue())
+        self.assertEqual(len(read_log(self.log_path)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
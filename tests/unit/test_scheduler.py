@@ -0,0 +1,138 @@
+
+import unittest
+from unittest.mock import patch
+
+from modules.concrete import scheduler as sch
+from modules.concrete.pc_sound import (
+    RECORDING_MARGIN_SECONDS, SNR_THRESHOLD, SOUND_SPEED)
+from modules.concrete.scheduler import PcAdaptiveScheduler
+from modules.core import Result
+
+
+def _result(snr, distances=(1.,)):
+    return Result([(d, 10.) for d in distances], noise=1., snr=snr)
+
+
+def _error(snr=0.):
+    return Result.from_error(RuntimeError("noisy"), snr=snr)
+
+
+class TestPcAdaptiveScheduler(unittest.TestCase):
+    """
+    test cases include:
+    - test initial settings
+    - test volume raised near the threshold
+    - test volume lowered well above the threshold
+    - test volume limits
+    - test margin follows the farthest echo
+    - test margin limits
+    - test margin explored
+    - test interval grows on errors at full volume
+    - test interval decays on useful results
+    - test cycle time from the timer
+    - test updates per second
+    """
+    def setUp(self):
+        self.scheduler = PcAdaptiveScheduler({"explore_every": 1000})
+        self.high_snr = 10 * SNR_THRESHOLD * sch.SNR_HEADROOM
+
+    def test_initial(self):
+        self.assertDictEqual(
+            self.scheduler.settings(), {"volume": 1., "margin_s": None})
+        self.assertEqual(self.scheduler.interval_s, 0.)
+        self.assertEqual(self.scheduler.updates_per_s(), 0.)
+
+    def test_volume_raised(self):
+        self.scheduler.volume = 0.5
+        settings = self.scheduler.update(_result(SNR_THRESHOLD + 1))
+        self.assertAlmostEqual(settings["volume"], 0.5 * sch.VOLUME_STEP)
+
+    def test_volume_lowered(self):
+        settings = self.scheduler.update(_result(self.high_snr))
+        self.assertAlmostEqual(settings["volume"], 1 / sch.VOLUME_STEP)
+        # one low SNR in the window stops it
+        self.scheduler.update(_result(SNR_THRESHOLD * sch.SNR_HEADROOM))
+        settings = self.scheduler.update(_result(self.high_snr))
+        self.assertAlmostEqual(settings["volume"], 1 / sch.VOLUME_STEP)
+
+    def test_volume_limits(self):
+        for _ in range(50):
+            settings = self.scheduler.update(_result(self.high_snr))
+        self.assertEqual(settings["volume"], sch.MIN_VOLUME)
+        for _ in range(50):
+            settings = self.scheduler.update(_error())
+        self.assertEqual(settings["volume"], 1.)
+
+    def test_margin(self):
+        self.scheduler.update(_result(self.high_snr, [1., 10.]))
+        settings = self.scheduler.update(_result(self.high_snr, [2.]))
+        expected = 2 * 10. / SOUND_SPEED * sch.RANGE_HEADROOM
+        self.assertAlmostEqual(settings["margin_s"], expected)
+        # errors do not change it
+        settings = self.scheduler.update(_error())
+        self.assertAlmostEqual(settings["margin_s"], expected)
+
+    def test_margin_limits(self):
+        settings = self.scheduler.update(_result(self.high_snr, [0.1]))
+        self.assertEqual(settings["margin_s"], sch.MIN_MARGIN_SECONDS)
+        settings = self.scheduler.update(_result(self.high_snr, [100.]))
+        self.assertEqual(settings["margin_s"], RECORDING_MARGIN_SECONDS)
+
+        scheduler = PcAdaptiveScheduler({"window": 2})
+        for _ in range(2):
+            settings = scheduler.update(_error())
+        self.assertIsNone(settings["margin_s"])
+
+    def test_margin_explored(self):
+        scheduler = PcAdaptiveScheduler({"explore_every": 3})
+        margins = [scheduler.update(_result(self.high_snr))["margin_s"]
+                   for _ in range(6)]
+        self.assertIsNone(margins[2])
+        self.assertIsNone(margins[5])
+        self.assertEqual(sum(m is None for m in margins), 2)
+
+    def test_interval_grows(self):
+        self.scheduler.volume = 0.5
+        self.scheduler.update(_error())
+        self.assertEqual(self.scheduler.interval_s, 0.)
+        for _ in range(10):
+            self.scheduler.update(_error())
+        # volume at full after 4 steps, from then on the interval grows
+        self.assertAlmostEqual(
+            self.scheduler.interval_s, 8 * sch.INTERVAL_STEP_SECONDS)
+        for _ in range(100):
+            self.scheduler.update(_error())
+        self.assertEqual(self.scheduler.interval_s, sch.MAX_INTERVAL_SECONDS)
+
+    def test_interval_decays(self):
+        self.scheduler.interval_s = 0.1
+        self.scheduler.update(_result(self.high_snr))
+        self.assertAlmostEqual(self.scheduler.interval_s, 0.05)
+        for _ in range(10):
+            self.scheduler.update(_result(self.high_snr))
+        self.assertEqual(self.scheduler.interval_s, 0.)
+
+    @patch("modules.concrete.scheduler.time.perf_counter",
+           side_effect=[10., 10.5, 11.2])
+    def test_cycle_time(self, mock_perf_counter):
+        self.scheduler.update(_result(self.high_snr), {"step": 300.})
+        self.scheduler.update(_result(self.high_snr), {})
+        self.scheduler.update(_result(self.high_snr))
+        cycles = [r.cycle_s for r in self.scheduler.records]
+        self.assertEqual(cycles[0], 0.3)
+        self.assertAlmostEqual(cycles[1], 0.5)
+        self.assertAlmostEqual(cycles[2], 0.7)
+
+    def test_updates_per_s(self):
+        self.scheduler.update(_result(self.high_snr), {"step": 250.})
+        self.assertAlmostEqual(self.scheduler.updates_per_s(), 4.)
+        self.scheduler.update(_error(), {"step": 250.})
+        # pause after the error included
+        interval_s = self.scheduler.interval_s
+        self.assertGreater(interval_s, 0.)
+        self.assertAlmostEqual(
+            self.scheduler.updates_per_s(), 1 / (0.5 + 2 * interval_s))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from modules.concrete.pc_sound import (
+    CHUNK, RATE, SOUND_SPEED,
+    PcChirpProcessor, PcProcessor, PcSample)
+from modules.concrete.simulation import (
+    SimEmitter, SimFactory, SimReceiver, SimScene)
+
+
+class TestSimScene(unittest.TestCase):
+    """
+    test cases include:
+    - test recording length
+    - test seeded reproducibility
+    - test impulse response
+    - test fractional delay
+    - test clipping and quantization
+    - test chirp pulse
+    """
+    def test_recording_length(self):
+        sample = SimScene({"seed": 0}).render()
+        self.assertIsInstance(sample, PcSample)
+        self.assertEqual(len(sample) % CHUNK, 0)
+        self.assertEqual(len(sample), 21 * CHUNK)
+
+    def test_seeded(self):
+        first = SimScene({"seed": 5})
+        second = SimScene({"seed": 5})
+        for _ in range(2):
+            np.testing.assert_array_equal(
+                first.render().to_values(), second.render().to_values())
+        self.assertEqual(first.n_pings, 2)
+        self.assertFalse(np.array_equal(
+            SimScene({"seed": 6}).render().to_values(),
+            SimScene({"seed": 7}).render().to_values()))
+
+    @patch("modules.concrete.simulation.PLAY_DELAY_SECONDS", 0.)
+    def test_impulse_response(self):
+        distance = SOUND_SPEED / RATE * 50  # 100 points round trip
+        scene = SimScene({"echoes": [(distance, 0.1)], "reverb": 0.,
+                          "latency_s": 0., "jitter_s": 0.})
+        response = scene._impulse_response()
+        self.assertAlmostEqual(response[0], 0.8)
+        self.assertAlmostEqual(np.sum(response[1:]), 0.1)
+        self.assertIn(np.argmax(response[1:]) + 1, [99, 100])
+
+    @patch("modules.concrete.simulation.PLAY_DELAY_SECONDS", 0.)
+    def test_fractional_delay(self):
+        distance = SOUND_SPEED / RATE * 50.25
+        scene = SimScene({"echoes": [(distance, 0.1)], "reverb": 0.,
+                          "latency_s": 0., "jitter_s": 0.,
+                          "direct_gain": 0.})
+        response = scene._impulse_response()
+        self.assertAlmostEqual(response[100], 0.05)
+        self.assertAlmostEqual(response[101], 0.05)
+
+    def test_clipping(self):
+        scene = SimScene({"seed": 0, "direct_gain": 10.})
+        values = scene.render().to_values()
+        self.assertEqual(np.amin(values), -1.)
+        self.assertLess(np.amax(values), 1.)
+        signal = values * PcSample._max_volume
+        np.testing.assert_array_equal(signal, np.round(signal))
+
+    def test_chirp_pulse(self):
+        beep = SimScene({}).pulse
+        chirp = SimScene({"chirp": "linear"}).pulse
+        self.assertEqual(len(beep), len(chirp))
+        self.assertFalse(np.allclose(beep, chirp))
+
+
+class TestSimDevices(unittest.TestCase):
+    """
+    test cases include:
+    - test factory creations
+    - test chirp processor
+    - test realtime receiver
+    """
+    def test_creations(self):
+        factory = SimFactory({"seed": 0})
+        emitter = factory.create_emitter()
+        receiver = factory.create_receiver()
+        self.assertIsInstance(emitter, SimEmitter)
+        self.assertIsInstance(receiver, SimReceiver)
+        self.assertIs(emitter.scene, factory.scene)
+        self.assertIs(receiver.scene, factory.scene)
+        self.assertFalse(receiver.realtime)
+        self.assertIs(type(factory.create_processor()), PcProcessor)
+        factory.check()
+        emitter.check()
+        receiver.check()
+        emitter.emit_beep()
+
+    def test_chirp_processor(self):
+        factory = SimFactory({"chirp": "linear"})
+        self.assertIsInstance(factory.create_processor(), PcChirpProcessor)
+
+    @patch("modules.concrete.simulation.time.sleep")
+    def test_realtime(self, mock_sleep):
+        receiver = SimFactory({"realtime": True}).create_receiver()
+        sample = receiver.record_signal()
+        mock_sleep.assert_called_once_with(len(sample) / RATE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,12 @@
 
+import io
+import threading
 import unittest
 from unittest.mock import MagicMock, patch
 
 from modules.abstract.abstract_display import AbstractDisplay
-from modules.concrete.text_display import TextDisplay
+from modules.concrete.text_display import (
+    CLEAR_DOWN, LiveTextDisplay, TextDisplay)
 
 
 class TestTextDisplay(unittest.TestCase):
@@ -132,5 +135,118 @@ class TestTextDisplay(unittest.TestCase):
         mock_print.assert_called_once_with(expected, flush=True)
 
 
+class TestLiveTextDisplay(unittest.TestCase):
+    """
+    test cases include:
+    - test creation
+    - test print does not block
+    - test draw
+    - test redraw in place
+    - test skip unchanged frame
+    - test coalesce results
+    - test close draws pending result
+    - test result printed after close not drawn
+    """
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.display = LiveTextDisplay(
+            {"refresh_rate": 1000, "stream": self.stream})
+
+    def tearDown(self):
+        self.display.close()
+
+    @staticmethod
+    def _make_result(snr):
+        return TestTextDisplay._make_mock_result(snr=snr)
+
+    def test_creation(self):
+        self.assertIsInstance(self.display, TextDisplay)
+        self.assertEqual(self.display.refresh_period, 0.001)
+        self.assertIs(self.display.stream, self.stream)
+        self.assertTrue(self.display._thread.daemon)
+        self.assertTrue(self.display._thread.is_alive())
+
+    def test_print_does_not_block(self):
+        release = threading.Event()
+        self.display._format = MagicMock(
+            side_effect=lambda result: release.wait(5) and "frame")
+        self.display.print(self._make_result(1.))
+        self.display.print(self._make_result(2.))
+        release.set()
+
+    def test_draw(self):
+        self.display.print(self._make_result(48.7894))
+        self.display.close()
+        self.assertEqual(self.stream.getvalue(), (
+            "=========================\n"
+            "Distance:\n"
+            "\t[no data]\n"
+            "\n"
+            "background noise: 114.84\n"
+            "signal-to-noise ratio: 48.8\n"
+            "\n"
+            "{}\n"))
+        self.assertEqual(self.display.frames_drawn, 1)
+
+    def test_redraw_in_place(self):
+        self.display.print(self._make_result(1.))
+        self._wait_drawn(1)
+        self.display.print(self._make_result(2.))
+        self._wait_drawn(2)
+        txt = self.stream.getvalue()
+        first_frame, second_frame = txt.split("\x1b[8F" + CLEAR_DOWN)
+        self.assertNotIn("\x1b", first_frame)
+        self.assertTrue(first_frame.endswith("ratio: 1.0\n\n{}\n"))
+        self.assertTrue(second_frame.endswith("ratio: 2.0\n\n{}\n"))
+
+    def test_skip_unchanged_frame(self):
+        for _ in range(3):
+            self.display.print(self._make_result(1.))
+            self.display._new_result.set()
+        self.display.close()
+        self.assertEqual(self.display.frames_drawn, 1)
+        self.assertEqual(self.stream.getvalue().count("Distance"), 1)
+
+    def test_coalesce_results(self):
+        display = LiveTextDisplay({"refresh_rate": 0.1, "stream": self.stream})
+        display.print(self._make_result(0.))
+        self._wait_drawn(1, display)
+        for snr in range(1, 50):
+            display.print(self._make_result(float(snr)))
+        display.close()
+        self.assertEqual(display.frames_drawn, 2)
+        self.assertEqual(display.frames_skipped, 48)
+        self.assertTrue(self.stream.getvalue().endswith(
+            "signal-to-noise ratio: 49.0\n\n{}\n"))
+
+    def test_close_draws_pending_result(self):
+        display = LiveTextDisplay({"refresh_rate": 0.1, "stream": self.stream})
+        display.print(self._make_result(1.))
+        self._wait_drawn(1, display)
+        # waits for the next refresh, 10 s away
+        display.print(self._make_result(2.))
+        display.close()
+        self.assertFalse(display._thread.is_alive())
+        self.assertEqual(display.frames_drawn, 2)
+        self.assertTrue(self.stream.getvalue().endswith(
+            "signal-to-noise ratio: 2.0\n\n{}\n"))
+
+    def test_print_after_close_not_drawn(self):
+        self.display.close()
+        self.assertFalse(self.display._thread.is_alive())
+        self.display.print(self._make_result(3.))
+        self.assertEqual(self.stream.getvalue(), "")
+        self.display._render()
+        self.assertIn("signal-to-noise ratio: 3.0", self.stream.getvalue())
+
+    def _wait_drawn(self, n_frames, display=None):
+        display = display or self.display
+        for _ in range(500):
+            if display.frames_drawn >= n_frames:
+                return
+            threading.Event().wait(0.01)
+        self.fail(f"{n_frames} frames not drawn")
+
+
 if __name__ == '__main__':
     unittest.main()
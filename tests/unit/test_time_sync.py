@@ -0,0 +1,166 @@
+
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from modules.time_sync import SYNC_WINDOW, ClockEstimator, TimeSync
+
+
+def _exchange(t1, offset_ns, forward_ns, backward_ns, processing_ns=1000):
+    t2 = t1 + forward_ns + offset_ns
+    t3 = t2 + processing_ns
+    t4 = t3 - offset_ns + backward_ns
+    return t1, t2, t3, t4
+
+
+class TestClockEstimator(unittest.TestCase):
+    """
+    test cases include:
+    - test no data
+    - test symmetric exchange
+    - test history limit
+    - test outlier rejection
+    - test contended exchanges
+    - test drift
+    - test lead
+    """
+    def setUp(self):
+        self.estimator = ClockEstimator()
+
+    def test_no_data(self):
+        with self.assertRaises(RuntimeError):
+            self.estimator.offset_ns(0)
+        with self.assertRaises(RuntimeError):
+            self.estimator.lead_s()
+
+    def test_symmetric_exchange(self):
+        self.estimator.add(*_exchange(10_000, 5_000_000, 2_000, 2_000))
+        self.assertEqual(len(self.estimator), 1)
+        self.assertAlmostEqual(self.estimator.offset_ns(10_000), 5_000_000)
+        self.assertAlmostEqual(self.estimator.forward_s, 2e-6)
+        self.assertEqual(self.estimator.drift, 0.)
+
+    def test_history_limit(self):
+        estimator = ClockEstimator(limit=3)
+        for i in range(5):
+            estimator.add(*_exchange(i * 1000, 0, 100, 100))
+        self.assertEqual(len(estimator), 3)
+
+    def test_outlier_rejection(self):
+        t1 = 0
+        for i in range(20):
+            # a slow, asymmetric exchange every now and then
+            backward = 50_000_000 if i % 5 == 0 else 1_000_000
+            self.estimator.add(*_exchange(t1, 7_000_000, 1_000_000, backward))
+            t1 += 10_000_000
+        self.assertAlmostEqual(
+            self.estimator.offset_ns(t1) / 1e6, 7., places=3)
+
+    def test_contended_exchanges(self):
+        rng = np.random.default_rng(0)
+        time_sync = TimeSync(None, ["a"])
+        estimator = time_sync.estimators["a"]
+        t1 = 0
+        for _ in range(5):
+            # a re-sync, 3 in 4 exchanges queued behind a ping
+            for i in range(SYNC_WINDOW // 4):
+                queued = 0 if i % 4 == 0 else int(rng.uniform(5e7, 8e8))
+                estimator.add(*_exchange(
+                    t1, 5_000_000, 1_000_000 + queued, 1_000_000))
+                t1 += 10_000_000
+            t1 += 10_000_000_000
+            self.assertAlmostEqual(
+                estimator.offset_ns(t1) / 1e6, 5., delta=0.1)
+            self.assertLess(time_sync.lead_s(), 0.005)
+
+    def test_drift(self):
+        drift = 50e-6
+        t1 = 0
+        for _ in range(30):
+            offset = int(1_000_000 + drift * t1)
+            self.estimator.add(*_exchange(t1, offset, 500_000, 500_000))
+            t1 += 100_000_000
+        self.assertAlmostEqual(self.estimator.drift / drift, 1., places=3)
+        expected = 1_000_000 + drift * (t1 + 1_000_000_000)
+        self.assertAlmostEqual(
+            self.estimator.offset_ns(t1 + 1_000_000_000) / expected, 1.,
+            places=4)
+
+    @patch('modules.time_sync.MIN_MARGIN_S', 0.001)
+    @patch('modules.time_sync.JITTER_FACTOR', 2.)
+    def test_lead(self):
+        t1 = 0
+        for forward in 10 * [4_000_000, 6_000_000]:
+            # the same round trip, the jitter is in the forward delay
+            self.estimator.add(
+                *_exchange(t1, 0, forward, 10_000_000 - forward))
+            t1 += 10_000_000
+        self.assertAlmostEqual(self.estimator.forward_s, 0.005)
+        self.assertAlmostEqual(self.estimator.jitter_s, 1.4826 * 0.001)
+        self.assertAlmostEqual(
+            self.estimator.lead_s(), 0.005 + 2 * 1.4826 * 0.001 + 0.001)
+
+
+class TestTimeSync(unittest.TestCase):
+    """
+    test cases include:
+    - test sync with warm-up
+    - test schedule delay
+    - test start disabled
+    - test background failure
+    """
+    def setUp(self):
+        self.clock = [0]
+        self.offsets = {"a": 2_000_000, "b": -3_000_000}
+
+        def probe(host):
+            self.clock[0] += 10_000_000
+            return _exchange(self.clock[0], self.offsets[host],
+                             1_000_000, 1_000_000)
+
+        self.probe = MagicMock(side_effect=probe)
+
+    def test_sync_with_warm_up(self):
+        time_sync = TimeSync(self.probe, ["a", "b"], rounds=3)
+        time_sync.sync(warm_up_rounds=1)
+        self.assertEqual(self.probe.call_count, 8)
+        self.assertEqual(len(time_sync.estimators["a"]), 3)
+        self.assertEqual(len(time_sync.estimators["b"]), 3)
+
+    def test_schedule_delay(self):
+        time_sync = TimeSync(self.probe, ["a", "b"], rounds=3)
+        time_sync.sync()
+        lead = time_sync.lead_s()
+        self.assertAlmostEqual(
+            time_sync.schedule_delay_s("a", self.clock[0]), lead + 0.002)
+        self.assertAlmostEqual(
+            time_sync.schedule_delay_s("b", self.clock[0]), lead - 0.003)
+
+    def test_start_disabled(self):
+        time_sync = TimeSync(self.probe, ["a"], interval_s=None)
+        time_sync.start()
+        self.assertIsNone(time_sync._thread)
+        time_sync.stop()
+
+    @patch('builtins.print')
+    def test_background_failure(self, mock_print):
+        retried = threading.Event()
+
+        def fail(*args):
+            if probe.call_count >= 2:
+                retried.set()
+            raise ConnectionError("down")
+        probe = MagicMock(side_effect=fail)
+        time_sync = TimeSync(probe, ["a"], interval_s=0.001)
+        time_sync.start()
+        self.assertTrue(retried.wait(5.))
+        time_sync.stop()
+        self.assertIsNone(time_sync._thread)
+        mock_print.assert_called_with(
+            "time sync failed: ConnectionError: down", flush=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
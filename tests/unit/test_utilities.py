@@ -1,9 +1,15 @@
 
+import os
+import sys
+import tempfile
+import threading
 import unittest
 from unittest.mock import MagicMock, patch
 
-from modules.utilities import \
-     _timestamp_to_ns, compute_latency, get_timestamp, wait_till_time
+from modules.utilities import (
+    _timestamp_to_ns, compute_latency, get_timestamp, get_timestamp_ns,
+    lazy_import, timestamp_to_ns, wait_till_time
+)
 
 
 class TestTimestampToNs(unittest.TestCase):
@@ -13,6 +19,9 @@ class TestTimestampToNs(unittest.TestCase):
     - test wrong input str format
     - test ancient time to minus values
     - test normal, assert int result
+    - test short fraction
+    - test fraction too long
+    - test timezone-aware
     """
     def test_wrong_input_int(self):
         with self.assertRaises(AttributeError):
@@ -33,6 +42,49 @@ class TestTimestampToNs(unittest.TestCase):
         self.assertIsInstance(result, int)
         self.assertEqual(result, 1696925410500000000)
 
+    def test_short_fraction(self):
+        # an explicit offset - not the time zone of the machine
+        for ts in ["2023-10-10T10:10:10.5+02:00",
+                   "2023-10-10T10:10:10.500000+02:00",
+                   "2023-10-10T08:10:10.50Z"]:
+            self.assertEqual(_timestamp_to_ns(ts), 1696925410500000000)
+
+    def test_fraction_too_long(self):
+        with self.assertRaises(ValueError):
+            _timestamp_to_ns("2023-10-10T10:10:10.0000000001")
+
+    def test_timezone_aware(self):
+        for ts in ["2023-10-10T08:10:10.000000007Z",
+                   "2023-10-10T08:10:10.000000007+00:00",
+                   "2023-10-10T10:10:10.000000007+02:00"]:
+            self.assertEqual(_timestamp_to_ns(ts), 1696925410000000007)
+
+
+class TestTimestampToNsDispatch(unittest.TestCase):
+    """
+    test cases include:
+    - test int passes through
+    - test str is parsed
+    """
+    def test_int(self):
+        self.assertEqual(timestamp_to_ns(1696925410500000000),
+                         1696925410500000000)
+
+    @patch('modules.utilities._timestamp_to_ns')
+    def test_str(self, mock_to_ns):
+        mock_to_ns.return_value = 15
+        self.assertEqual(timestamp_to_ns("mock_timestamp"), 15)
+        mock_to_ns.assert_called_once_with("mock_timestamp")
+
+
+class TestGetTimestampNs(unittest.TestCase):
+    @patch('modules.utilities.time')
+    def test_latency(self, mock_time):
+        mock_time.time_ns.return_value = 1000000000700000000
+        self.assertEqual(get_timestamp_ns(), 1000000000700000000)
+        self.assertEqual(get_timestamp_ns(latency_s=1.5),
+                         1000000002200000000)
+
 
 class TestGetTimestamp(unittest.TestCase):
     """
@@ -73,6 +125,7 @@ class TestComputeLatency(unittest.TestCase):
     test cases include:
     - test same minus same
     - test error side effect
+    - test int timestamp
     """
     @patch('modules.utilities.time')
     @patch('modules.utilities._timestamp_to_ns')
@@ -89,6 +142,14 @@ class TestComputeLatency(unittest.TestCase):
         with self.assertRaises(ValueError):
             compute_latency("bad_format")
 
+    @patch('modules.utilities.time')
+    @patch('modules.utilities._timestamp_to_ns')
+    def test_int_timestamp(self, mock_to_ns, mock_time):
+        mock_time.time_ns.return_value = 2_500_000_000
+        result = compute_latency(2_000_000_000)
+        self.assertEqual(result, 0.5)
+        mock_to_ns.assert_not_called()
+
 
 class TestWaitTillTime(unittest.TestCase):
     """
@@ -117,6 +178,83 @@ class TestWaitTillTime(unittest.TestCase):
         wait_till_time("mock_future_timestamp")
         mock_time.sleep.assert_called_once_with(1.0)
 
+    @patch('modules.utilities.time')
+    def test_wait_int_timestamp(self, mock_time):
+        mock_time.time_ns.return_value = 1_000_000_000
+        wait_till_time(1_250_000_000)
+        mock_time.sleep.assert_called_once_with(0.25)
+
+
+class TestLazyImport(unittest.TestCase):
+    """
+    test cases include:
+    - test already imported
+    - test executed on first use
+    - test executed once by concurrent threads
+    - test missing module fails on use
+    - test missing module patched
+    """
+    def test_already_imported(self):
+        self.assertIs(lazy_import("unittest"), unittest)
+
+    def test_executed_on_first_use(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "_lazy_probe.py"), "w") as f:
+                f.write("import sys\n"
+                        "sys._lazy_probe_executed = True\n"
+                        "VALUE = 5\n")
+            sys.path.insert(0, directory)
+            try:
+                module = lazy_import("_lazy_probe")
+                self.assertFalse(hasattr(sys, "_lazy_probe_executed"))
+                self.assertEqual(module.VALUE, 5)
+                self.assertTrue(sys._lazy_probe_executed)
+            finally:
+                sys.path.remove(directory)
+                sys.modules.pop("_lazy_probe", None)
+                vars(sys).pop("_lazy_probe_executed", None)
+
+    def test_concurrent_first_use(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "_lazy_slow.py"), "w") as f:
+                f.write("import sys, time\n"
+                        "sys._lazy_slow_runs = "
+                        "getattr(sys, '_lazy_slow_runs', 0) + 1\n"
+                        "time.sleep(0.05)\n"
+                        "VALUE = 5\n")
+            sys.path.insert(0, directory)
+            try:
+                module = lazy_import("_lazy_slow")
+                values = []
+                threads = [threading.Thread(
+                    target=lambda: values.append(module.VALUE))
+                    for _ in range(4)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join(5.)
+                self.assertListEqual(values, 4 * [5])
+                self.assertEqual(sys._lazy_slow_runs, 1)
+            finally:
+                sys.path.remove(directory)
+                sys.modules.pop("_lazy_slow", None)
+                vars(sys).pop("_lazy_slow_runs", None)
+
+    def test_missing_module(self):
+        module = lazy_import("_not_existing_module")
+        self.assertNotIn("_not_existing_module", sys.modules)
+        with self.assertRaises(ModuleNotFoundError):
+            module.anything
+        self.assertFalse(hasattr(module, "__func__"))
+        self.assertFalse(hasattr(module, "_is_coroutine"))
+
+    def test_missing_module_patched(self):
+        holder = MagicMock()
+        holder.missing = lazy_import("_not_existing_module")
+        with patch.object(holder, "missing") as mock_module:
+            mock_module.anything.return_value = 5
+            self.assertEqual(holder.missing.anything(), 5)
+
 
 if __name__ == '__main__':
     unittest.main()